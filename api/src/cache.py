@@ -0,0 +1,223 @@
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Callable, Hashable, Iterable, Sequence, Tuple
+
+import asyncpg
+from event_gulper_models import (
+    EVENTS_CHANGED_CHANNEL,
+    ArchivedPartition,
+    EventDetailDB,
+)
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+# Seconds between attempts to (re)connect the change listener, backing off
+LISTEN_RETRY_DELAYS: Sequence[float] = (1, 2, 5, 10, 30, 60)
+
+
+class TTLCache:
+    """In-process cache whose entries expire after a fixed time, evicting LRU."""
+
+    def __init__(self, ttl: float, max_entries: int = 256):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl: Seconds an entry stays valid
+            max_entries: Maximum number of entries before the least recently used
+                one is evicted
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, Tuple[float, object]] = OrderedDict()
+
+    def get(self, key: Hashable) -> object | None:
+        """Get an unexpired entry, or None."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: object) -> None:
+        """Store an entry, evicting the least recently used one if full."""
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        self._entries.clear()
+
+
+class DataVersion:
+    """
+    Cached time of the last change to event_details.
+
+    Changes are writes, which set updated_at, and detached partitions, which are
+    logged in archived_partitions. The version is read with one query of two
+    indexed max() lookups and reused for `ttl` seconds, or until `invalidate` is
+    called because the pipeline signalled a change.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._version: datetime | None = None
+        self._expires_at = 0.0
+
+    async def get(self, session: AsyncSession) -> datetime | None:
+        """Get the time of the last change, or None if there never was one."""
+        if time.monotonic() >= self._expires_at:
+            result = await session.execute(
+                select(
+                    select(func.max(EventDetailDB.updated_at)).scalar_subquery(),
+                    select(func.max(ArchivedPartition.archived_at)).scalar_subquery(),
+                )
+            )
+            self._version = max(
+                (moment for moment in result.one() if moment is not None),
+                default=None,
+            )
+            self._expires_at = time.monotonic() + self.ttl
+        return self._version
+
+    def invalidate(self) -> None:
+        """Force the next `get` to read the version from the database."""
+        self._expires_at = 0.0
+
+
+def make_etag(
+    version: datetime | None,
+    path: str,
+    params: Iterable,
+    as_of: datetime | None = None,
+) -> str:
+    """
+    Build a strong ETag from the data version and the request's path and query,
+    plus the time the response was computed for if it depends on the time.
+    """
+    key = f"{version.isoformat() if version else ''}|{path}|{sorted(params)}"
+    if as_of is not None:
+        key += f"|{as_of.isoformat()}"
+    return f'"{hashlib.sha256(key.encode()).hexdigest()[:32]}"'
+
+
+def http_date(moment: datetime) -> str:
+    """Format a naive UTC datetime as an HTTP date."""
+    return format_datetime(moment.replace(tzinfo=timezone.utc), usegmt=True)
+
+
+def last_modified_time(version: datetime | None, now: datetime) -> datetime | None:
+    """
+    Get the Last-Modified time to send for a data version, if any.
+
+    HTTP dates have second precision, so the version is rounded up: rounded down,
+    a later write within the same second would not be newer than a client's
+    If-Modified-Since. While that second is not over, more writes may still land
+    in it, so no Last-Modified is sent and clients revalidate by ETag.
+
+    Args:
+        version: Time of the last change, naive UTC
+        now: Current time, naive UTC
+    """
+    if version is None:
+        return None
+    rounded = version.replace(microsecond=0)
+    if rounded < version:
+        rounded += timedelta(seconds=1)
+    return rounded if rounded <= now else None
+
+
+def is_not_modified(
+    etag: str,
+    last_modified: datetime | None,
+    if_none_match: str | None,
+    if_modified_since: str | None,
+) -> bool:
+    """
+    Check a request's conditional headers against the current representation.
+
+    If-Modified-Since is only used without If-None-Match, and against a
+    `last_modified_time`, which is a whole second.
+    """
+    if if_none_match is not None:
+        # If-None-Match takes precedence over If-Modified-Since
+        candidates = {
+            tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+        }
+        return "*" in candidates or etag in candidates
+
+    if if_modified_since is not None and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified.replace(tzinfo=timezone.utc) <= since
+
+    return False
+
+
+async def listen_for_changes(
+    database_url: str,
+    on_change: Callable[[], None],
+    retry_delays: Sequence[float] | None = None,
+) -> None:
+    """
+    Call `on_change` whenever the pipeline signals a write to event_details,
+    until cancelled.
+
+    If the listening connection cannot be made or drops, it is reconnected with
+    backoff; meanwhile caches still expire by TTL. `on_change` is also called each
+    time the connection is established, as notifications sent while it was down
+    were missed.
+
+    Args:
+        database_url: PostgreSQL connection string; other databases do not
+            support notifications, so nothing is listened for
+        on_change: Callback invoked for each notification
+        retry_delays: Seconds to wait before each attempt to reconnect, the last
+            one repeated, by default `LISTEN_RETRY_DELAYS`
+    """
+    if not database_url.startswith("postgresql"):
+        return
+
+    delays = retry_delays or LISTEN_RETRY_DELAYS
+    failures = 0
+    while True:
+        try:
+            conn = await asyncpg.connect(
+                database_url.replace("postgresql+asyncpg://", "postgresql://")
+            )
+            lost = asyncio.Event()
+            conn.add_termination_listener(lambda _, lost=lost: lost.set())
+            try:
+                await conn.add_listener(EVENTS_CHANGED_CHANNEL, lambda *_: on_change())
+                failures = 0
+                on_change()
+                await lost.wait()
+            finally:
+                await conn.close()
+            logger.warning("Lost the connection listening for event changes")
+        except (OSError, asyncpg.PostgresError) as e:
+            delay = delays[min(failures, len(delays) - 1)]
+            failures += 1
+            logger.warning(
+                "Not listening for event changes, retrying in %ss: %s", delay, e
+            )
+            await asyncio.sleep(delay)
@@ -1,17 +1,336 @@
-from event_gulper_models import EventDetailDB
-from fastapi import FastAPI
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Annotated, AsyncIterator, Awaitable, Callable, List
 
-app = FastAPI()
+from event_gulper_models import EventDetailDB, UpcomingEventDB, VenueDB
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-# Database connection
-engine = create_engine("postgresql://postgres:postgres@db:5432/events")
+from .cache import (
+    DataVersion,
+    TTLCache,
+    http_date,
+    is_not_modified,
+    last_modified_time,
+    listen_for_changes,
+    make_etag,
+)
+from .database import DATABASE_URL, AsyncSessionLocal, async_engine, get_session
+from .queries import (
+    after_cursor,
+    decode_cursor,
+    decode_search_cursor,
+    encode_cursor,
+    encode_search_cursor,
+    search_events,
+    select_events,
+    select_upcoming_events,
+)
+from .schemas import (
+    EVENT_COLUMNS,
+    UPCOMING_EVENT_FIELDS,
+    EventPage,
+    UpcomingEventPage,
+    VenueOut,
+    dump_json,
+    event_to_dict,
+)
 
+# Page size limits for the events listing
+EVENTS_DEFAULT_PAGE_SIZE = int(os.getenv("EVENTS_DEFAULT_PAGE_SIZE", "50"))
+EVENTS_MAX_PAGE_SIZE = int(os.getenv("EVENTS_MAX_PAGE_SIZE", "200"))
 
-@app.get("/events")
-def get_events():
-    """Get all events from the database."""
-    with Session(engine) as session:
-        events = session.query(EventDetailDB).all()
-        return events
+# How far ahead the upcoming events listing looks by default and at most
+UPCOMING_DEFAULT_DAYS = int(os.getenv("UPCOMING_DEFAULT_DAYS", "7"))
+UPCOMING_MAX_DAYS = int(os.getenv("UPCOMING_MAX_DAYS", "90"))
+
+# Rows fetched from the server-side cursor per chunk of the NDJSON export
+EVENTS_EXPORT_BATCH_SIZE = int(os.getenv("EVENTS_EXPORT_BATCH_SIZE", "1000"))
+
+# Caching: how long clients may reuse a response, how long serialized responses
+# and the data version are kept in process (both are also dropped on writes)
+EVENTS_CACHE_MAX_AGE = int(os.getenv("EVENTS_CACHE_MAX_AGE", "60"))
+EVENTS_CACHE_TTL = float(os.getenv("EVENTS_CACHE_TTL", "300"))
+EVENTS_CACHE_MAX_ENTRIES = int(os.getenv("EVENTS_CACHE_MAX_ENTRIES", "256"))
+EVENTS_VERSION_TTL = float(os.getenv("EVENTS_VERSION_TTL", "5"))
+
+response_cache = TTLCache(EVENTS_CACHE_TTL, EVENTS_CACHE_MAX_ENTRIES)
+data_version = DataVersion(EVENTS_VERSION_TTL)
+
+
+def invalidate_caches() -> None:
+    """Drop cached responses and the data version after the pipeline wrote."""
+    data_version.invalidate()
+    response_cache.clear()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    listener = asyncio.create_task(listen_for_changes(DATABASE_URL, invalidate_caches))
+    yield
+    listener.cancel()
+    await asyncio.gather(listener, return_exceptions=True)
+    await async_engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+async def cached_json_response(
+    request: Request,
+    session: AsyncSession,
+    build: Callable[[], Awaitable[object]],
+    as_of: datetime | None = None,
+) -> Response:
+    """
+    Serve a JSON response with validators, from the in-process cache if possible.
+
+    The ETag combines the time of the last write to event_details with the
+    request's path and query, so it changes whenever the pipeline writes.
+
+    Args:
+        request: The incoming request
+        session: Database session used to read the data version
+        build: Coroutine function building the response content on a cache miss
+        as_of: Time the content was computed for, if it depends on the current
+            time; it is part of the ETag, and no Last-Modified is sent since
+            the content can change without a write
+
+    Returns:
+        304 response if the client's copy is current, else the JSON response
+    """
+    version = await data_version.get(session)
+    etag = make_etag(
+        version, request.url.path, request.query_params.multi_items(), as_of
+    )
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={EVENTS_CACHE_MAX_AGE}"}
+    last_modified = (
+        last_modified_time(version, datetime.utcnow()) if as_of is None else None
+    )
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+
+    if is_not_modified(
+        etag,
+        last_modified,
+        request.headers.get("if-none-match"),
+        request.headers.get("if-modified-since"),
+    ):
+        return Response(status_code=304, headers=headers)
+
+    body = response_cache.get(etag)
+    if body is None:
+        body = dump_json(await build())
+        response_cache.set(etag, body)
+
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def current_hour() -> datetime:
+    """Get the start of the current hour, naive like the stored start times."""
+    return datetime.now().replace(minute=0, second=0, microsecond=0)
+
+
+def event_filters(
+    starts_after: datetime | None = None,
+    starts_before: datetime | None = None,
+    location: str | None = None,
+    organizer: str | None = None,
+    source: str | None = None,
+    tags: Annotated[List[str] | None, Query()] = None,
+    min_price: Annotated[float | None, Query(ge=0)] = None,
+    max_price: Annotated[float | None, Query(ge=0)] = None,
+    venue_id: int | None = None,
+) -> Select:
+    """Build the events query from the filters shared by listing and export."""
+    return select_events(
+        starts_after=starts_after,
+        starts_before=starts_before,
+        location=location,
+        organizer=organizer,
+        source=source,
+        tags=tags,
+        min_price=min_price,
+        max_price=max_price,
+        venue_id=venue_id,
+    ).with_only_columns(*EVENT_COLUMNS)
+
+
+@app.get("/events", response_model=EventPage)
+async def get_events(
+    request: Request,
+    session: Annotated[AsyncSession, Depends(get_session)],
+    query: Annotated[Select, Depends(event_filters)],
+    limit: Annotated[
+        int, Query(ge=1, le=EVENTS_MAX_PAGE_SIZE)
+    ] = EVENTS_DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+):
+    """
+    Get a page of events ordered by start time, optionally filtered.
+
+    `tags` can be given multiple times; only events having all of them are
+    returned. Pass the returned `next_cursor` with the same filters to get the
+    following page; it is null on the last page.
+    """
+    undated = None
+    if cursor:
+        try:
+            start_time, event_id = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail="Invalid cursor") from e
+        if start_time is not None:
+            # Undated events sort last, in an index range of their own
+            undated = query.where(EventDetailDB.start_time.is_(None))
+        query = query.where(after_cursor(start_time, event_id))
+
+    async def build():
+        # Fetch one extra row to know whether there is a next page
+        result = await session.execute(query.limit(limit + 1))
+        rows = list(result)
+        if undated is not None and len(rows) <= limit:
+            result = await session.execute(undated.limit(limit + 1 - len(rows)))
+            rows += result
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].start_time, rows[-1].id)
+
+        return {
+            "events": [event_to_dict(row) for row in rows],
+            "next_cursor": next_cursor,
+        }
+
+    return await cached_json_response(request, session, build)
+
+
+@app.get("/events/upcoming", response_model=UpcomingEventPage)
+async def get_upcoming_events(
+    request: Request,
+    session: Annotated[AsyncSession, Depends(get_session)],
+    days: Annotated[int, Query(ge=1, le=UPCOMING_MAX_DAYS)] = UPCOMING_DEFAULT_DAYS,
+    limit: Annotated[
+        int, Query(ge=1, le=EVENTS_MAX_PAGE_SIZE)
+    ] = EVENTS_DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+):
+    """
+    Get a page of events starting within the next `days` days, soonest first.
+
+    Served from the upcoming events read model the pipeline refreshes whenever it
+    saves events, rather than from the full events table. Pass the returned
+    `next_cursor` with the same `days` to get the following page.
+
+    The window starts at the current hour, so responses can be cached per hour.
+    """
+    as_of = current_hour()
+    query = select_upcoming_events(as_of, days)
+    if cursor:
+        try:
+            query = query.where(
+                after_cursor(*decode_cursor(cursor), model=UpcomingEventDB)
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail="Invalid cursor") from e
+
+    async def build():
+        # Fetch one extra row to know whether there is a next page
+        result = await session.execute(query.limit(limit + 1))
+        events = list(result.scalars())
+
+        next_cursor = None
+        if len(events) > limit:
+            events = events[:limit]
+            next_cursor = encode_cursor(events[-1].start_time, events[-1].id)
+
+        return {
+            "events": [event_to_dict(event, UPCOMING_EVENT_FIELDS) for event in events],
+            "next_cursor": next_cursor,
+        }
+
+    return await cached_json_response(request, session, build, as_of)
+
+
+@app.get("/events/export")
+async def export_events(query: Annotated[Select, Depends(event_filters)]):
+    """
+    Stream all matching events as newline-delimited JSON, ordered by start time.
+
+    Rows are read through a server-side cursor in batches, so memory use does
+    not grow with the size of the export.
+    """
+
+    async def lines() -> AsyncIterator[bytes]:
+        # The body is sent after request dependencies are torn down, so the
+        # stream needs a session of its own, closed once the body is sent
+        async with AsyncSessionLocal() as session:
+            result = await session.stream(
+                query.execution_options(yield_per=EVENTS_EXPORT_BATCH_SIZE)
+            )
+            async for rows in result.partitions():
+                yield b"".join(dump_json(event_to_dict(row)) + b"\n" for row in rows)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.get("/events/search", response_model=EventPage)
+async def search(
+    request: Request,
+    session: Annotated[AsyncSession, Depends(get_session)],
+    q: Annotated[str, Query(min_length=1, max_length=200)],
+    limit: Annotated[
+        int, Query(ge=1, le=EVENTS_MAX_PAGE_SIZE)
+    ] = EVENTS_DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+):
+    """
+    Search event titles, summaries and descriptions, best matches first.
+
+    `q` supports web search syntax: quoted phrases, `or` and `-` to exclude words.
+    Pass the returned `next_cursor` with the same `q` to get the following page.
+    """
+    try:
+        query = search_events(q, decode_search_cursor(cursor) if cursor else None)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from e
+
+    async def build():
+        # Fetch one extra row to know whether there is a next page
+        result = await session.execute(query.limit(limit + 1))
+        rows = list(result)
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last_event, last_rank = rows[-1]
+            next_cursor = encode_search_cursor(last_rank, last_event.id)
+
+        return {
+            "events": [event_to_dict(event) for event, _ in rows],
+            "next_cursor": next_cursor,
+        }
+
+    return await cached_json_response(request, session, build)
+
+
+@app.get("/venues", response_model=List[VenueOut])
+async def get_venues(
+    request: Request,
+    session: Annotated[AsyncSession, Depends(get_session)],
+):
+    """Get all venues by name, for filtering events with `venue_id`."""
+
+    async def build():
+        result = await session.execute(
+            select(VenueDB.id, VenueDB.name, VenueDB.address).order_by(
+                VenueDB.normalized_name
+            )
+        )
+        return [row._asdict() for row in result]
+
+    return await cached_json_response(request, session, build)
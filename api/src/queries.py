@@ -0,0 +1,196 @@
+import base64
+import json
+from datetime import datetime, timedelta
+from typing import List, Tuple
+
+from event_gulper_models import EVENT_SEARCH_VECTOR, EventDetailDB, UpcomingEventDB
+from sqlalchemy import Float, Select, and_, func, literal, or_, select, tuple_
+
+# Stemming configurations matching the search vector's
+SEARCH_CONFIGS = ("german", "english")
+
+
+def _encode_key(key: list) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def _decode_key(cursor: str) -> list:
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor))
+    except ValueError as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def encode_cursor(start_time: datetime | None, event_id: int) -> str:
+    """Encode the sort key of the last event on a page as an opaque cursor."""
+    return _encode_key([start_time.isoformat() if start_time else None, event_id])
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime | None, int]:
+    """
+    Decode a cursor created by `encode_cursor`.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        start_time, event_id = _decode_key(cursor)
+        return (
+            datetime.fromisoformat(start_time) if start_time else None,
+            int(event_id),
+        )
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def encode_search_cursor(rank: float, event_id: int) -> str:
+    """Encode the rank and id of the last search result on a page as a cursor."""
+    return _encode_key([rank, event_id])
+
+
+def decode_search_cursor(cursor: str) -> Tuple[float, int]:
+    """
+    Decode a cursor created by `encode_search_cursor`.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        rank, event_id = _decode_key(cursor)
+        return float(rank), int(event_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def after_cursor(start_time: datetime | None, event_id: int, model=EventDetailDB):
+    """
+    Filter for events sorted after the cursor in (start_time, id) order.
+
+    Events without a start time sort last, ordered by id. After a cursor with a
+    start time, only events with a start time are matched: the row comparison is
+    a range condition on the (start_time, id) index, which ORing in the undated
+    events would turn into a filter over every row. Callers continue with the
+    undated events once those run out.
+
+    Args:
+        start_time: Start time of the last event on the previous page
+        event_id: Id of the last event on the previous page
+        model: EventDetailDB or UpcomingEventDB, whichever is being paged
+    """
+    if start_time is None:
+        return and_(model.start_time.is_(None), model.id > event_id)
+
+    return tuple_(model.start_time, model.id) > tuple_(start_time, event_id)
+
+
+def select_events(
+    starts_after: datetime | None = None,
+    starts_before: datetime | None = None,
+    location: str | None = None,
+    organizer: str | None = None,
+    source: str | None = None,
+    tags: List[str] | None = None,
+    min_price: float | None = None,
+    max_price: float | None = None,
+    venue_id: int | None = None,
+) -> Select:
+    """
+    Build the events query in (start_time, id) order with the given filters.
+
+    Args:
+        starts_after: Only events starting at or after this time
+        starts_before: Only events starting before this time
+        location: Case-insensitive substring of the location
+        organizer: Case-insensitive substring of the organizer
+        source: Exact source of the events
+        tags: Only events having all of these tags
+        min_price: Minimum price in euros
+        max_price: Maximum price in euros
+        venue_id: Id of the venue the events take place at
+
+    Returns:
+        Select statement for EventDetailDB rows
+    """
+    query = select(EventDetailDB).order_by(
+        EventDetailDB.start_time.asc().nulls_last(), EventDetailDB.id
+    )
+
+    if starts_after is not None:
+        query = query.where(EventDetailDB.start_time >= starts_after)
+    if starts_before is not None:
+        query = query.where(EventDetailDB.start_time < starts_before)
+    if location:
+        query = query.where(EventDetailDB.location.icontains(location))
+    if organizer:
+        query = query.where(EventDetailDB.organizer.icontains(organizer))
+    if source:
+        query = query.where(EventDetailDB.source == source)
+    if tags:
+        # Array containment, served by the GIN index on original_tags
+        query = query.where(EventDetailDB.original_tags.contains(tags))
+    if min_price is not None:
+        query = query.where(EventDetailDB.price >= min_price)
+    if max_price is not None:
+        query = query.where(EventDetailDB.price <= max_price)
+    if venue_id is not None:
+        query = query.where(EventDetailDB.venue_id == venue_id)
+
+    return query
+
+
+def select_upcoming_events(now: datetime, days: int) -> Select:
+    """
+    Build the query for events starting within the next days from the read model.
+
+    Args:
+        now: Current time, naive like the stored start times
+        days: Number of days ahead to include
+
+    Returns:
+        Select statement for UpcomingEventDB rows in (start_time, id) order
+    """
+    return (
+        select(UpcomingEventDB)
+        .where(
+            UpcomingEventDB.start_time >= now,
+            UpcomingEventDB.start_time < now + timedelta(days=days),
+        )
+        .order_by(UpcomingEventDB.start_time, UpcomingEventDB.id)
+    )
+
+
+def search_events(text: str, cursor: Tuple[float, int] | None = None) -> Select:
+    """
+    Build a full-text search query ranked by relevance, then id.
+
+    The text is parsed like a web search (quotes, `or`, `-`) with both German and
+    English stemming, and matched against the GIN-indexed search vector.
+
+    Args:
+        text: The search text
+        cursor: Decoded search cursor of the last result of the previous page
+
+    Returns:
+        Select statement for (EventDetailDB, rank) rows
+    """
+    ts_query = func.websearch_to_tsquery(SEARCH_CONFIGS[0], text)
+    for config in SEARCH_CONFIGS[1:]:
+        ts_query = ts_query.op("||")(func.websearch_to_tsquery(config, text))
+    rank = func.ts_rank(EVENT_SEARCH_VECTOR, ts_query, type_=Float)
+
+    query = (
+        select(EventDetailDB, rank.label("rank"))
+        .where(EVENT_SEARCH_VECTOR.op("@@")(ts_query))
+        .order_by(rank.desc(), EventDetailDB.id)
+    )
+    if cursor is not None:
+        last_rank, last_id = cursor
+        last_rank = literal(last_rank, Float)
+        query = query.where(
+            or_(
+                rank < last_rank,
+                and_(rank == last_rank, EventDetailDB.id > last_id),
+            )
+        )
+
+    return query
@@ -0,0 +1,87 @@
+from datetime import datetime
+from typing import Any, List, Mapping, Tuple
+
+import orjson
+from event_gulper_models import EventDetailDB
+from pydantic import BaseModel
+
+
+class EventOut(BaseModel):
+    """An event as returned by the API."""
+
+    id: int
+    title: str | None
+    summary: str | None
+    description: str | None
+    location: str | None
+    start_time: datetime | None
+    end_time: datetime | None
+    organizer: str | None
+    source_url: str | None
+    image_url: str | None
+    attendees: int | None
+    price: float | None
+    original_tags: List[str] | None
+    source: str | None
+    venue_id: int | None
+    created_at: datetime | None
+    updated_at: datetime | None
+
+
+class EventPage(BaseModel):
+    """A page of events with the cursor to the next one."""
+
+    events: List[EventOut]
+    next_cursor: str | None
+
+
+class UpcomingEventOut(BaseModel):
+    """An event from the upcoming events read model, with the listing fields."""
+
+    id: int
+    title: str | None
+    summary: str | None
+    location: str | None
+    start_time: datetime
+    end_time: datetime | None
+    organizer: str | None
+    image_url: str | None
+    price: float | None
+    original_tags: List[str] | None
+    source: str | None
+
+
+class UpcomingEventPage(BaseModel):
+    """A page of upcoming events with the cursor to the next one."""
+
+    events: List[UpcomingEventOut]
+    next_cursor: str | None
+
+
+class VenueOut(BaseModel):
+    """A venue events take place at."""
+
+    id: int
+    name: str | None
+    address: str | None
+
+
+# Columns selected for responses, so rows are serialized without building ORM objects
+EVENT_FIELDS = tuple(EventOut.model_fields)
+EVENT_COLUMNS = tuple(getattr(EventDetailDB, name) for name in EVENT_FIELDS)
+UPCOMING_EVENT_FIELDS = tuple(UpcomingEventOut.model_fields)
+
+
+def event_to_dict(event: Any, fields: Tuple[str, ...] = EVENT_FIELDS) -> dict:
+    """Get the response fields of an ORM object or a selected row."""
+    return {name: getattr(event, name) for name in fields}
+
+
+def dump_json(content: Mapping | List) -> bytes:
+    """
+    Serialize response content to JSON with orjson.
+
+    Rows selected with EVENT_COLUMNS only hold types orjson encodes natively
+    (naive datetimes as ISO 8601), which skips FastAPI's jsonable_encoder pass.
+    """
+    return orjson.dumps(content)
@@ -0,0 +1,105 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from event_gulper_models import Base, EventDetailDB, create_event_partition_ddl
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from src import main
+from src.database import get_session
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+@pytest.fixture
+async def pg_conn():
+    """Connection to a PostgreSQL test database with the event tables."""
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL (PostgreSQL) not set")
+
+    engine = create_async_engine(
+        TEST_DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
+    )
+    async with engine.connect() as conn:
+        # Recreated inside the transaction, which is rolled back afterwards
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        yield conn
+        await conn.rollback()
+    await engine.dispose()
+
+
+@pytest.fixture
+async def pg_plan_conn(pg_conn):
+    """Test database connection with a year of analyzed events to plan against."""
+    sources = ["siegessaeule", "siegessaeule", "siegessaeule", "telegram"]
+    tags = ["queer", "party", "film", "music", "talk", "sport", "art", "club"]
+    start = datetime(2025, 1, 1)
+    for month in range(1, 13):
+        await pg_conn.execute(create_event_partition_ddl(datetime(2025, month, 1)))
+    await pg_conn.execute(
+        insert(EventDetailDB),
+        [
+            {
+                "title": f"Event {i}",
+                "summary": "Summary",
+                "start_time": start + timedelta(hours=2 * i),
+                "source": sources[i % len(sources)],
+                "original_tags": [tags[i % len(tags)], tags[i % 5]],
+            }
+            for i in range(4000)
+        ],
+    )
+    await pg_conn.execute(text("ANALYZE event_details"))
+    # Small tables are still cheap to scan sequentially; disabling that shows
+    # which indexes the planner can use for each query
+    await pg_conn.execute(text("SET LOCAL enable_seqscan = off"))
+    return pg_conn
+
+
+@pytest.fixture
+async def client(pg_conn, monkeypatch):
+    """API client reading from the test database, with empty caches."""
+
+    async def override_session():
+        yield AsyncSession(bind=pg_conn)
+
+    main.app.dependency_overrides[get_session] = override_session
+    # Streaming endpoints open their own sessions
+    monkeypatch.setattr(main, "AsyncSessionLocal", async_sessionmaker(bind=pg_conn))
+    main.invalidate_caches()
+    async with AsyncClient(
+        transport=ASGITransport(app=main.app), base_url="http://test"
+    ) as client:
+        yield client
+    main.app.dependency_overrides.clear()
+    main.invalidate_caches()
+
+
+@pytest.fixture
+async def pg_engine(monkeypatch):
+    """
+    Engine for a PostgreSQL test database whose tables are committed, for tests
+    going through the API's real session handling.
+    """
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL (PostgreSQL) not set")
+
+    engine = create_async_engine(
+        TEST_DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    monkeypatch.setattr(main, "AsyncSessionLocal", async_sessionmaker(engine))
+    yield engine
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
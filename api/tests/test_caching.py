@@ -0,0 +1,147 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+
+import asyncpg
+import pytest
+from event_gulper_models import EVENTS_CHANGED_CHANNEL, ArchivedPartition, EventDetailDB
+from sqlalchemy import insert
+from src import main
+from src.cache import listen_for_changes
+
+
+async def _insert_event(conn, title, updated_at):
+    await conn.execute(
+        insert(EventDetailDB),
+        [{"title": title, "summary": "Summary", "updated_at": updated_at}],
+    )
+
+
+@pytest.mark.asyncio
+async def test_events_conditional_requests(client, pg_conn):
+    await _insert_event(pg_conn, "First", datetime(2025, 1, 1, 12))
+
+    response = await client.get("/events", params={"source": "siegessaeule"})
+    assert response.status_code == 200
+    assert response.headers["cache-control"].startswith("public, max-age=")
+    assert response.headers["last-modified"] == "Wed, 01 Jan 2025 12:00:00 GMT"
+    etag = response.headers["etag"]
+
+    # Same query, unchanged data: the client's copy is still current
+    response = await client.get(
+        "/events", params={"source": "siegessaeule"}, headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.content == b""
+
+    response = await client.get(
+        "/events",
+        headers={"If-Modified-Since": "Wed, 01 Jan 2025 12:00:00 GMT"},
+    )
+    assert response.status_code == 304
+
+    # Different query parameters get a different ETag
+    response = await client.get("/events", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_events_cache_invalidated_on_write(client, pg_conn):
+    await _insert_event(pg_conn, "First", datetime(2025, 1, 1, 12))
+
+    response = await client.get("/events")
+    assert [event["title"] for event in response.json()["events"]] == ["First"]
+    etag = response.headers["etag"]
+
+    # Until the pipeline signals a write, the cached response is served
+    await _insert_event(pg_conn, "Second", datetime(2025, 1, 2, 12))
+    response = await client.get("/events")
+    assert [event["title"] for event in response.json()["events"]] == ["First"]
+
+    main.invalidate_caches()
+    response = await client.get("/events", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert {event["title"] for event in response.json()["events"]} == {
+        "First",
+        "Second",
+    }
+
+
+@pytest.mark.asyncio
+async def test_archiving_partitions_changes_the_version(client, pg_conn):
+    await _insert_event(pg_conn, "First", datetime(2025, 1, 1, 12))
+    response = await client.get("/events")
+    etag = response.headers["etag"]
+
+    # Detaching removes events without a newer updated_at
+    await pg_conn.execute(
+        insert(ArchivedPartition),
+        [{"name": "event_details_2024_01", "archived_at": datetime(2025, 2, 1)}],
+    )
+    main.invalidate_caches()
+
+    response = await client.get("/events", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["last-modified"] == "Sat, 01 Feb 2025 00:00:00 GMT"
+
+
+@pytest.mark.asyncio
+async def test_last_modified_is_rounded_up(client, pg_conn):
+    await _insert_event(pg_conn, "First", datetime(2025, 1, 1, 12, 0, 0, 500000))
+
+    response = await client.get("/events")
+    assert response.headers["last-modified"] == "Wed, 01 Jan 2025 12:00:01 GMT"
+
+    # A client that fetched within the second of the write is not current
+    response = await client.get(
+        "/events", headers={"If-Modified-Since": "Wed, 01 Jan 2025 12:00:00 GMT"}
+    )
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_no_last_modified_while_writes_may_share_its_second(client, pg_conn):
+    await _insert_event(pg_conn, "First", datetime.utcnow() + timedelta(minutes=1))
+
+    response = await client.get("/events")
+    assert response.status_code == 200
+    assert "last-modified" not in response.headers
+
+
+async def _wait_for(condition):
+    for _ in range(500):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("Condition not met in time")
+
+
+@pytest.mark.asyncio
+async def test_change_listener_reconnects():
+    database_url = os.getenv("TEST_DATABASE_URL")
+    if not database_url:
+        pytest.skip("TEST_DATABASE_URL (PostgreSQL) not set")
+
+    changes = []
+    listener = asyncio.create_task(
+        listen_for_changes(database_url, lambda: changes.append(1), [0.01])
+    )
+    conn = await asyncpg.connect(database_url)
+    try:
+        # Connecting counts as a change, as notifications may have been missed
+        await _wait_for(lambda: len(changes) == 1)
+
+        await conn.execute(
+            "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+            "WHERE query LIKE 'LISTEN%' AND pid <> pg_backend_pid()"
+        )
+        await _wait_for(lambda: len(changes) == 2)
+
+        await conn.execute(f"NOTIFY {EVENTS_CHANGED_CHANNEL}")
+        await _wait_for(lambda: len(changes) == 3)
+    finally:
+        listener.cancel()
+        await asyncio.gather(listener, return_exceptions=True)
+        await conn.close()
@@ -0,0 +1,32 @@
+from datetime import datetime, timedelta
+
+import pytest
+from event_gulper_models import EventDetailDB
+from sqlalchemy import insert
+
+
+@pytest.mark.asyncio
+async def test_events_pages_continue_with_undated_events(client, pg_conn):
+    start = datetime(2025, 3, 1, 20)
+    day_before = start - timedelta(days=1)
+    await pg_conn.execute(
+        insert(EventDetailDB),
+        [
+            {"title": "Undated", "summary": "Summary", "start_time": None},
+            {"title": "Second", "summary": "Summary", "start_time": start},
+            {"title": "Third", "summary": "Summary", "start_time": start},
+            {"title": "First", "summary": "Summary", "start_time": day_before},
+            {"title": "Also undated", "summary": "Summary", "start_time": None},
+        ],
+    )
+
+    titles, cursor = [], None
+    while True:
+        params = {"limit": 2} | ({"cursor": cursor} if cursor else {})
+        page = (await client.get("/events", params=params)).json()
+        titles += [event["title"] for event in page["events"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    assert titles == ["First", "Second", "Third", "Undated", "Also undated"]
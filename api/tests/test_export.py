@@ -0,0 +1,64 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from event_gulper_models import EventDetailDB
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import insert
+from src import main
+from src.schemas import EventOut
+
+
+@pytest.mark.asyncio
+async def test_export_streams_all_matching_events_as_ndjson(
+    client, pg_conn, monkeypatch
+):
+    # Several cursor batches for a handful of rows
+    monkeypatch.setattr(main, "EVENTS_EXPORT_BATCH_SIZE", 2)
+    start = datetime(2025, 1, 1)
+    await pg_conn.execute(
+        insert(EventDetailDB),
+        [
+            {
+                "title": f"Event {i}",
+                "summary": "Summary",
+                "start_time": start + timedelta(days=i),
+                "source": "telegram" if i == 2 else "siegessaeule",
+                "original_tags": ["party"],
+            }
+            for i in range(5)
+        ],
+    )
+
+    response = await client.get("/events/export", params={"source": "siegessaeule"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert [event["title"] for event in events] == [
+        "Event 0",
+        "Event 1",
+        "Event 3",
+        "Event 4",
+    ]
+    assert events[0]["start_time"] == "2025-01-01T00:00:00"
+    assert events[0]["original_tags"] == ["party"]
+    assert set(events[0]) == set(EventOut.model_fields)
+
+
+@pytest.mark.asyncio
+async def test_export_returns_its_connection_to_the_pool(pg_engine):
+    async with pg_engine.begin() as conn:
+        await conn.execute(
+            insert(EventDetailDB),
+            [{"title": f"Event {i}", "summary": "Summary"} for i in range(3)],
+        )
+
+    async with AsyncClient(
+        transport=ASGITransport(app=main.app), base_url="http://test"
+    ) as client:
+        for _ in range(3):
+            response = await client.get("/events/export")
+            assert len(response.text.splitlines()) == 3
+
+    assert pg_engine.pool.checkedout() == 0
@@ -0,0 +1,94 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from src.queries import after_cursor, search_events, select_events
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN wrapper that keeps the statement's bound parameters."""
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN " + compiler.process(element.statement, **kw)
+
+
+async def _plan(conn, query) -> str:
+    result = await conn.execute(Explain(query))
+    return "\n".join(row[0] for row in result)
+
+
+@pytest.mark.asyncio
+async def test_page_query_uses_keyset_index(pg_plan_conn):
+    plan = await _plan(pg_plan_conn, select_events().limit(50))
+
+    assert "start_time_id_idx" in plan
+    # Partitions are merged in index order, without a Sort node
+    assert "Sort  (" not in plan
+
+
+@pytest.mark.asyncio
+async def test_page_after_cursor_is_an_index_range(pg_plan_conn):
+    query = select_events().where(after_cursor(datetime(2025, 6, 1), 1500))
+    plan = await _plan(pg_plan_conn, query.limit(50))
+
+    assert "start_time_id_idx" in plan
+    assert "Index Cond: (ROW(start_time, id) > ROW(" in plan
+    assert "Filter:" not in plan
+    assert "Sort  (" not in plan
+
+
+@pytest.mark.asyncio
+async def test_tag_filter_uses_gin_index(pg_plan_conn):
+    query = select_events(tags=["queer", "party"]).order_by(None)
+    plan = await _plan(pg_plan_conn, query)
+
+    assert "original_tags_idx" in plan
+
+
+@pytest.mark.asyncio
+async def test_date_range_and_source_filter_uses_composite_index(pg_plan_conn):
+    query = select_events(
+        starts_after=datetime(2025, 2, 21),
+        starts_before=datetime(2025, 2, 24),
+        source="siegessaeule",
+    ).order_by(None)
+    plan = await _plan(pg_plan_conn, query)
+
+    assert "start_time_source_idx" in plan
+
+
+@pytest.mark.asyncio
+async def test_venue_filter_uses_venue_index(pg_plan_conn):
+    plan = await _plan(pg_plan_conn, select_events(venue_id=1).order_by(None))
+
+    assert "venue_id_idx" in plan
+
+
+@pytest.mark.asyncio
+async def test_search_uses_search_vector_index(pg_plan_conn):
+    plan = await _plan(pg_plan_conn, search_events("queer film"))
+
+    assert "search_vector_idx" in plan
+
+
+@pytest.mark.asyncio
+async def test_date_range_prunes_to_month_partitions(pg_plan_conn):
+    query = select_events(
+        starts_after=datetime(2025, 2, 21), starts_before=datetime(2025, 3, 3)
+    )
+    plan = await _plan(pg_plan_conn, query)
+
+    assert "event_details_2025_02" in plan
+    assert "event_details_2025_03" in plan
+    # Neither other months nor undated events are scanned
+    assert "event_details_2025_01" not in plan
+    assert "event_details_2025_04" not in plan
+    assert "event_details_default" not in plan
@@ -0,0 +1,64 @@
+import pytest
+from event_gulper_models import EventDetailDB
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.queries import decode_search_cursor, encode_search_cursor, search_events
+
+
+async def _search(conn, text, cursor=None, limit=10):
+    session = AsyncSession(bind=conn)
+    result = await session.execute(search_events(text, cursor).limit(limit))
+    return [(event.id, event.title, rank) for event, rank in result]
+
+
+@pytest.mark.asyncio
+async def test_search_matches_german_and_english_stems(pg_conn):
+    await pg_conn.execute(
+        insert(EventDetailDB),
+        [
+            {
+                "title": "Queere Filmnacht",
+                "summary": "Kurzfilme aus Berlin",
+                "description": None,
+            },
+            {
+                "title": "Karaoke",
+                "summary": "Sing your favourite songs",
+                "description": None,
+            },
+            {
+                "title": "Open Air Kino",
+                "summary": "Queer films under the stars",
+                "description": None,
+            },
+            {"title": "Lesung", "summary": "Eine Lesung", "description": "Ein Film"},
+        ],
+    )
+
+    # English stemming: "song" matches "songs"
+    assert [title for _, title, _ in await _search(pg_conn, "song")] == ["Karaoke"]
+
+    # German stemming: "queerer" matches "Queere", English: "queer"
+    titles = [title for _, title, _ in await _search(pg_conn, "queerer")]
+    assert set(titles) == {"Queere Filmnacht", "Open Air Kino"}
+
+    # Summary matches rank above description matches
+    titles = [title for _, title, _ in await _search(pg_conn, "film")]
+    assert titles == ["Open Air Kino", "Lesung"]
+
+
+@pytest.mark.asyncio
+async def test_search_keyset_pagination(pg_conn):
+    await pg_conn.execute(
+        insert(EventDetailDB),
+        [{"title": f"Drag Show {i}", "summary": "Drag"} for i in range(5)],
+    )
+
+    seen = []
+    cursor = None
+    while page := await _search(pg_conn, "drag", cursor, limit=2):
+        seen.extend(title for _, title, _ in page)
+        last_id, _, last_rank = page[-1]
+        cursor = decode_search_cursor(encode_search_cursor(last_rank, last_id))
+
+    assert sorted(seen) == [f"Drag Show {i}" for i in range(5)]
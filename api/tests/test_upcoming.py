@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+import pytest
+from event_gulper_models import UpcomingEventDB
+from sqlalchemy import insert
+from src import main
+
+
+@pytest.mark.asyncio
+async def test_upcoming_events_pages_through_the_read_model(client, pg_conn):
+    now = datetime.now()
+    await pg_conn.execute(
+        insert(UpcomingEventDB),
+        [
+            {"title": "Started", "start_time": now - timedelta(hours=1)},
+            {"title": "Tonight", "start_time": now + timedelta(hours=2)},
+            {"title": "Tomorrow", "start_time": now + timedelta(days=1, hours=2)},
+            {"title": "Next week", "start_time": now + timedelta(days=6)},
+            {"title": "Next month", "start_time": now + timedelta(days=30)},
+        ],
+    )
+
+    titles, cursor = [], None
+    while True:
+        params = {"limit": 2} | ({"cursor": cursor} if cursor else {})
+        page = (await client.get("/events/upcoming", params=params)).json()
+        titles += [event["title"] for event in page["events"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    assert titles == ["Tonight", "Tomorrow", "Next week"]
+
+    response = await client.get("/events/upcoming", params={"days": 1})
+    assert [event["title"] for event in response.json()["events"]] == ["Tonight"]
+
+
+@pytest.mark.asyncio
+async def test_upcoming_events_cached_per_hour(client, pg_conn, monkeypatch):
+    start = datetime.now().replace(minute=0, second=0, microsecond=0)
+    await pg_conn.execute(
+        insert(UpcomingEventDB),
+        [{"title": "Soon", "start_time": start + timedelta(minutes=90)}],
+    )
+
+    monkeypatch.setattr(main, "current_hour", lambda: start)
+    response = await client.get("/events/upcoming")
+    assert [event["title"] for event in response.json()["events"]] == ["Soon"]
+    assert "last-modified" not in response.headers
+    etag = response.headers["etag"]
+
+    response = await client.get("/events/upcoming", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    # Without any write, the next hour gets a fresh listing
+    monkeypatch.setattr(main, "current_hour", lambda: start + timedelta(hours=2))
+    response = await client.get("/events/upcoming", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["events"] == []
@@ -0,0 +1,68 @@
+"""
+Compare per-item and bulk validation and conversion of events.
+
+Run with `uv run python models/benchmarks/bulk_validation.py [num_events]`.
+"""
+
+import json
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+from event_gulper_models import (
+    EventDetail,
+    EventDetailDB,
+    event_rows,
+    validate_events,
+    validate_events_json,
+)
+
+
+def make_events(count: int) -> list[dict]:
+    start = datetime(2025, 2, 20, 18, 0)
+    return [
+        {
+            "title": f"Event {i}",
+            "summary": "A short summary of the event",
+            "detail_url": f"https://www.siegessaeule.de/en/events/mix/event-{i}/",
+            "description": "A longer description of the event. " * 10,
+            "location": "SO36, Oranienstr. 190",
+            "start_time": (start + timedelta(hours=i)).isoformat() + "+01:00",
+            "organizer": "Someone",
+            "image_url": f"https://www.siegessaeule.de/images/{i}.jpg",
+            "price": "12.50",
+            "original_tags": ["queer", "party"],
+        }
+        for i in range(count)
+    ]
+
+
+def per_item(items_json: list[bytes]) -> list[EventDetailDB]:
+    events = [EventDetail.model_validate_json(item) for item in items_json]
+    return [EventDetailDB.from_event_detail(event) for event in events]
+
+
+def bulk(array_json: bytes) -> list[dict]:
+    return event_rows(validate_events_json(array_json))
+
+
+def main(count: int = 1000, repeat: int = 5) -> None:
+    items = make_events(count)
+    items_json = [json.dumps(item).encode() for item in items]
+    array_json = json.dumps(items).encode()
+
+    cases = {
+        "per item: model_validate_json + from_event_detail": lambda: per_item(
+            items_json
+        ),
+        "bulk: validate_events (python)": lambda: event_rows(validate_events(items)),
+        "bulk: validate_events_json + event_rows": lambda: bulk(array_json),
+    }
+    print(f"{count} events, best of {repeat}")
+    for name, case in cases.items():
+        best = min(timeit.repeat(case, number=1, repeat=repeat))
+        print(f"  {name:52} {best * 1000:8.2f} ms  {best / count * 1e6:6.2f} µs/event")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
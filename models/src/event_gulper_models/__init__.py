@@ -1,3 +1,56 @@
-from .events import Base, EventDetail, EventDetailDB, EventURL
+from .bulk import event_list_adapter, event_rows, validate_events, validate_events_json
+from .events import (
+    EVENT_DEFAULT_PARTITION,
+    EVENT_PARTITION_KEY,
+    EVENT_SEARCH_DDL,
+    EVENT_SEARCH_VECTOR,
+    EVENTS_CHANGED_CHANNEL,
+    ArchivedPartition,
+    BackfillShard,
+    Base,
+    ChatCursor,
+    CrawlWatermark,
+    DeadLetter,
+    EventDetail,
+    EventDetailDB,
+    EventItemState,
+    EventURL,
+    ItemStage,
+    ShardStatus,
+    UpcomingEventDB,
+    VenueDB,
+    create_event_partition_ddl,
+    event_partition_bounds,
+    event_partition_name,
+    event_row,
+)
 
-__all__ = ["EventDetail", "EventDetailDB", "EventURL", "Base"]
+__all__ = [
+    "EVENT_DEFAULT_PARTITION",
+    "EVENT_PARTITION_KEY",
+    "EVENT_SEARCH_DDL",
+    "EVENT_SEARCH_VECTOR",
+    "EVENTS_CHANGED_CHANNEL",
+    "ArchivedPartition",
+    "BackfillShard",
+    "ChatCursor",
+    "CrawlWatermark",
+    "DeadLetter",
+    "EventDetail",
+    "EventDetailDB",
+    "EventItemState",
+    "EventURL",
+    "ItemStage",
+    "ShardStatus",
+    "UpcomingEventDB",
+    "VenueDB",
+    "Base",
+    "create_event_partition_ddl",
+    "event_partition_bounds",
+    "event_list_adapter",
+    "event_partition_name",
+    "event_row",
+    "event_rows",
+    "validate_events",
+    "validate_events_json",
+]
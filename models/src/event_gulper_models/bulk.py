@@ -0,0 +1,47 @@
+from functools import cache
+from typing import Iterable, List
+
+from pydantic import TypeAdapter
+
+from .events import EventDetail, event_row
+
+
+@cache
+def event_list_adapter() -> TypeAdapter[List[EventDetail]]:
+    """
+    Get the adapter validating lists of events.
+
+    Building a TypeAdapter compiles its validator, so it is built once and reused.
+    """
+    return TypeAdapter(List[EventDetail])
+
+
+def validate_events(items: Iterable[dict | EventDetail]) -> List[EventDetail]:
+    """
+    Validate a batch of events in one call into pydantic-core.
+
+    Raises:
+        pydantic.ValidationError: If any item is invalid, listing each error with
+            the index of its item
+    """
+    return event_list_adapter().validate_python(list(items))
+
+
+def validate_events_json(data: bytes | str) -> List[EventDetail]:
+    """
+    Validate a JSON array of events without parsing it into Python objects first.
+
+    Raises:
+        pydantic.ValidationError: If the JSON or any event in it is invalid
+    """
+    return event_list_adapter().validate_json(data)
+
+
+def event_rows(events: Iterable[EventDetail], source: str = "siegessaeule") -> list:
+    """
+    Convert events to event_details rows for a Core bulk insert.
+
+    Skips building an EventDetailDB per event, e.g.
+    `session.execute(insert(EventDetailDB), event_rows(events, source))`.
+    """
+    return [event_row(event, source) for event in events]
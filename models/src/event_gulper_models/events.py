@@ -1,13 +1,36 @@
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal
+from enum import StrEnum
 from typing import Optional
 
 from pydantic import BaseModel, Field, HttpUrl
-from sqlalchemy import Column, DateTime, Float, Integer, String, Text
+from pydantic.json_schema import SkipJsonSchema
+from sqlalchemy import (
+    DDL,
+    JSON,
+    Column,
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    PrimaryKeyConstraint,
+    String,
+    Text,
+    UniqueConstraint,
+    event,
+    literal_column,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
 
+# PostgreSQL NOTIFY channel signalled whenever event_details is written to
+EVENTS_CHANGED_CHANNEL = "event_details_changed"
+
 
 # For database storage
 class EventURL(Base):
@@ -21,6 +44,118 @@ class EventURL(Base):
     scraped_date = Column(DateTime, default=datetime.utcnow)
 
 
+class ItemStage(StrEnum):
+    """Pipeline stages an event URL moves through, in order."""
+
+    DISCOVERED = "discovered"
+    SCRAPED = "scraped"
+    EXTRACTED = "extracted"
+    SAVED = "saved"
+    FAILED = "failed"
+
+
+class EventItemState(Base):
+    """SQLAlchemy model checkpointing how far each event URL got in the pipeline."""
+
+    __tablename__ = "event_item_states"
+
+    id = Column(Integer, primary_key=True)
+    url = Column(String, index=True, unique=True)
+    source = Column(String, default="siegessaeule")
+    stage = Column(String, index=True, default=ItemStage.DISCOVERED)
+    content_hash = Column(String, index=True, nullable=True)  # sha256 of markdown
+    markdown = Column(Text, nullable=True)
+    event_json = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class DeadLetter(Base):
+    """SQLAlchemy model for items that failed a pipeline stage and were set aside."""
+
+    __tablename__ = "dead_letters"
+
+    id = Column(Integer, primary_key=True)
+    stage = Column(String, index=True)  # The ItemStage the item failed to reach
+    url = Column(String, index=True, nullable=True)
+    source = Column(String, default="siegessaeule")
+    input = Column(Text)  # The stage's input, e.g. the URL or the scraped markdown
+    input_hash = Column(String, index=True)
+    error = Column(Text)
+    attempts = Column(Integer, default=1)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    resolved_at = Column(DateTime, index=True, nullable=True)
+
+
+class ChatCursor(Base):
+    """SQLAlchemy model tracking the last processed message of each chat."""
+
+    __tablename__ = "chat_cursors"
+
+    id = Column(Integer, primary_key=True)
+    chat = Column(String, index=True, unique=True)  # Chat id or username
+    last_message_id = Column(Integer)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class CrawlWatermark(Base):
+    """SQLAlchemy model tracking when each date of a source was last crawled."""
+
+    __tablename__ = "crawl_watermarks"
+    __table_args__ = (UniqueConstraint("source", "date"),)
+
+    id = Column(Integer, primary_key=True)
+    source = Column(String, index=True)
+    date = Column(Date)
+    last_crawled_at = Column(DateTime, default=datetime.utcnow)
+    listing_hash = Column(String)  # Hash of the event URLs listed for the date
+    url_count = Column(Integer)
+
+
+class ArchivedPartition(Base):
+    """
+    SQLAlchemy model logging the event_details partitions detached by retention.
+
+    Detaching removes events without touching updated_at, so readers derive the
+    data version from the latest of both tables.
+    """
+
+    __tablename__ = "archived_partitions"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+    archived_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class ShardStatus(StrEnum):
+    """States of a backfill shard in the work queue."""
+
+    PENDING = "pending"
+    LEASED = "leased"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class BackfillShard(Base):
+    """SQLAlchemy model for a range of dates of a backfill, claimed by one worker."""
+
+    __tablename__ = "backfill_shards"
+    __table_args__ = (Index("ix_backfill_shards_claim", "backfill", "status"),)
+
+    id = Column(Integer, primary_key=True)
+    backfill = Column(String)  # Name of the backfill the shard belongs to
+    source = Column(String, default="siegessaeule")
+    start_date = Column(Date)
+    end_date = Column(Date)
+    status = Column(String, default=ShardStatus.PENDING)
+    worker = Column(String, nullable=True)  # Worker holding or last holding the lease
+    lease_expires_at = Column(DateTime, nullable=True)
+    attempts = Column(Integer, default=0)
+    error = Column(Text, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 class EventDetail(BaseModel):
     """Pydantic model for event details."""
 
@@ -48,59 +183,225 @@ class EventDetail(BaseModel):
         default_factory=list,
         description="The original tags of the event found on the detail page",
     )
+    # Set by the pipeline after extraction, so not part of the schema the LLM fills
+    venue_id: SkipJsonSchema[Optional[int]] = Field(
+        None, description="Id of the venue the location was normalized to"
+    )
+    item_url: SkipJsonSchema[Optional[str]] = Field(
+        None,
+        description="URL of the pipeline item the event was extracted from, as "
+        "recorded in its item state, which detail_url may not match exactly",
+    )
+
+
+class VenueDB(Base):
+    """SQLAlchemy model for venues that event locations are normalized to."""
+
+    __tablename__ = "venues"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String)  # As first seen, e.g. "SO36"
+    normalized_name = Column(String, index=True, unique=True)  # e.g. "so36"
+    address = Column(String, nullable=True)  # e.g. "Oranienstr. 190"
+    created_at = Column(DateTime, default=datetime.utcnow)
 
 
 class EventDetailDB(Base):
     """SQLAlchemy model for database storage of event details."""
 
     __tablename__ = "event_details"
+    __table_args__ = (
+        # Supports keyset pagination over (start_time, id)
+        Index("ix_event_details_start_time_id", "start_time", "id"),
+        # Supports date range queries restricted to a source
+        Index("ix_event_details_start_time_source", "start_time", "source"),
+        # Supports tag membership queries (original_tags @> ARRAY[...])
+        Index(
+            "ix_event_details_original_tags",
+            "original_tags",
+            postgresql_using="gin",
+        ),
+        # Monthly range partitions on PostgreSQL, see EVENT_PARTITION_KEY
+        {"postgresql_partition_by": "RANGE (start_time)"},
+    )
 
     id = Column(Integer, primary_key=True)
     title = Column(String, index=True)
     summary = Column(String)
     description = Column(Text, nullable=True)
     location = Column(String, nullable=True)
-    start_time = Column(DateTime, index=True, nullable=True)
+    start_time = Column(DateTime, nullable=True)  # Indexed by the composites above
     end_time = Column(DateTime, nullable=True)
     organizer = Column(String, nullable=True)
     source_url = Column(String, nullable=True)
     image_url = Column(String, nullable=True)
     attendees = Column(Integer, nullable=True)
     price = Column(Float, nullable=True)
-    original_tags = Column(String, nullable=True)  # Store as comma-separated string
+    original_tags = Column(
+        ARRAY(String).with_variant(JSON, "sqlite"), nullable=True
+    )  # JSON on SQLite, which has no array type
     source = Column(String, default="siegessaeule")
+    venue_id = Column(Integer, ForeignKey("venues.id"), index=True, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(
+        DateTime, index=True, default=datetime.utcnow, onupdate=datetime.utcnow
+    )  # Indexed so max(updated_at) can version API responses
 
     @classmethod
     def from_event_detail(
         cls, event: EventDetail, source: str = "siegessaeule"
     ) -> "EventDetailDB":
         """Convert EventDetail to EventDetailDB."""
-        # Convert timezone-aware datetimes to naive UTC
-        start_time = (
-            event.start_time.astimezone().replace(tzinfo=None)
-            if event.start_time
-            else None
-        )
-        end_time = (
-            event.end_time.astimezone().replace(tzinfo=None) if event.end_time else None
-        )
+        return cls(**event_row(event, source))
+
+
+def _naive_local(moment: datetime | None) -> datetime | None:
+    """Convert a timezone-aware datetime to naive local time."""
+    if moment is None or moment.tzinfo is None:
+        # Naive datetimes are already local time
+        return moment
+    return moment.astimezone().replace(tzinfo=None)
+
+
+def event_row(event: EventDetail, source: str = "siegessaeule") -> dict:
+    """
+    Convert an EventDetail to the column values of its event_details row.
+
+    Every row has the same keys, so lists of rows can be passed to a Core
+    `insert()` as one executemany.
+    """
+    return {
+        "title": event.title,
+        "summary": event.summary,
+        "description": event.description,
+        "location": event.location,
+        "start_time": _naive_local(event.start_time),
+        "end_time": _naive_local(event.end_time),
+        "organizer": event.organizer,
+        "source_url": str(event.source_url) if event.source_url else None,
+        "image_url": str(event.image_url) if event.image_url else None,
+        "attendees": event.attendees,
+        "price": float(event.price) if event.price else None,
+        "original_tags": event.original_tags or None,
+        "source": source,
+        "venue_id": event.venue_id,
+    }
+
+
+# On PostgreSQL event_details is range-partitioned by month on start_time, so date
+# range queries only scan the months they cover and old months can be detached
+# instead of deleted. Events without a start time, or in months without a
+# partition yet, go to the default partition.
+EVENT_PARTITION_KEY = "start_time"
+EVENT_DEFAULT_PARTITION = "event_details_default"
+
+
+def event_partition_name(month: date) -> str:
+    """Get the name of the partition holding the events of a month."""
+    return f"event_details_{month:%Y_%m}"
+
+
+def event_partition_bounds(month: date) -> tuple[date, date]:
+    """Get the first day of a month and of the following month."""
+    start = month.replace(day=1)
+    if start.month == 12:
+        return start, start.replace(year=start.year + 1, month=1)
+    return start, start.replace(month=start.month + 1)
+
 
-        return cls(
-            title=event.title,
-            summary=event.summary,
-            description=event.description,
-            location=event.location,
-            start_time=start_time,  # Now timezone-naive
-            end_time=end_time,  # Now timezone-naive
-            organizer=event.organizer,
-            source_url=str(event.source_url) if event.source_url else None,
-            image_url=str(event.image_url) if event.image_url else None,
-            attendees=event.attendees,
-            price=float(event.price) if event.price else None,
-            original_tags=",".join(event.original_tags)
-            if event.original_tags
-            else None,
-            source=source,
+def create_event_partition_ddl(month: date) -> DDL:
+    """Build the DDL creating the partition of event_details for a month."""
+    start, end = event_partition_bounds(month)
+    return DDL(
+        f"CREATE TABLE IF NOT EXISTS {event_partition_name(month)} "
+        f"PARTITION OF event_details FOR VALUES FROM ('{start}') TO ('{end}')"
+    )
+
+
+@compiles(PrimaryKeyConstraint, "postgresql")
+def _compile_primary_key(constraint, compiler, **kw):
+    """
+    Render the primary key of a partitioned table as a unique constraint.
+
+    Unique constraints on partitioned tables must include the partition key,
+    which would make it NOT NULL as part of a primary key. Ids are therefore not
+    unique on their own in the database: they stay unique only as long as they
+    come from the table's sequence, so rows must never be inserted with explicit
+    ids. Lookups by id alone use the constraint's index, as id is its leading
+    column, but scan that index in every partition.
+    """
+    partition_by = constraint.table.dialect_options["postgresql"]["partition_by"]
+    if not partition_by:
+        return compiler.visit_primary_key_constraint(constraint, **kw)
+
+    columns = [column.name for column in constraint.columns] + [EVENT_PARTITION_KEY]
+    return f"UNIQUE ({', '.join(columns)})"
+
+
+event.listen(
+    EventDetailDB.__table__,
+    "after_create",
+    DDL(
+        f"CREATE TABLE IF NOT EXISTS {EVENT_DEFAULT_PARTITION} "
+        "PARTITION OF event_details DEFAULT"
+    ).execute_if(dialect="postgresql"),
+)
+
+
+# Full-text search over title, summary and description. Siegessaeule content mixes
+# German and English, so both configurations are indexed. The column is generated
+# by PostgreSQL and only exists there, so it is not mapped on EventDetailDB.
+EVENT_SEARCH_VECTOR = literal_column("event_details.search_vector", TSVECTOR)
+EVENT_SEARCH_DDL = [
+    DDL(
+        "ALTER TABLE event_details ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        "GENERATED ALWAYS AS ("
+        + " || ".join(
+            f"setweight(to_tsvector('{config}', coalesce({field}, '')), '{weight}')"
+            for field, weight in (
+                ("title", "A"),
+                ("summary", "B"),
+                ("description", "C"),
+            )
+            for config in ("german", "english")
         )
+        + ") STORED"
+    ),
+    DDL(
+        "CREATE INDEX IF NOT EXISTS ix_event_details_search_vector "
+        "ON event_details USING gin (search_vector)"
+    ),
+]
+
+for ddl in EVENT_SEARCH_DDL:
+    event.listen(
+        EventDetailDB.__table__, "after_create", ddl.execute_if(dialect="postgresql")
+    )
+
+
+class UpcomingEventDB(Base):
+    """
+    Read model of events that have not started yet, for the listing endpoints.
+
+    Holds a copy of the listing fields of future event_details rows, kept up to
+    date by the pipeline whenever it saves events. Past events are pruned, so
+    the table stays small regardless of how much history event_details keeps.
+    """
+
+    __tablename__ = "upcoming_events"
+    __table_args__ = (
+        # Supports keyset pagination over (start_time, id)
+        Index("ix_upcoming_events_start_time_id", "start_time", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)  # Same id as in event_details
+    title = Column(String)
+    summary = Column(String)
+    location = Column(String, nullable=True)
+    start_time = Column(DateTime, nullable=False)
+    end_time = Column(DateTime, nullable=True)
+    organizer = Column(String, nullable=True)
+    image_url = Column(String, nullable=True)
+    price = Column(Float, nullable=True)
+    original_tags = Column(ARRAY(String).with_variant(JSON, "sqlite"), nullable=True)
+    source = Column(String)
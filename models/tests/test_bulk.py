@@ -0,0 +1,63 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from event_gulper_models import (
+    EventDetail,
+    EventDetailDB,
+    event_list_adapter,
+    event_rows,
+    validate_events,
+    validate_events_json,
+)
+from pydantic import ValidationError
+
+EVENTS = [
+    {
+        "title": "Queer Film Night",
+        "summary": "Short films",
+        "detail_url": "https://example.com/film",
+        "start_time": "2025-02-20T20:00:00+01:00",
+        "price": "8.50",
+        "original_tags": ["film"],
+    },
+    {
+        "title": "Karaoke",
+        "summary": "Sing along",
+        "detail_url": "https://example.com/karaoke",
+    },
+]
+
+
+def test_adapter_is_built_once():
+    assert event_list_adapter() is event_list_adapter()
+
+
+def test_validate_events_matches_per_item_validation():
+    expected = [EventDetail.model_validate(item) for item in EVENTS]
+
+    assert validate_events(EVENTS) == expected
+    assert validate_events_json(json.dumps(EVENTS).encode()) == expected
+
+
+def test_invalid_events_report_their_index():
+    with pytest.raises(ValidationError) as error:
+        validate_events([EVENTS[0], {"title": "No summary"}])
+
+    assert {e["loc"][0] for e in error.value.errors()} == {1}
+
+
+def test_event_rows_match_orm_conversion():
+    events = validate_events(EVENTS)
+    rows = event_rows(events, source="telegram")
+
+    for event, row in zip(events, rows, strict=True):
+        orm = EventDetailDB.from_event_detail(event, "telegram")
+        assert row == {key: getattr(orm, key) for key in row}
+
+    # Aware times become naive local time, as the ORM conversion did
+    start_time = datetime(2025, 2, 20, 20, 0, tzinfo=timezone(timedelta(hours=1)))
+    assert rows[0]["start_time"] == start_time.astimezone().replace(tzinfo=None)
+    assert rows[0]["price"] == 8.5
+    # Core inserts take their columns from the first row
+    assert rows[0].keys() == rows[1].keys()
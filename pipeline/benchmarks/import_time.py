@@ -0,0 +1,47 @@
+"""
+Measure how long a cold worker takes to import the flows, and which imports
+dominate.
+
+Run from pipeline/ with `uv run python -m benchmarks.import_time [module]`.
+tests/test_startup.py guards that the slow, lazily imported dependencies stay out
+of this path.
+"""
+
+import subprocess
+import sys
+import time
+
+
+def import_time(module: str) -> float:
+    """Seconds a fresh interpreter takes to import a module."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", f"import {module}"], check=True)
+    return time.perf_counter() - start
+
+
+def top_imports(module: str, count: int = 10) -> list[tuple[int, str]]:
+    """The slowest imports of a module, by cumulative microseconds."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    imports = []
+    for line in result.stderr.splitlines()[1:]:
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        # Only report the module's direct imports, not what they import in turn
+        if name.startswith("   ") and not name.startswith("    "):
+            imports.append((int(cumulative), name.strip()))
+    return sorted(imports, reverse=True)[:count]
+
+
+def main(module: str = "orchestration.siegessaeule_flow", repeat: int = 3) -> None:
+    best = min(import_time(module) for _ in range(repeat))
+    print(f"import {module}: {best * 1000:.0f} ms (best of {repeat})")
+    for cumulative, name in top_imports(module):
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2])
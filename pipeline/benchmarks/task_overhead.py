@@ -0,0 +1,76 @@
+"""
+Measure the per-batch overhead of running transformers as Prefect tasks compared
+to the lightweight engine.
+
+Run from pipeline/ with
+`uv run python -m benchmarks.task_overhead [num_batches] [batch_size]`.
+"""
+
+import asyncio
+import sys
+import time
+
+from core.pipelines import Pipeline
+from core.transforms.protocols import Transformer
+from prefect import flow, task
+
+
+class ListSource:
+    """Source yielding the same batch a number of times."""
+
+    def __init__(self, num_batches: int, batch_size: int):
+        self.num_batches = num_batches
+        self.batch_size = batch_size
+
+    async def fetch_batches(self):
+        for batch_num in range(self.num_batches):
+            yield [
+                f"https://example.com/{batch_num}/{i}" for i in range(self.batch_size)
+            ]
+
+
+class PassThrough(Transformer[str, str]):
+    """Transformer without any work of its own, so only its overhead is measured."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    @task(name="pass_through", retries=2, retry_delay_seconds=30)
+    async def transform(self, items):
+        return items
+
+    def __str__(self) -> str:
+        return self.name
+
+
+async def run(num_batches: int, batch_size: int, lightweight: bool) -> float:
+    # Four stages, like the scrape flow: save URLs, scrape, extract, save events
+    pipeline = Pipeline(
+        ListSource(num_batches, batch_size),
+        [PassThrough(f"stage {i}") for i in range(4)],
+        max_batches=None,
+        lightweight=lightweight,
+    )
+    start = time.perf_counter()
+    await pipeline.run()
+    return time.perf_counter() - start
+
+
+@flow(name="task_overhead_benchmark")
+async def main(num_batches: int = 50, batch_size: int = 5) -> None:
+    # Warm up the orchestrator connection and task machinery
+    await run(2, batch_size, lightweight=False)
+
+    print(f"{num_batches} batches of {batch_size} items through 4 stages")
+    for lightweight in (False, True):
+        seconds = await run(num_batches, batch_size, lightweight)
+        mode = "lightweight engine" if lightweight else "prefect tasks"
+        print(
+            f"  {mode:20} {seconds * 1000:9.1f} ms  "
+            f"{seconds / num_batches * 1000:7.2f} ms/batch"
+        )
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    asyncio.run(main(*args))
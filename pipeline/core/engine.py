@@ -0,0 +1,234 @@
+import asyncio
+import inspect
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+
+import httpx
+import logfire
+from prefect import Task
+
+from core.transforms.protocols import Transformer
+
+# Stats of the lightweight engine run in progress, None when tasks run in Prefect
+_engine_stats: ContextVar[Optional["EngineStats"]] = ContextVar(
+    "engine_stats", default=None
+)
+
+
+class PartialBatchError(Exception):
+    """
+    Raised by a batch task when some of its items failed.
+
+    Failing the task keeps Prefect from caching the failures with the batch, so
+    a later run processes the failed items again. The per-item results, with the
+    raised exception for each failed item, are kept for the caller.
+    """
+
+    def __init__(self, results: List[Any]):
+        failures = sum(isinstance(result, Exception) for result in results)
+        super().__init__(f"{failures} of {len(results)} items failed")
+        self.results = results
+
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Check whether an error may not recur when the failed call is retried.
+
+    Timeouts, connection errors, rate limits (HTTP 429) and server errors (HTTP 5xx)
+    are transient, also when they caused the error, e.g. in an LLM client's wrapper
+    exception. Anything else, such as a page without the expected content, a client
+    error or invalid data, would fail again the same way.
+    """
+    # Only checked if loaded already, as the flows import openai lazily
+    openai = sys.modules.get("openai")
+    while error is not None:
+        if isinstance(error, (TimeoutError, ConnectionError, httpx.TransportError)):
+            return True
+        if openai is not None and isinstance(error, openai.APIConnectionError):
+            return True
+        response = getattr(error, "response", None)
+        status_code = getattr(error, "status_code", None) or getattr(
+            response, "status_code", None
+        )
+        if isinstance(status_code, int):
+            return status_code == 429 or status_code >= 500
+        error = error.__cause__
+    return False
+
+
+@dataclass
+class TaskStats:
+    """Counters for one task name in the lightweight engine."""
+
+    calls: int = 0
+    retries: int = 0
+    failures: int = 0
+    total_seconds: float = 0.0
+
+    @property
+    def avg_seconds(self) -> float:
+        return self.total_seconds / self.calls if self.calls else 0.0
+
+
+@dataclass
+class EngineStats:
+    """Per-task counters of a lightweight engine run, keyed by task name."""
+
+    tasks: Dict[str, TaskStats] = field(default_factory=dict)
+
+    def log(self) -> None:
+        for name, stats in self.tasks.items():
+            logfire.info(
+                "Task {task}: {calls} calls, {retries} retries, {failures} failures, "
+                "{avg_seconds:.3f}s average",
+                task=name,
+                calls=stats.calls,
+                retries=stats.retries,
+                failures=stats.failures,
+                avg_seconds=stats.avg_seconds,
+                total_seconds=stats.total_seconds,
+            )
+
+
+@contextmanager
+def lightweight_engine() -> Iterator[EngineStats]:
+    """
+    Run tasks called through `run_task` or `run_transform` as plain coroutines
+    within the block.
+
+    Each Prefect task run is created, tracked and cached through the orchestrator,
+    which costs a fixed overhead per call. In lightweight mode the task's function
+    is awaited directly, retried with the task's retry settings, and timed into
+    the yielded stats; only the enclosing flow is tracked by Prefect. Results are
+    not cached.
+
+    Yields:
+        The stats collected while the block runs
+    """
+    stats = EngineStats()
+    token = _engine_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _engine_stats.reset(token)
+
+
+def _retry_delay(task: Task, retry: int) -> float:
+    """Get the seconds to wait before a retry, following the task's settings."""
+    delays = task.retry_delay_seconds
+    if callable(delays):
+        # Backoff functions such as exponential_backoff get the number of retries
+        # and return the delay before each
+        delays = delays(task.retries)
+    if isinstance(delays, (list, tuple)):
+        return delays[min(retry, len(delays) - 1)] if delays else 0
+    return delays or 0
+
+
+async def _run_lightweight(
+    stats: EngineStats, task: Task, *args: Any, **kwargs: Any
+) -> Any:
+    """Await a task's function directly, with the task's retries."""
+    task_stats = stats.tasks.setdefault(task.name, TaskStats())
+    task_stats.calls += 1
+    start = time.perf_counter()
+    try:
+        for retry in range(task.retries + 1):
+            try:
+                return await task.fn(*args, **kwargs)
+            except Exception as error:
+                if retry == task.retries:
+                    task_stats.failures += 1
+                    raise
+                task_stats.retries += 1
+                logfire.warn(
+                    "Task {task} failed, retrying: {error!r}",
+                    task=task.name,
+                    error=error,
+                )
+                await asyncio.sleep(_retry_delay(task, retry))
+    finally:
+        task_stats.total_seconds += time.perf_counter() - start
+
+
+async def run_task(task: Task, *args: Any, **kwargs: Any) -> Any:
+    """
+    Call a Prefect task, or its plain function in lightweight mode.
+
+    Args:
+        task: The task to run
+        *args: Positional arguments of the task
+        **kwargs: Keyword arguments of the task
+
+    Returns:
+        The task's result
+    """
+    stats = _engine_stats.get()
+    if stats is None:
+        return await task(*args, **kwargs)
+    return await _run_lightweight(stats, task, *args, **kwargs)
+
+
+async def run_transform(transformer: Transformer, items: List[Any]) -> List[Any]:
+    """
+    Transform a batch, bypassing the Prefect task of the transformer's `transform`
+    method, if it has one, in lightweight mode.
+
+    Args:
+        transformer: The transformer to run
+        items: The batch of items
+
+    Returns:
+        The transformed items
+    """
+    stats = _engine_stats.get()
+    transform = inspect.getattr_static(transformer, "transform")
+    if stats is None or not isinstance(transform, Task):
+        return await transformer.transform(items)
+    return await _run_lightweight(stats, transform, transformer, items)
+
+
+async def gather_with_retries(
+    calls: List[Callable[[], Awaitable[Any]]],
+    retries: int,
+    retry_delay_seconds: float,
+    retry_if: Callable[[Exception], bool] = is_transient,
+) -> List[Any]:
+    """
+    Await calls concurrently, retrying each call that failed with a transient
+    error on its own. Other failures are not retried, so an item that can never
+    succeed does not hold up its batch.
+
+    Args:
+        calls: Functions starting the call for each item of a batch
+        retries: Number of retries per call
+        retry_delay_seconds: Seconds to wait before each retry
+        retry_if: Check whether a call that raised an error is worth retrying
+
+    Returns:
+        The result of each call, or the exception its last attempt raised
+
+    Raises:
+        PartialBatchError: If any call still failed after its retries
+    """
+
+    async def call_with_retries(call: Callable[[], Awaitable[Any]]) -> Any:
+        for retry in range(retries + 1):
+            try:
+                return await call()
+            except Exception as error:
+                if retry == retries or not retry_if(error):
+                    raise
+                logfire.warn("Item failed, retrying: {error!r}", error=error)
+                await asyncio.sleep(retry_delay_seconds)
+
+    results = await asyncio.gather(
+        *(call_with_retries(call) for call in calls), return_exceptions=True
+    )
+    if any(isinstance(result, Exception) for result in results):
+        raise PartialBatchError(results)
+    return results
@@ -1,8 +1,12 @@
+from contextlib import aclosing, nullcontext
 from typing import Any, List
 
 import logfire
 from event_gulper_models import EventDetail
 
+from core.engine import lightweight_engine, run_transform
+from core.profiling import BatchProfiler
+from core.sources.merged import batch_source
 from core.sources.protocols import DataSource
 from core.transforms.protocols import Transformer
 
@@ -29,6 +33,8 @@ class Pipeline:
         source: DataSource,
         transformers: List[Transformer] | None = None,
         max_batches: int | None = 2,
+        lightweight: bool = False,
+        profile: bool = False,
     ):
         """
         Initialize the core.
@@ -37,10 +43,18 @@ class Pipeline:
             source: The data source that provides batches of items
             transformers: List of transformers to process the items
             max_batches: Maximum number of batches to process (None for unlimited)
+            lightweight: If True, transformers run as plain coroutines with the
+                engine's own retries and metrics instead of as Prefect tasks (see
+                `core.engine.lightweight_engine`), saving the per-task overhead
+            profile: If True, a CPU profile of each stage and the memory allocated
+                by each batch are attached to the batch's logfire span (see
+                `core.profiling.BatchProfiler`)
         """
         self.source = source
         self.transformers = transformers or []
         self.max_batches = max_batches
+        self.lightweight = lightweight
+        self.profiler = BatchProfiler() if profile else None
 
     def add_transformer(self, transformer: Transformer) -> "Pipeline":
         """Add a transformer to the pipeline"""
@@ -53,26 +67,69 @@ class Pipeline:
         batch_num: int,
     ) -> List[Any]:
         """Process a single batch of items through the core."""
-        with logfire.span(
-            f"Processing batch {batch_num} with {len(source_items)} items",
-            batch_size=len(source_items),
-        ):
-            # Transform the source items
-            transformed_items = source_items
-            for transformer in self.transformers:
-                num_input_items = len(transformed_items)
-                transformed_items = await transformer.transform(transformed_items)
-
-                num_output_items = len(transformed_items)
-                logfire.info(
-                    f"{str(transformer)}: {num_input_items} input items -> \
-                    {num_output_items} output items",
+        # Batches of a MergedSource are tagged with the source they came from
+        source = getattr(source_items, "source", None)
+        token = batch_source.set(source)
+        try:
+            with logfire.span(
+                f"Processing batch {batch_num} with {len(source_items)} items",
+                batch_size=len(source_items),
+                source=source,
+            ) as span:
+                # Transform the source items
+                transformed_items = source_items
+                try:
+                    for transformer in self.transformers:
+                        num_input_items = len(transformed_items)
+                        with (
+                            self.profiler.stage(str(transformer))
+                            if self.profiler
+                            else nullcontext()
+                        ):
+                            transformed_items = await run_transform(
+                                transformer, transformed_items
+                            )
+
+                        num_output_items = len(transformed_items)
+                        logfire.info(
+                            f"{str(transformer)}: {num_input_items} input items -> \
+                            {num_output_items} output items",
+                            transformer=str(transformer),
+                            num_input_items=num_input_items,
+                            num_output_items=num_output_items,
+                        )
+                finally:
+                    # Reported for failed batches too, so their stages never end
+                    # up in the next batch's report
+                    if self.profiler:
+                        span.set_attribute("profile", self.profiler.batch_report())
+
+                return transformed_items
+        finally:
+            batch_source.reset(token)
+
+    async def _flush(self, run_error: BaseException | None) -> None:
+        """
+        Let transformers finish deferred work, e.g. buffered database writes.
+
+        Every transformer is flushed even if another one fails. Flush errors are
+        logged, and the first is raised unless the run already failed, so that
+        the error the run failed with is the one that propagates.
+        """
+        flush_error = None
+        for transformer in self.transformers:
+            try:
+                await transformer.flush()
+            except Exception as error:
+                logfire.error(
+                    "Flushing {transformer} failed: {error!r}",
                     transformer=str(transformer),
-                    num_input_items=num_input_items,
-                    num_output_items=num_output_items,
+                    error=error,
                 )
+                flush_error = flush_error or error
 
-            return transformed_items
+        if flush_error is not None and run_error is None:
+            raise flush_error
 
     async def run(self) -> List[EventDetail]:
         """
@@ -84,15 +141,41 @@ class Pipeline:
         all_results = []
         batch_num = 0
 
-        async for source_items in self.source.fetch_batches():
-            transformed_items = await self._transform_batch(source_items, batch_num)
-
-            # Add the transformed items to the results
-            all_results.extend(transformed_items)
-
-            batch_num += 1
-            if self.max_batches is not None and batch_num >= self.max_batches:
-                break
+        engine = lightweight_engine() if self.lightweight else nullcontext()
+        if self.profiler:
+            self.profiler.start()
+        with engine as stats:
+            run_error = None
+            try:
+                # Closed when stopping early too, so sources can clean up at once,
+                # e.g. a MergedSource cancels the tasks reading its sources
+                async with aclosing(self.source.fetch_batches()) as batches:
+                    async for source_items in batches:
+                        transformed_items = await self._transform_batch(
+                            source_items, batch_num
+                        )
+
+                        # Add the transformed items to the results
+                        all_results.extend(transformed_items)
+
+                        batch_num += 1
+                        if (
+                            self.max_batches is not None
+                            and batch_num >= self.max_batches
+                        ):
+                            break
+            except BaseException as error:
+                run_error = error
+                raise
+            finally:
+                try:
+                    await self._flush(run_error)
+                finally:
+                    if self.profiler:
+                        self.profiler.stop()
+                    # Failed runs are where retry and failure counts matter most
+                    if stats is not None:
+                        stats.log()
 
         num_new_items = len(all_results)
         logfire.info(
@@ -0,0 +1,147 @@
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+
+def _function_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_filename}:{code.co_firstlineno}({code.co_qualname})"
+
+
+class _StackSampler:
+    """
+    Samples the call stack of the calling thread from a background thread.
+
+    Only frames entered after the sampler was created are recorded, so the
+    frames of the test runner or event loop the stage runs in do not crowd out
+    the stage's own functions.
+    """
+
+    def __init__(self, interval: float):
+        self.thread_id = threading.get_ident()
+        self.interval = interval
+        # Kept referenced, so their ids are not reused by new frames
+        self._outer_frames = []
+        frame = sys._getframe(1)
+        while frame is not None:
+            self._outer_frames.append(frame)
+            frame = frame.f_back
+        self._outer_ids = {id(frame) for frame in self._outer_frames}
+        self.samples = 0
+        self.own = Counter()
+        self.cumulative = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            self.samples += 1
+            stack = []
+            while frame is not None and id(frame) not in self._outer_ids:
+                stack.append(_function_name(frame))
+                frame = frame.f_back
+            if stack:
+                self.own[stack[0]] += 1
+            # Recursive functions are counted once per sample
+            self.cumulative.update(set(stack))
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def report(self, top: int) -> str:
+        lines = [
+            f"{self.samples} samples every {self.interval * 1000:g} ms",
+            "   cum%   own%  function",
+        ]
+        for name, count in self.cumulative.most_common(top):
+            lines.append(
+                f"{count / self.samples:7.1%}{self.own[name] / self.samples:7.1%}"
+                f"  {name}"
+            )
+        return "\n".join(lines)
+
+
+class BatchProfiler:
+    """
+    Collects a CPU profile of each pipeline stage and the memory allocated by each
+    batch, to attach to the batch's logfire span.
+
+    CPU profiles are sampled: a background thread records the call stack of the
+    thread running the stage every `interval` seconds, so profiling barely slows
+    the run down and other threads, e.g. Prefect's, never show up in a profile.
+    They cover everything running on the event loop while a stage runs, e.g.
+    background write-behind flushes too. Memory is tracked with tracemalloc as the
+    difference between snapshots taken after consecutive batches.
+    """
+
+    def __init__(self, top: int = 15, interval: float = 0.001):
+        """
+        Initialize the profiler.
+
+        Args:
+            top: Number of functions and allocation sites to report
+            interval: Seconds between samples of the call stack
+        """
+        self.top = top
+        self.interval = interval
+        self._stages: Dict[str, str] = {}
+        self._snapshot: tracemalloc.Snapshot | None = None
+        self._started_tracing = False
+
+    def start(self) -> None:
+        """Start tracing memory allocations."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._snapshot = tracemalloc.take_snapshot()
+
+    def stop(self) -> None:
+        """Stop tracing memory allocations, unless they were traced before."""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        self._snapshot = None
+        self._stages = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Profile the CPU time of a stage of the current batch."""
+        sampler = _StackSampler(self.interval)
+        sampler.start()
+        try:
+            yield
+        finally:
+            sampler.stop()
+            self._stages[name] = sampler.report(self.top)
+
+    def batch_report(self) -> Dict[str, Any]:
+        """
+        Get the profiles of the batch processed since the last report.
+
+        Returns:
+            The CPU profile of each stage, and the allocation sites whose memory
+            grew most during the batch
+        """
+        report: Dict[str, Any] = {"cpu": self._stages}
+        self._stages = {}
+
+        if self._snapshot is not None:
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                [tracemalloc.Filter(False, tracemalloc.__file__)]
+            )
+            diff = snapshot.compare_to(self._snapshot, "lineno")
+            report["memory"] = [str(stat) for stat in diff[: self.top]]
+            report["memory_traced_bytes"] = tracemalloc.get_traced_memory()[0]
+            self._snapshot = snapshot
+
+        return report
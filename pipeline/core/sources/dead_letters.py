@@ -0,0 +1,43 @@
+from typing import AsyncIterator, List, Optional
+
+from core.sources.protocols import DataSource
+from core.transforms.database import get_dead_letters
+
+
+class DeadLetterSource(DataSource[str]):
+    """
+    Data source replaying unresolved dead-lettered items of one stage.
+    Yields batches of the inputs the items failed on, e.g. URLs or markdown.
+    """
+
+    def __init__(
+        self,
+        stage: str,
+        batch_size: int = 10,
+        max_batches: Optional[int] = None,
+    ):
+        self.stage = stage
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+
+    async def fetch_batches(self) -> AsyncIterator[List[str]]:
+        """
+        Fetch batches of dead-lettered inputs in the order they were stored.
+
+        Pages by id rather than offset, so items resolved (or failing again) while
+        the batches are processed are neither skipped nor replayed twice.
+
+        Returns:
+            Batches of dead-lettered inputs
+        """
+        batch_count = 0
+        last_id = 0
+
+        while self.max_batches is None or batch_count < self.max_batches:
+            letters = await get_dead_letters(self.stage, last_id, self.batch_size)
+            if not letters:
+                break
+
+            yield [letter.input for letter in letters]
+            batch_count += 1
+            last_id = letters[-1].id
@@ -0,0 +1,136 @@
+import asyncio
+from contextlib import aclosing
+from contextvars import ContextVar
+from typing import AsyncIterator, Dict, List, Mapping, Optional
+
+import logfire
+from core.sources.protocols import DataSource, SourceOutput
+
+# Name of the source the batch being processed came from, set by the pipeline
+batch_source: ContextVar[Optional[str]] = ContextVar("batch_source", default=None)
+
+
+class SourceBatch(List[SourceOutput]):
+    """A batch of items tagged with the name of the source it came from."""
+
+    def __init__(self, source: str, items: List[SourceOutput]):
+        super().__init__(items)
+        self.source = source
+
+
+class MergedSource(DataSource[SourceOutput]):
+    """
+    Data source consuming several sources concurrently, so a single pipeline can
+    keep its LLM and database stages busy with items from all of them.
+
+    Each source is read by its own background task into a bounded queue, so a slow
+    source never holds up the others and a fast one pauses once `prefetch` of its
+    batches wait to be processed. Ready batches are interleaved by smooth weighted
+    round-robin: with weights 2 and 1, two batches of the first source are yielded
+    for each batch of the second, spread out rather than back to back.
+
+    Sources that save their progress, e.g. a chat cursor or crawl watermark, when
+    their next batch is requested declare so with a true
+    `saves_progress_on_next_batch` attribute. They are not read ahead: their next
+    batch is only requested once the pipeline has processed the previous one, so
+    progress is never saved for batches still queued when the pipeline stops.
+
+    Batches are yielded as `SourceBatch`es, which the pipeline uses to let the
+    database transformers record the source of each item.
+    """
+
+    def __init__(
+        self,
+        sources: Mapping[str, DataSource[SourceOutput]],
+        weights: Optional[Mapping[str, int]] = None,
+        prefetch: int = 2,
+        max_batches: Optional[int] = None,
+    ):
+        """
+        Initialize the source.
+
+        Args:
+            sources: Sources to merge, keyed by the name recorded for their items
+            weights: Relative share of batches per source (default 1 each)
+            prefetch: Maximum number of batches fetched ahead per source
+            max_batches: Maximum number of batches to yield (None for unlimited)
+        """
+        weights = weights or {}
+        unknown = set(weights) - set(sources)
+        if unknown:
+            raise ValueError(f"Weights given for unknown sources: {sorted(unknown)}")
+        if any(weight < 1 for weight in weights.values()):
+            raise ValueError("Source weights must be positive integers")
+
+        self.sources = dict(sources)
+        self.weights = {name: weights.get(name, 1) for name in self.sources}
+        self.prefetch = prefetch
+        self.max_batches = max_batches
+
+    async def fetch_batches(self) -> AsyncIterator[SourceBatch[SourceOutput]]:
+        """
+        Fetch batches from all sources, interleaved by weight.
+
+        A source that fails is logged and dropped; the others continue.
+
+        Returns:
+            Batches of items tagged with their source
+        """
+        queues = {name: asyncio.Queue(self.prefetch) for name in self.sources}
+        finished = set()
+        ready = asyncio.Event()
+
+        async def pump(name: str, source: DataSource[SourceOutput]) -> None:
+            lockstep = getattr(source, "saves_progress_on_next_batch", False)
+            try:
+                async with aclosing(source.fetch_batches()) as batches:
+                    async for batch in batches:
+                        processed = asyncio.Event() if lockstep else None
+                        # Blocks while the queue is full, pausing this source
+                        await queues[name].put((batch, processed))
+                        ready.set()
+                        if processed is not None:
+                            await processed.wait()
+            except Exception as error:
+                logfire.error(
+                    "Source {source} failed: {error!r}", source=name, error=error
+                )
+            finally:
+                finished.add(name)
+                ready.set()
+
+        pumps = [
+            asyncio.create_task(pump(name, source))
+            for name, source in self.sources.items()
+        ]
+        credits: Dict[str, int] = dict.fromkeys(self.sources, 0)
+        batch_count = 0
+
+        try:
+            while self.max_batches is None or batch_count < self.max_batches:
+                # Let sources blocked on a full queue refill it before picking
+                await asyncio.sleep(0)
+                ready.clear()
+                available = [name for name, queue in queues.items() if queue.qsize()]
+                if not available:
+                    if len(finished) == len(queues):
+                        break
+                    await ready.wait()
+                    continue
+
+                # Smooth weighted round-robin among the sources with a batch ready
+                for name in available:
+                    credits[name] += self.weights[name]
+                name = max(available, key=credits.__getitem__)
+                credits[name] -= sum(self.weights[other] for other in available)
+
+                batch, processed = queues[name].get_nowait()
+                yield SourceBatch(name, batch)
+                # The pipeline asks for the next batch once it processed this one
+                if processed is not None:
+                    processed.set()
+                batch_count += 1
+        finally:
+            for task in pumps:
+                task.cancel()
+            await asyncio.gather(*pumps, return_exceptions=True)
@@ -1,15 +1,25 @@
 import re
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
 from typing import AsyncIterator, List, Optional
 from urllib.parse import urljoin, urlparse
 
-from bs4 import BeautifulSoup
 from core.sources.protocols import DataSource
+from core.sources.watermarks import dates_due
+from core.transforms.database import (
+    content_hash,
+    get_crawl_watermarks,
+    save_crawl_watermark,
+)
 from httpx import AsyncClient
 
+SOURCE_NAME = "siegessaeule"
+
 
 async def _get_event_paths(http_client: AsyncClient, page_url: str) -> List[str]:
     """Extract all href paths from content-block elements."""
+    # Imported on first use to keep worker startup fast
+    from bs4 import BeautifulSoup
+
     response = await http_client.get(page_url)
     response.raise_for_status()
 
@@ -54,6 +64,25 @@ def _construct_siegessaeule_url(target_date: date) -> str:
     return f"{base_url}?date={target_date.strftime('%Y-%m-%d')}"
 
 
+async def fetch_listing_urls(http_client: AsyncClient, target_date: date) -> List[str]:
+    """
+    Get the URLs of all events listed for a date.
+
+    Args:
+        target_date: The date to fetch events for
+
+    Returns:
+        Event URLs in the order they are listed
+    """
+    page_url = _construct_siegessaeule_url(target_date)
+
+    # Get the event detail URLs from the page
+    paths = await _get_event_paths(http_client, page_url)
+    event_paths = _filter_event_paths(paths)
+    base_url = _get_base_url(page_url)
+    return _construct_event_urls(base_url, event_paths)
+
+
 async def fetch_event_urls(
     http_client: AsyncClient,
     target_date: date,
@@ -78,14 +107,7 @@ async def fetch_event_urls(
         # Parse from string if it's a string
         target_date = date.fromisoformat(target_date)
 
-    # Construct the URL for the target date
-    page_url = _construct_siegessaeule_url(target_date)
-
-    # Get the event detail URLs from the page
-    paths = await _get_event_paths(http_client, page_url)
-    event_paths = _filter_event_paths(paths)
-    base_url = _get_base_url(page_url)
-    all_urls = _construct_event_urls(base_url, event_paths)
+    all_urls = await fetch_listing_urls(http_client, target_date)
 
     # Yield URLs in batches
     for i in range(0, len(all_urls), batch_size):
@@ -108,31 +130,81 @@ class SiegessaeuleSource(DataSource[str]):
         end_date: date,
         batch_size: int = 10,
         max_batches: Optional[int] = None,
+        incremental: bool = False,
     ):
+        """
+        Initialize the source.
+
+        Args:
+            http_client: HTTP client to fetch the listing pages with
+            start_date: First date to fetch events for (inclusive)
+            end_date: Last date to fetch events for (inclusive)
+            batch_size: Number of URLs per batch
+            max_batches: Maximum number of batches to yield (None for unlimited)
+            incremental: If True, only dates never crawled or due for a refresh
+                are fetched (see `core.sources.watermarks`), and a date whose
+                listed events are unchanged since it was last crawled is skipped
+        """
         self.http_client = http_client
         self.start_date = start_date
         self.end_date = end_date
         self.batch_size = batch_size
         self.max_batches = max_batches
+        self.incremental = incremental
+
+    @property
+    def saves_progress_on_next_batch(self) -> bool:
+        """Whether crawl watermarks are saved when the next batch is requested."""
+        return self.incremental
 
     async def fetch_batches(self) -> AsyncIterator[List[str]]:
         """
         Fetch batches of event URLs from Siegessaeule for the date range.
         Processes one date at a time to be gentle on the server.
 
+        In incremental mode, a date's crawl is recorded once its last batch has
+        been processed, so a date that was cut short is crawled again next run.
+
         Returns:
             Batches of event URLs
         """
         batch_count = 0
-        current_date = self.start_date
-
-        while current_date <= self.end_date:
-            async for url_batch in fetch_event_urls(
-                self.http_client, current_date, self.batch_size
-            ):
-                yield url_batch
+        dates = [
+            self.start_date + timedelta(days=offset)
+            for offset in range((self.end_date - self.start_date).days + 1)
+        ]
+
+        watermarks = {}
+        if self.incremental:
+            watermarks = await get_crawl_watermarks(
+                SOURCE_NAME, self.start_date, self.end_date
+            )
+            last_crawled = {
+                day: watermark.last_crawled_at for day, watermark in watermarks.items()
+            }
+            dates = dates_due(
+                self.start_date, self.end_date, last_crawled, datetime.utcnow()
+            )
+
+        for current_date in dates:
+            urls = await fetch_listing_urls(self.http_client, current_date)
+
+            if self.incremental:
+                listing_hash = content_hash("\n".join(urls))
+                watermark = watermarks.get(current_date)
+                if watermark is not None and watermark.listing_hash == listing_hash:
+                    await save_crawl_watermark(
+                        SOURCE_NAME, current_date, listing_hash, len(urls)
+                    )
+                    continue
+
+            for i in range(0, len(urls), self.batch_size):
+                yield urls[i : i + self.batch_size]
                 batch_count += 1
                 if self.max_batches is not None and batch_count >= self.max_batches:
-                    break
+                    return
 
-            current_date += timedelta(days=1)
+            if self.incremental:
+                await save_crawl_watermark(
+                    SOURCE_NAME, current_date, listing_hash, len(urls)
+                )
@@ -0,0 +1,120 @@
+from typing import AsyncIterator, List, Optional, Sequence
+
+from core.sources.protocols import DataSource
+from core.transforms.database import get_chat_cursor, save_chat_cursor
+from telethon import TelegramClient
+from telethon.tl.custom import Message
+
+
+def message_url(chat: int | str, message_id: int) -> str:
+    """
+    Get the t.me link of a message.
+
+    Args:
+        chat: Username of a public chat, or the numeric id of a private one
+        message_id: Id of the message in the chat
+
+    Returns:
+        The message's URL
+    """
+    if isinstance(chat, str) and not chat.lstrip("-").isdigit():
+        return f"https://t.me/{chat.removeprefix('@')}/{message_id}"
+    # Private links use the chat id without its -100 (channel) or - (group) prefix
+    peer = str(chat).removeprefix("-100").removeprefix("-")
+    return f"https://t.me/c/{peer}/{message_id}"
+
+
+def message_to_md(chat: int | str, message: Message) -> str:
+    """
+    Format a message for the LLM extraction, with its link as the detail URL.
+
+    Args:
+        chat: The chat the message was posted in
+        message: The message
+
+    Returns:
+        Markdown with the message's link, posting time and text
+    """
+    return (
+        f"[Telegram message]({message_url(chat, message.id)}) "
+        f"posted {message.date:%Y-%m-%d %H:%M %Z}\n\n{message.text}"
+    )
+
+
+class TelegramSource(DataSource[str]):
+    """
+    Data source reading new messages from Telegram chats.
+    Yields batches of messages as markdown, ready for MdToEventTransformer.
+
+    The id of the last processed message of each chat is persisted, so each run
+    only fetches messages posted since the previous one.
+    """
+
+    # The cursor is saved when the next batch is requested, see `fetch_batches`
+    saves_progress_on_next_batch = True
+
+    def __init__(
+        self,
+        client: TelegramClient,
+        chats: Sequence[int | str],
+        batch_size: int = 10,
+        max_batches: Optional[int] = None,
+    ):
+        """
+        Initialize the source.
+
+        Args:
+            client: Connected Telegram client
+            chats: Ids or usernames of the chats to read
+            batch_size: Number of messages per batch
+            max_batches: Maximum number of batches to yield (None for unlimited)
+        """
+        self.client = client
+        self.chats = chats
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+
+    async def fetch_batches(self) -> AsyncIterator[List[str]]:
+        """
+        Fetch batches of messages posted since the last run, oldest first.
+
+        A chat's cursor advances past a batch once the next batch is requested,
+        i.e. once the pipeline has processed it, so messages of a batch that was
+        interrupted, or after which the pipeline stopped, are fetched again by
+        the next run. Messages without text advance the cursor without being
+        yielded.
+
+        Returns:
+            Batches of messages as markdown
+        """
+        batch_count = 0
+
+        for chat in self.chats:
+            if self.max_batches is not None and batch_count >= self.max_batches:
+                return
+
+            cursor = await get_chat_cursor(str(chat))
+            last_id = cursor
+            batch = []
+
+            # iter_messages fetches in chunks of up to 100 messages per request
+            async for message in self.client.iter_messages(
+                chat, min_id=cursor, reverse=True
+            ):
+                last_id = message.id
+                if message.text:
+                    batch.append(message_to_md(chat, message))
+
+                if len(batch) >= self.batch_size:
+                    yield batch
+                    batch_count += 1
+                    batch = []
+                    await save_chat_cursor(str(chat), last_id)
+                    if self.max_batches is not None and batch_count >= self.max_batches:
+                        return
+
+            if batch:
+                yield batch
+                batch_count += 1
+            if last_id != cursor:
+                await save_chat_cursor(str(chat), last_id)
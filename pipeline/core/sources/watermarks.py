@@ -0,0 +1,67 @@
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Sequence, Tuple
+
+# Minimum time between crawls of a date, by how many days ahead of today it is:
+# listings for the coming days change most, so they are refreshed most often
+REFRESH_INTERVALS: Sequence[Tuple[int, timedelta]] = (
+    (2, timedelta(hours=3)),
+    (7, timedelta(hours=12)),
+    (30, timedelta(days=2)),
+)
+# Minimum time between crawls of dates further ahead, or in the past
+DEFAULT_REFRESH_INTERVAL = timedelta(days=7)
+
+
+def refresh_interval(
+    days_ahead: int,
+    intervals: Sequence[Tuple[int, timedelta]] = REFRESH_INTERVALS,
+) -> timedelta:
+    """
+    Get the minimum time between crawls of a date.
+
+    Args:
+        days_ahead: Number of days the date is ahead of today
+        intervals: (days ahead, interval) pairs in increasing order of days; a date
+            gets the interval of the first pair it is less than `days` ahead for
+
+    Returns:
+        The refresh interval for the date
+    """
+    if days_ahead >= 0:
+        for days, interval in intervals:
+            if days_ahead < days:
+                return interval
+    return DEFAULT_REFRESH_INTERVAL
+
+
+def dates_due(
+    start_date: date,
+    end_date: date,
+    last_crawled: Dict[date, datetime],
+    now: datetime,
+    intervals: Sequence[Tuple[int, timedelta]] = REFRESH_INTERVALS,
+) -> List[date]:
+    """
+    Get the dates in a range that were never crawled or are due for a refresh.
+
+    Args:
+        start_date: First date of the range (inclusive)
+        end_date: Last date of the range (inclusive)
+        last_crawled: When each crawled date was last crawled
+        now: Current time, in the same timezone as last_crawled
+        intervals: Refresh intervals by days ahead, see `refresh_interval`
+
+    Returns:
+        The dates to crawl, in order
+    """
+    due = []
+    current_date = start_date
+    while current_date <= end_date:
+        crawled_at = last_crawled.get(current_date)
+        days_ahead = (current_date - now.date()).days
+        if crawled_at is None or now - crawled_at >= refresh_interval(
+            days_ahead, intervals
+        ):
+            due.append(current_date)
+        current_date += timedelta(days=1)
+    return due
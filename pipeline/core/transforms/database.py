@@ -1,14 +1,44 @@
+import hashlib
 import os
-from datetime import datetime
-from typing import AsyncGenerator, List
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from functools import cache
+from typing import Any, AsyncGenerator, Dict, List, Tuple
 
-from event_gulper_models import Base, EventDetail, EventDetailDB, EventURL
+import logfire
+from event_gulper_models import (
+    EVENT_DEFAULT_PARTITION,
+    EVENT_PARTITION_KEY,
+    EVENT_SEARCH_DDL,
+    EVENTS_CHANGED_CHANNEL,
+    ArchivedPartition,
+    BackfillShard,
+    Base,
+    ChatCursor,
+    CrawlWatermark,
+    DeadLetter,
+    EventDetail,
+    EventDetailDB,
+    EventItemState,
+    EventURL,
+    ItemStage,
+    ShardStatus,
+    UpcomingEventDB,
+    VenueDB,
+    create_event_partition_ddl,
+    event_partition_bounds,
+)
 from prefect import task
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy import delete, exists, insert, inspect, or_, select, text, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
+from core.sources.merged import batch_source
+from core.transforms.dedup import DEFAULT_TITLE_THRESHOLD, find_duplicate, merge_event
 from core.transforms.protocols import Transformer
+from core.transforms.write_behind import WriteBehindBuffer
 
 # Get database connection string from environment variables
 DATABASE_URL = os.getenv(
@@ -16,17 +46,275 @@ DATABASE_URL = os.getenv(
 )
 ASYNC_DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
 
-# Create SQLModel engine
-async_engine = create_async_engine(ASYNC_DATABASE_URL)
-AsyncSessionLocal = sessionmaker(
-    class_=AsyncSession, expire_on_commit=False, bind=async_engine
-)
+
+@cache
+def get_engine() -> AsyncEngine:
+    """
+    Get the database engine, created on first use rather than on import, so
+    importing the transformers needs neither the database driver nor a database.
+    """
+    return create_async_engine(ASYNC_DATABASE_URL)
+
+
+@cache
+def _session_factory() -> sessionmaker:
+    return sessionmaker(class_=AsyncSession, expire_on_commit=False, bind=get_engine())
+
+
+def AsyncSessionLocal() -> AsyncSession:
+    """Open a session on the database engine."""
+    return _session_factory()()
+
+
+# Months of event_details partitions created ahead of the current one
+EVENT_PARTITION_MONTHS_AHEAD = int(os.getenv("EVENT_PARTITION_MONTHS_AHEAD", "3"))
+
+# Name of the unpartitioned event_details table while it is being migrated
+UNPARTITIONED_EVENT_DETAILS = "event_details_unpartitioned"
+
+# Key of the advisory lock serializing schema upkeep across concurrent flows
+INIT_DB_LOCK_KEY = 0x6576656E74  # "event"
+
+
+def _add_months(month: date, months: int) -> date:
+    """Get the first day of the month `months` after the given one."""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _is_partitioned(conn, table: str) -> bool:
+    return conn.execute(
+        text(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+            "WHERE partrelid = to_regclass(:table))"
+        ),
+        {"table": table},
+    ).scalar()
+
+
+def _event_partitions(conn) -> Dict[date, str]:
+    """Get the monthly partitions of event_details by month."""
+    result = conn.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = 'event_details'::regclass"
+        )
+    )
+    partitions = {}
+    for (name,) in result:
+        try:
+            month = datetime.strptime(name, "event_details_%Y_%m").date()
+        except ValueError:
+            continue  # The default partition
+        partitions[month] = name
+    return partitions
+
+
+def _create_event_partition(conn, month: date) -> None:
+    """
+    Create the partition of event_details for a month.
+
+    Events of that month stored in the default partition while the month had no
+    partition of its own are moved into the new one.
+    """
+    start, end = event_partition_bounds(month)
+    columns = ", ".join(column.name for column in EventDetailDB.__table__.columns)
+    in_month = f"{EVENT_PARTITION_KEY} >= '{start}' AND {EVENT_PARTITION_KEY} < '{end}'"
+
+    stray = conn.execute(
+        text(
+            f"SELECT EXISTS (SELECT 1 FROM {EVENT_DEFAULT_PARTITION} WHERE {in_month})"
+        )
+    ).scalar()
+    if stray:
+        conn.execute(
+            text(
+                f"CREATE TEMP TABLE event_details_moved AS "
+                f"SELECT {columns} FROM {EVENT_DEFAULT_PARTITION} WHERE {in_month}"
+            )
+        )
+        conn.execute(text(f"DELETE FROM {EVENT_DEFAULT_PARTITION} WHERE {in_month}"))
+
+    conn.execute(create_event_partition_ddl(month))
+
+    if stray:
+        conn.execute(
+            text(
+                f"INSERT INTO event_details ({columns}) "
+                f"SELECT {columns} FROM event_details_moved"
+            )
+        )
+        conn.execute(text("DROP TABLE event_details_moved"))
+
+
+def _detach_unpartitioned_event_details(conn) -> None:
+    """
+    Move an unpartitioned event_details table out of the way of the partitioned one.
+
+    Runs before create_all; `_upgrade_schema` then copies the events over.
+    """
+    if conn.dialect.name != "postgresql":
+        return
+    if conn.execute(text("SELECT to_regclass('event_details')")).scalar() is None:
+        return
+    if _is_partitioned(conn, "event_details"):
+        return
+
+    # Free the names the partitioned table's sequence, key and indexes will use
+    conn.execute(
+        text(f"ALTER TABLE event_details RENAME TO {UNPARTITIONED_EVENT_DETAILS}")
+    )
+    conn.execute(
+        text(
+            "ALTER SEQUENCE IF EXISTS event_details_id_seq "
+            f"RENAME TO {UNPARTITIONED_EVENT_DETAILS}_id_seq"
+        )
+    )
+    conn.execute(
+        text(
+            "ALTER INDEX IF EXISTS event_details_pkey "
+            f"RENAME TO {UNPARTITIONED_EVENT_DETAILS}_pkey"
+        )
+    )
+    for index in EventDetailDB.__table__.indexes:
+        conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+    conn.execute(text("DROP INDEX IF EXISTS ix_event_details_search_vector"))
+
+
+def _partition_event_details(conn) -> None:
+    """Copy events from an unpartitioned table and create upcoming partitions."""
+    this_month = date.today().replace(day=1)
+    months = [
+        _add_months(this_month, ahead)
+        for ahead in range(EVENT_PARTITION_MONTHS_AHEAD + 1)
+    ]
+
+    migrating = (
+        conn.execute(
+            text(f"SELECT to_regclass('{UNPARTITIONED_EVENT_DETAILS}')")
+        ).scalar()
+        is not None
+    )
+    if migrating:
+        first, last = conn.execute(
+            text(
+                f"SELECT min({EVENT_PARTITION_KEY}), max({EVENT_PARTITION_KEY}) "
+                f"FROM {UNPARTITIONED_EVENT_DETAILS}"
+            )
+        ).one()
+        if first is not None:
+            month = first.date().replace(day=1)
+            while month <= last.date():
+                months.append(month)
+                month = _add_months(month, 1)
+
+    existing = _event_partitions(conn)
+    for month in sorted(set(months)):
+        if month not in existing:
+            _create_event_partition(conn, month)
+
+    if migrating:
+        # The old table may predate columns added since, or the tag array
+        old_columns = {
+            column["name"]: column["type"]
+            for column in inspect(conn).get_columns(UNPARTITIONED_EVENT_DETAILS)
+        }
+        columns = [
+            column.name
+            for column in EventDetailDB.__table__.columns
+            if column.name in old_columns
+        ]
+        values = [
+            "string_to_array(original_tags, ',')"
+            if name == "original_tags" and not isinstance(old_columns[name], ARRAY)
+            else name
+            for name in columns
+        ]
+        conn.execute(
+            text(
+                f"INSERT INTO event_details ({', '.join(columns)}) "
+                f"SELECT {', '.join(values)} FROM {UNPARTITIONED_EVENT_DETAILS}"
+            )
+        )
+        conn.execute(
+            text(
+                "SELECT setval(pg_get_serial_sequence('event_details', 'id'), "
+                "coalesce(max(id), 0) + 1, false) FROM event_details"
+            )
+        )
+        conn.execute(text(f"DROP TABLE {UNPARTITIONED_EVENT_DETAILS}"))
+
+
+def _upgrade_schema(conn) -> None:
+    """Bring tables created by earlier versions of the models up to date."""
+    if conn.dialect.name == "postgresql":
+        columns = {
+            column["name"]: column
+            for column in inspect(conn).get_columns(EventDetailDB.__tablename__)
+        }
+        if not isinstance(columns["original_tags"]["type"], ARRAY):
+            # Tags used to be stored as a comma-separated string
+            conn.execute(
+                text(
+                    "ALTER TABLE event_details ALTER COLUMN original_tags "
+                    "TYPE varchar[] USING string_to_array(original_tags, ',')"
+                )
+            )
+
+        if "venue_id" not in columns:
+            conn.execute(
+                text(
+                    "ALTER TABLE event_details "
+                    "ADD COLUMN venue_id integer REFERENCES venues (id)"
+                )
+            )
+
+        # Full-text search column and index
+        for ddl in EVENT_SEARCH_DDL:
+            conn.execute(ddl)
+
+        _partition_event_details(conn)
+
+        # Lets fuzzy dedup compare titles in the query, where the server has it
+        if conn.execute(
+            text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        ).scalar():
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+    # create_all skips existing tables, including indexes added to them since
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+    # Fill the upcoming events read model when it was just created
+    if not conn.execute(select(exists(UpcomingEventDB))).scalar():
+        for statement in _upcoming_events_refresh():
+            conn.execute(statement)
 
 
 async def init_db():
-    """Initialize the database by creating all tables."""
-    async with async_engine.begin() as conn:
+    """
+    Initialize the database by creating all tables.
+
+    Flows starting at the same time, e.g. backfill workers, take turns: on
+    PostgreSQL the schema upkeep holds an advisory lock until it commits, so
+    concurrent CREATE TABLE ... PARTITION OF and CREATE INDEX statements do not
+    conflict.
+    """
+    async with get_engine().begin() as conn:
+        if conn.dialect.name == "postgresql":
+            await conn.execute(
+                text("SELECT pg_advisory_xact_lock(:key)"), {"key": INIT_DB_LOCK_KEY}
+            )
+        await conn.run_sync(_detach_unpartitioned_event_details)
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_upgrade_schema)
+
+
+def current_source(default: str = "siegessaeule") -> str:
+    """Get the source of the batch being processed, if tagged by a MergedSource."""
+    return batch_source.get() or default
 
 
 async def get_async_db_session() -> AsyncGenerator[AsyncSession, None]:
@@ -35,23 +323,661 @@ async def get_async_db_session() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+async def notify_events_changed(session: AsyncSession) -> None:
+    """Signal API caches that event_details changed, once the session commits."""
+    if session.bind.dialect.name == "postgresql":
+        await session.execute(text(f"NOTIFY {EVENTS_CHANGED_CHANNEL}"))
+
+
+def _upcoming_events_refresh(event_ids: List[int] | None = None) -> list:
+    """
+    Build the statements syncing the upcoming events read model.
+
+    Args:
+        event_ids: Ids of the event_details rows to sync, or None to sync all
+
+    Returns:
+        Statements to execute in order, in the same transaction
+    """
+    # Events starting today are kept for the rest of the day
+    cutoff = datetime.combine(date.today(), time())
+    columns = [column.name for column in UpcomingEventDB.__table__.columns]
+
+    prune = delete(UpcomingEventDB)
+    changed = select(*(EventDetailDB.__table__.c[name] for name in columns)).where(
+        EventDetailDB.start_time >= cutoff
+    )
+    if event_ids is not None:
+        prune = prune.where(
+            or_(UpcomingEventDB.start_time < cutoff, UpcomingEventDB.id.in_(event_ids))
+        )
+        changed = changed.where(EventDetailDB.id.in_(event_ids))
+
+    return [
+        prune,
+        insert(UpcomingEventDB).from_select(columns, changed),
+    ]
+
+
+async def refresh_upcoming_events(
+    session: AsyncSession, event_ids: List[int] | None = None
+) -> None:
+    """
+    Sync the upcoming events read model with event_details.
+
+    Prunes events that have started and replaces the rows of the given events,
+    so each batch of saved events refreshes the read model incrementally.
+
+    Args:
+        session: Session whose transaction the refresh joins
+        event_ids: Ids of the saved events, or None to rebuild the read model
+    """
+    for statement in _upcoming_events_refresh(event_ids):
+        await session.execute(statement)
+
+
+def content_hash(text: str) -> str:
+    """Hash scraped content so later stages can find the item it belongs to."""
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+async def get_chat_cursor(chat: str) -> int:
+    """Get the id of the last processed message of a chat, 0 if none was."""
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(ChatCursor.last_message_id).where(ChatCursor.chat == chat)
+        )
+        return result.scalar() or 0
+
+
+async def save_chat_cursor(chat: str, last_message_id: int) -> None:
+    """Record the id of the last processed message of a chat."""
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(ChatCursor).where(ChatCursor.chat == chat)
+        )
+        cursor = result.scalars().first()
+        if cursor is None:
+            session.add(ChatCursor(chat=chat, last_message_id=last_message_id))
+        else:
+            cursor.last_message_id = last_message_id
+        await session.commit()
+
+
+async def get_crawl_watermarks(
+    source: str, start_date: date, end_date: date
+) -> Dict[date, CrawlWatermark]:
+    """Get the crawl state of a source's dates in a range, keyed by date."""
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(CrawlWatermark).where(
+                (CrawlWatermark.source == source)
+                & CrawlWatermark.date.between(start_date, end_date)
+            )
+        )
+        return {watermark.date: watermark for watermark in result.scalars()}
+
+
+async def save_crawl_watermark(
+    source: str, crawl_date: date, listing_hash: str, url_count: int
+) -> None:
+    """Record that a source's date was just crawled, and what it listed."""
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(CrawlWatermark).where(
+                (CrawlWatermark.source == source) & (CrawlWatermark.date == crawl_date)
+            )
+        )
+        watermark = result.scalars().first()
+        if watermark is None:
+            watermark = CrawlWatermark(source=source, date=crawl_date)
+            session.add(watermark)
+        watermark.last_crawled_at = datetime.utcnow()
+        watermark.listing_hash = listing_hash
+        watermark.url_count = url_count
+        await session.commit()
+
+
+async def create_backfill_shards(
+    backfill: str,
+    start_date: date,
+    end_date: date,
+    shard_days: int = 7,
+    source: str = "siegessaeule",
+) -> int:
+    """
+    Split a backfill's date range into shards in the work queue.
+
+    Does nothing if the backfill already has shards, so planning it twice does not
+    crawl dates twice.
+
+    Args:
+        backfill: Name of the backfill
+        start_date: First date to backfill (inclusive)
+        end_date: Last date to backfill (inclusive)
+        shard_days: Number of dates per shard
+        source: Source to backfill
+
+    Returns:
+        Number of shards created
+    """
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(exists().where(BackfillShard.backfill == backfill))
+        )
+        if result.scalar():
+            return 0
+
+        shard_start = start_date
+        num_shards = 0
+        while shard_start <= end_date:
+            shard_end = min(shard_start + timedelta(days=shard_days - 1), end_date)
+            session.add(
+                BackfillShard(
+                    backfill=backfill,
+                    source=source,
+                    start_date=shard_start,
+                    end_date=shard_end,
+                )
+            )
+            shard_start = shard_end + timedelta(days=1)
+            num_shards += 1
+
+        await session.commit()
+        return num_shards
+
+
+async def claim_backfill_shard(
+    backfill: str,
+    worker: str,
+    lease: timedelta,
+    max_attempts: int = 3,
+) -> BackfillShard | None:
+    """
+    Lease the next pending shard of a backfill to a worker.
+
+    Shards whose lease expired, e.g. because their worker crashed, are claimed
+    again, or marked failed if they used up their attempts. The row lock is taken
+    with SKIP LOCKED, so concurrent workers each get a different shard without
+    waiting on one another.
+
+    Args:
+        backfill: Name of the backfill
+        worker: Name of the claiming worker
+        lease: How long the shard is leased for unless renewed
+        max_attempts: Number of claims after which a shard is no longer claimed
+
+    Returns:
+        The claimed shard, or None if there is none left to claim
+    """
+    now = datetime.utcnow()
+
+    async with AsyncSessionLocal() as session:
+        # A worker crashing on a shard's last attempt leaves it leased otherwise
+        await session.execute(
+            update(BackfillShard)
+            .where(
+                (BackfillShard.backfill == backfill)
+                & (BackfillShard.status == ShardStatus.LEASED)
+                & (BackfillShard.lease_expires_at < now)
+                & (BackfillShard.attempts >= max_attempts)
+            )
+            .values(
+                status=ShardStatus.FAILED,
+                lease_expires_at=None,
+                error="Lease expired on the last attempt",
+            )
+        )
+        result = await session.execute(
+            select(BackfillShard)
+            .where(
+                (BackfillShard.backfill == backfill)
+                & (BackfillShard.attempts < max_attempts)
+                & (
+                    (BackfillShard.status == ShardStatus.PENDING)
+                    | (
+                        (BackfillShard.status == ShardStatus.LEASED)
+                        & (BackfillShard.lease_expires_at < now)
+                    )
+                )
+            )
+            .order_by(BackfillShard.start_date)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        shard = result.scalars().first()
+        if shard is None:
+            await session.commit()
+            return None
+
+        shard.status = ShardStatus.LEASED
+        shard.worker = worker
+        shard.lease_expires_at = now + lease
+        shard.attempts += 1
+        await session.commit()
+        return shard
+
+
+async def renew_backfill_lease(shard_id: int, worker: str, lease: timedelta) -> bool:
+    """Extend a worker's lease on a shard, returning False if it lost the lease."""
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            update(BackfillShard)
+            .where(
+                (BackfillShard.id == shard_id)
+                & (BackfillShard.worker == worker)
+                & (BackfillShard.status == ShardStatus.LEASED)
+            )
+            .values(lease_expires_at=datetime.utcnow() + lease)
+        )
+        await session.commit()
+        return result.rowcount > 0
+
+
+async def finish_backfill_shard(
+    shard_id: int,
+    worker: str,
+    error: BaseException | None = None,
+    max_attempts: int = 3,
+) -> bool:
+    """
+    Release a worker's lease on a shard once it is done or failed.
+
+    Args:
+        shard_id: Id of the shard
+        worker: Name of the worker holding the lease
+        error: The exception the shard failed with, if it failed
+        max_attempts: Number of attempts after which a failed shard is given up on
+
+    Returns:
+        False if the worker no longer held the lease, e.g. because it expired and
+        another worker claimed the shard
+    """
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(BackfillShard).where(
+                (BackfillShard.id == shard_id)
+                & (BackfillShard.worker == worker)
+                & (BackfillShard.status == ShardStatus.LEASED)
+            )
+        )
+        shard = result.scalars().first()
+        if shard is None:
+            return False
+
+        if error is None:
+            shard.status = ShardStatus.DONE
+            shard.error = None
+        else:
+            shard.status = (
+                ShardStatus.FAILED
+                if shard.attempts >= max_attempts
+                else ShardStatus.PENDING
+            )
+            shard.error = repr(error)
+        shard.lease_expires_at = None
+        await session.commit()
+        return True
+
+
+async def get_venues() -> Dict[str, int]:
+    """Get the ids of all venues, keyed by normalized name."""
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(select(VenueDB.normalized_name, VenueDB.id))
+        return dict(result.all())
+
+
+async def create_venue(name: str, normalized_name: str, address: str | None) -> int:
+    """Create a venue, or get the id of the one created concurrently with the name."""
+    async with AsyncSessionLocal() as session:
+        venue = VenueDB(name=name, normalized_name=normalized_name, address=address)
+        session.add(venue)
+        try:
+            await session.commit()
+            return venue.id
+        except IntegrityError:
+            await session.rollback()
+
+        result = await session.execute(
+            select(VenueDB.id).where(VenueDB.normalized_name == normalized_name)
+        )
+        return result.scalar_one()
+
+
+async def get_item_states(urls: List[str]) -> Dict[str, EventItemState]:
+    """Get the checkpointed state of each known URL, keyed by URL."""
+    if not urls:
+        return {}
+
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(EventItemState).where(EventItemState.url.in_(urls))
+        )
+        return {state.url: state for state in result.scalars()}
+
+
+async def get_item_states_by_hash(hashes: List[str]) -> Dict[str, EventItemState]:
+    """Get the checkpointed state of items by the hash of their scraped content."""
+    if not hashes:
+        return {}
+
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(EventItemState).where(EventItemState.content_hash.in_(hashes))
+        )
+        return {state.content_hash: state for state in result.scalars()}
+
+
+async def update_item_states(
+    updates: Dict[str, Dict[str, Any]],
+    source: str | None = None,
+    create: bool = True,
+) -> None:
+    """
+    Persist stage changes for a batch of items in a single transaction.
+
+    Args:
+        updates: Column values to set, keyed by item URL
+        source: Source recorded for newly created items, by default the source of
+            the batch being processed
+        create: If False, URLs without an existing state are ignored
+    """
+    if not updates:
+        return
+
+    source = source or current_source()
+
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(EventItemState).where(EventItemState.url.in_(list(updates)))
+        )
+        existing = {state.url: state for state in result.scalars()}
+
+        for url, values in updates.items():
+            state = existing.get(url)
+            if state is None:
+                if not create:
+                    continue
+                state = EventItemState(url=url, source=source)
+                session.add(state)
+            for key, value in values.items():
+                setattr(state, key, value)
+            state.updated_at = datetime.utcnow()
+
+        await session.commit()
+
+
+async def record_dead_letters(
+    stage: str,
+    failures: Dict[str, BaseException],
+    urls: Dict[str, str | None] | None = None,
+    source: str | None = None,
+) -> None:
+    """
+    Store failed items so they can be reprocessed later.
+
+    An item that is already dead-lettered for the same stage has its error updated
+    and its attempt count increased instead of being stored twice.
+
+    Args:
+        stage: The stage the items failed to reach
+        failures: The exception raised for each failed item, keyed by stage input
+        urls: The event URL of each failed item, keyed by stage input, if known
+        source: Source of the events, by default the source of the batch being
+            processed
+    """
+    if not failures:
+        return
+
+    source = source or current_source()
+    urls = urls or {}
+    hashes = {item: content_hash(item) for item in failures}
+
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(DeadLetter).where(
+                (DeadLetter.stage == stage)
+                & DeadLetter.input_hash.in_(list(hashes.values()))
+                & DeadLetter.resolved_at.is_(None)
+            )
+        )
+        existing = {letter.input_hash: letter for letter in result.scalars()}
+
+        for item, error in failures.items():
+            letter = existing.get(hashes[item])
+            if letter is None:
+                session.add(
+                    DeadLetter(
+                        stage=stage,
+                        url=urls.get(item),
+                        source=source,
+                        input=item,
+                        input_hash=hashes[item],
+                        error=repr(error),
+                    )
+                )
+            else:
+                letter.error = repr(error)
+                letter.attempts += 1
+                letter.updated_at = datetime.utcnow()
+
+        await session.commit()
+
+
+async def resolve_dead_letters(stage: str, items: List[str]) -> None:
+    """Mark dead-lettered items as resolved once they passed the stage."""
+    if not items:
+        return
+
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            update(DeadLetter)
+            .where(
+                (DeadLetter.stage == stage)
+                & DeadLetter.input_hash.in_([content_hash(item) for item in items])
+                & DeadLetter.resolved_at.is_(None)
+            )
+            .values(resolved_at=datetime.utcnow())
+        )
+        await session.commit()
+
+
+async def get_dead_letters(
+    stage: str, after_id: int = 0, limit: int | None = None
+) -> List[DeadLetter]:
+    """Get unresolved dead letters for a stage in id order, starting after an id."""
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(DeadLetter)
+            .where(
+                (DeadLetter.stage == stage)
+                & (DeadLetter.id > after_id)
+                & DeadLetter.resolved_at.is_(None)
+            )
+            .order_by(DeadLetter.id)
+            .limit(limit)
+        )
+        return list(result.scalars())
+
+
+async def archive_event_partitions(
+    retain_months: int, archive_schema: str | None = "event_archive"
+) -> List[str]:
+    """
+    Detach the monthly event partitions that fall out of the retention period.
+
+    Detaching only touches the catalog, so old events leave event_details without
+    a bulk DELETE and the vacuuming that follows it. Old events in the default
+    partition, stored while their month had no partition, are first moved into a
+    partition of their month to be archived alike; events without a start time
+    stay. Detached partitions are logged in archived_partitions and API caches
+    are notified, as the events' updated_at no longer reflects the change. Like
+    `init_db`, this holds the schema upkeep lock. Does nothing on databases
+    without partitions.
+
+    Args:
+        retain_months: Number of months before the current one to keep
+        archive_schema: Schema to move detached partitions to, or None to drop them
+
+    Returns:
+        Names of the detached partitions
+    """
+    if get_engine().dialect.name != "postgresql":
+        return []
+
+    cutoff = _add_months(date.today().replace(day=1), -retain_months)
+    detached = []
+
+    async with get_engine().begin() as conn:
+        await conn.execute(
+            text("SELECT pg_advisory_xact_lock(:key)"), {"key": INIT_DB_LOCK_KEY}
+        )
+        stray_months = await conn.execute(
+            text(
+                f"SELECT DISTINCT date_trunc('month', {EVENT_PARTITION_KEY}) "
+                f"FROM {EVENT_DEFAULT_PARTITION} WHERE {EVENT_PARTITION_KEY} < :cutoff"
+            ),
+            {"cutoff": datetime.combine(cutoff, time())},
+        )
+        for (month,) in stray_months.all():
+            await conn.run_sync(_create_event_partition, month.date())
+
+        partitions = await conn.run_sync(_event_partitions)
+        if archive_schema:
+            await conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {archive_schema}"))
+
+        for month, name in sorted(partitions.items()):
+            if month >= cutoff:
+                break
+            await conn.execute(
+                text(f"ALTER TABLE event_details DETACH PARTITION {name}")
+            )
+            # The id default still points at the sequence of event_details
+            await conn.execute(text(f"ALTER TABLE {name} ALTER COLUMN id DROP DEFAULT"))
+            if archive_schema:
+                await conn.execute(
+                    text(f"ALTER TABLE {name} SET SCHEMA {archive_schema}")
+                )
+            else:
+                await conn.execute(text(f"DROP TABLE {name}"))
+            detached.append(name)
+
+        if detached:
+            await conn.execute(
+                insert(ArchivedPartition), [{"name": name} for name in detached]
+            )
+            await conn.execute(text(f"NOTIFY {EVENTS_CHANGED_CHANNEL}"))
+
+    return detached
+
+
 class EventURLSaver(Transformer[str, str]):
     """
     Transformer that saves URLs to the database and passes them through.
     Maintains the same retry logic as the original task.
     """
 
-    def __init__(self, source: str = "siegessaeule", return_only_saved: bool = False):
+    def __init__(
+        self,
+        source: str = "siegessaeule",
+        return_only_saved: bool = False,
+        checkpoint: bool = False,
+        resume: bool = False,
+        write_behind: bool = False,
+        flush_size: int = 100,
+        flush_interval: float = 5.0,
+    ):
         """
         Initialize the transformer.
 
         Args:
-            source: Source of the events
+            source: Source recorded for the URLs, unless the batch is tagged with
+                its source by a MergedSource
             return_only_saved: If True, only return URLs newly saved to the database.
                              If False, return all input URLs.
+            checkpoint: If True, record newly discovered URLs in the item state table
+            resume: If True, also return known URLs whose checkpointed state shows
+                they never reached the saved stage
+            write_behind: If True, new URLs are only checked against the database
+                and buffered; they are inserted in the background in transactions
+                of up to flush_size rows, or after flush_interval seconds
+            flush_size: Number of buffered URLs that triggers a write-behind flush
+            flush_interval: Maximum seconds a URL stays in the write-behind buffer
         """
         self.source = source
         self.return_only_saved = return_only_saved
+        self.checkpoint = checkpoint
+        self.resume = resume
+        self.buffer = (
+            WriteBehindBuffer(self._save_buffered_urls, flush_size, flush_interval)
+            if write_behind
+            else None
+        )
+        self._buffered_urls = set()
+
+    async def _save_urls(self, urls: List[str], source: str) -> List[str]:
+        """Insert the URLs not yet in the database and return them."""
+        saved_urls = []
+
+        async with AsyncSessionLocal() as session:
+            for url in urls:
+                # Check if event already exists
+                result = await session.execute(
+                    select(EventURL).where(EventURL.url == url)
+                )
+                existing = result.scalars().first()
+
+                if not existing:
+                    event = EventURL(url=url, source=source)
+                    session.add(event)
+                    saved_urls.append(url)
+
+            # Commit all changes at once
+            await session.commit()
+
+        if self.checkpoint:
+            # With write-behind, later stages may have checkpointed the URL already
+            known_states = await get_item_states(saved_urls)
+            await update_item_states(
+                {
+                    url: {"stage": ItemStage.DISCOVERED}
+                    for url in saved_urls
+                    if url not in known_states
+                },
+                source=source,
+            )
+
+        self._buffered_urls.difference_update(urls)
+
+        return saved_urls
+
+    async def _save_buffered_urls(self, items: List[Tuple[str, str]]) -> None:
+        """Save buffered (URL, source) pairs, one transaction per source."""
+        urls_by_source = defaultdict(list)
+        for url, source in items:
+            urls_by_source[source].append(url)
+        for source, urls in urls_by_source.items():
+            await self._save_urls(urls, source)
+
+    async def _buffer_urls(self, urls: List[str], source: str) -> List[str]:
+        """Buffer the URLs not yet in the database or the buffer and return them."""
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(EventURL.url).where(EventURL.url.in_(urls))
+            )
+            existing = set(result.scalars())
+
+        new_urls = [
+            url
+            for url in dict.fromkeys(urls)
+            if url not in existing and url not in self._buffered_urls
+        ]
+        # Only recorded once buffered, so a batch retried after `add` raised the
+        # error of an earlier write buffers and returns its URLs again
+        await self.buffer.add([(url, source) for url in new_urls])
+        self._buffered_urls.update(new_urls)
+
+        return new_urls
 
     @task(
         name="save_event_urls",
@@ -68,28 +994,32 @@ class EventURLSaver(Transformer[str, str]):
             urls: List of event URLs to save
 
         Returns:
-            If return_only_saved is True: List of URLs that were newly saved
+            If return_only_saved is True: List of URLs that were newly saved, plus
+                unfinished URLs if resume is True
             If return_only_saved is False: All input URLs
         """
-        saved_urls = []
+        source = current_source(self.source)
+        if self.buffer is not None:
+            saved_urls = await self._buffer_urls(urls, source)
+        else:
+            saved_urls = await self._save_urls(urls, source)
 
-        async with AsyncSessionLocal() as session:
-            for url in urls:
-                # Check if event already exists
-                result = await session.execute(
-                    select(EventURL).where(EventURL.url == url)
-                )
-                existing = result.scalars().first()
+        if not self.return_only_saved:
+            return urls
 
-                if not existing:
-                    event = EventURL(url=url, source=self.source)
-                    session.add(event)
-                    saved_urls.append(url)
+        if self.resume:
+            states = await get_item_states(urls)
+            unfinished = {
+                url for url, state in states.items() if state.stage != ItemStage.SAVED
+            }
+            return [url for url in urls if url in unfinished or url in saved_urls]
 
-            # Commit all changes at once
-            await session.commit()
+        return saved_urls
 
-        return saved_urls if self.return_only_saved else urls
+    async def flush(self) -> None:
+        """Write all URLs still in the write-behind buffer."""
+        if self.buffer is not None:
+            await self.buffer.flush()
 
     def __str__(self) -> str:
         return "EventURLSaver"
@@ -101,57 +1031,84 @@ class EventDetailSaver(Transformer[EventDetail, EventDetail]):
     Maintains the same retry logic as the original task.
     """
 
-    def __init__(self, source: str = "siegessaeule", return_only_saved: bool = False):
+    def __init__(
+        self,
+        source: str = "siegessaeule",
+        return_only_saved: bool = False,
+        checkpoint: bool = False,
+        write_behind: bool = False,
+        flush_size: int = 100,
+        flush_interval: float = 5.0,
+        fuzzy_dedup: bool = False,
+        dedup_threshold: float = DEFAULT_TITLE_THRESHOLD,
+    ):
         """
         Initialize the transformer.
 
         Args:
-            source: Source of the events
+            source: Source recorded for the events, unless the batch is tagged with
+                its source by a MergedSource
             return_only_saved: If True, only return newly saved events.
                              If False, return all input events.
+            checkpoint: If True, mark the events' items as saved in the item state
+                table, by the item URL recorded on extraction or else detail_url
+            write_behind: If True, events are buffered and saved in the background
+                in transactions of up to flush_size events, or after
+                flush_interval seconds. Events are passed through before they are
+                saved, so all input events are returned.
+            flush_size: Number of buffered events that triggers a write-behind flush
+            flush_interval: Maximum seconds an event stays in the write-behind buffer
+            fuzzy_dedup: If True, an event starting around the same time at the same
+                venue with a similar title, from any source, is merged into the
+                stored one instead of saved as a new event. If False, only events
+                with the same title and start time are.
+            dedup_threshold: Minimum title similarity (0 to 1) for fuzzy_dedup
         """
         self.source = source
         self.return_only_saved = return_only_saved
+        self.checkpoint = checkpoint
+        self.fuzzy_dedup = fuzzy_dedup
+        self.dedup_threshold = dedup_threshold
+        self.buffer = (
+            WriteBehindBuffer(self._save_buffered_events, flush_size, flush_interval)
+            if write_behind
+            else None
+        )
 
-    @task(
-        name="save_event_details",
-        description="Save valid event details to the database",
-        retries=2,
-        retry_delay_seconds=30,
-    )
-    async def transform(
-        self, events: List[EventDetail], source: str = "siegessaeule"
+    async def _save_events(
+        self, events: List[EventDetail], source: str
     ) -> List[EventDetail]:
-        """
-        Save event details to the database.
-
-        Args:
-            events: List of EventDetail objects to save
-            source: Source of the events
-
-        Returns:
-            List of EventDetail objects that were saved
-        """
+        """Insert new events, update existing ones and return the inserted events."""
         saved_events = []
+        saved_rows = []
 
         async with AsyncSessionLocal() as session:
             for event in events:
                 # Convert EventDetail to EventDetailDB
                 event_db = EventDetailDB.from_event_detail(event, source)
 
-                # Check if event already exists (by title and start_time)
-                result = await session.execute(
-                    select(EventDetailDB).where(
-                        (EventDetailDB.title == event_db.title)
-                        & (EventDetailDB.start_time == event_db.start_time)
+                if self.fuzzy_dedup:
+                    existing = await find_duplicate(
+                        session, event_db, title_threshold=self.dedup_threshold
                     )
-                )
-                existing = result.scalars().first()
+                else:
+                    # Check if event already exists (by title and start_time)
+                    result = await session.execute(
+                        select(EventDetailDB).where(
+                            (EventDetailDB.title == event_db.title)
+                            & (EventDetailDB.start_time == event_db.start_time)
+                        )
+                    )
+                    existing = result.scalars().first()
 
                 if not existing:
                     # Save new event
                     session.add(event_db)
                     saved_events.append(event)
+                    saved_rows.append(event_db)
+                elif self.fuzzy_dedup:
+                    merge_event(existing, event_db)
+                    saved_rows.append(existing)
                 else:
                     # Update existing event with new data
                     existing.summary = event_db.summary
@@ -164,12 +1121,76 @@ class EventDetailSaver(Transformer[EventDetail, EventDetail]):
                     existing.attendees = event_db.attendees
                     existing.price = event_db.price
                     existing.original_tags = event_db.original_tags
+                    existing.venue_id = event_db.venue_id
                     existing.updated_at = datetime.utcnow()
+                    saved_rows.append(existing)
+
+            if events:
+                # Assigns ids to the new events
+                await session.flush()
+                await refresh_upcoming_events(session, [row.id for row in saved_rows])
+                await notify_events_changed(session)
 
             # Commit all changes at once
             await session.commit()
 
+        if self.checkpoint:
+            await update_item_states(
+                {
+                    event.item_url or str(event.detail_url): {
+                        "stage": ItemStage.SAVED,
+                        "error": None,
+                    }
+                    for event in events
+                },
+                create=False,
+            )
+
+        return saved_events
+
+    async def _save_buffered_events(self, items: List[Tuple[EventDetail, str]]) -> None:
+        events_by_source = defaultdict(list)
+        for event, source in items:
+            events_by_source[source].append(event)
+
+        num_saved = 0
+        for source, events in events_by_source.items():
+            num_saved += len(await self._save_events(events, source))
+        logfire.info(
+            "Write-behind flush saved {num_saved} new of {num_events} events",
+            num_saved=num_saved,
+            num_events=len(items),
+        )
+
+    @task(
+        name="save_event_details",
+        description="Save valid event details to the database",
+        retries=2,
+        retry_delay_seconds=30,
+    )
+    async def transform(self, events: List[EventDetail]) -> List[EventDetail]:
+        """
+        Save event details to the database.
+
+        Args:
+            events: List of EventDetail objects to save
+
+        Returns:
+            List of EventDetail objects that were saved
+        """
+        source = current_source(self.source)
+        if self.buffer is not None:
+            await self.buffer.add([(event, source) for event in events])
+            return events
+
+        saved_events = await self._save_events(events, source)
+
         return saved_events if self.return_only_saved else events
 
+    async def flush(self) -> None:
+        """Save all events still in the write-behind buffer."""
+        if self.buffer is not None:
+            await self.buffer.flush()
+
     def __str__(self) -> str:
         return "EventDetailSaver"
@@ -0,0 +1,191 @@
+import re
+from datetime import datetime, timedelta
+from typing import Set
+
+from event_gulper_models import EventDetailDB
+from sqlalchemy import func, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Minimum title similarity for two events in the same block to be merged
+DEFAULT_TITLE_THRESHOLD = 0.6
+# Minimum title similarity when nothing but the title ties two events to a venue,
+# because the location of either is unknown
+DEFAULT_UNKNOWN_VENUE_TITLE_THRESHOLD = 0.85
+# Minimum location similarity for two events to be at the same venue
+DEFAULT_VENUE_THRESHOLD = 0.5
+# Maximum difference between the start times of duplicates
+DEFAULT_TIME_WINDOW = timedelta(hours=1)
+
+# Fields copied from a duplicate into the event it is merged into
+MERGED_FIELDS = (
+    "summary",
+    "description",
+    "location",
+    "end_time",
+    "organizer",
+    "source_url",
+    "image_url",
+    "attendees",
+    "price",
+    "venue_id",
+)
+
+# pg_trgm's words: runs of letters and digits, so unlike \w without underscores
+_WORD = re.compile(r"[^\W_]+")
+
+
+def trigrams(text: str | None) -> Set[str]:
+    """
+    Get the trigrams of a text the way PostgreSQL's pg_trgm does.
+
+    Each lowercased word is padded with two spaces in front and one behind, so
+    short words and word starts weigh more than word endings.
+    """
+    result = set()
+    for word in _WORD.findall((text or "").lower()):
+        padded = f"  {word} "
+        result.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+def similarity(a: str | None, b: str | None) -> float:
+    """Get the share of trigrams two texts have in common, from 0 to 1."""
+    trigrams_a, trigrams_b = trigrams(a), trigrams(b)
+    if not trigrams_a or not trigrams_b:
+        return 0.0
+    return len(trigrams_a & trigrams_b) / len(trigrams_a | trigrams_b)
+
+
+def same_venue(
+    a: str | None, b: str | None, threshold: float = DEFAULT_VENUE_THRESHOLD
+) -> bool:
+    """
+    Check whether two locations can be the same venue.
+
+    Both locations must be known, and similar or one must contain the other, as
+    in "SO36" and "SO36, Oranienstr. 190".
+    """
+    if not a or not b:
+        return False
+
+    words_a, words_b = _WORD.findall(a.lower()), _WORD.findall(b.lower())
+    shorter, longer = sorted((words_a, words_b), key=len)
+    if shorter and longer[: len(shorter)] == shorter:
+        return True
+    return similarity(a, b) >= threshold
+
+
+async def _has_trigram_similarity(session: AsyncSession) -> bool:
+    """Check whether the database has pg_trgm's similarity(), once per session."""
+    if "pg_trgm" not in session.info:
+        session.info["pg_trgm"] = session.bind.dialect.name == "postgresql" and bool(
+            await session.scalar(
+                text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            )
+        )
+    return session.info["pg_trgm"]
+
+
+async def find_duplicate(
+    session: AsyncSession,
+    event: EventDetailDB,
+    title_threshold: float = DEFAULT_TITLE_THRESHOLD,
+    venue_threshold: float = DEFAULT_VENUE_THRESHOLD,
+    window: timedelta = DEFAULT_TIME_WINDOW,
+    unknown_venue_title_threshold: float = DEFAULT_UNKNOWN_VENUE_TITLE_THRESHOLD,
+) -> EventDetailDB | None:
+    """
+    Find a stored event that is the same as the given one.
+
+    Candidates are blocked by start time with the start_time index, so only
+    events within `window` are compared, never the whole table. Events at
+    another venue id are filtered out in the query, and so are dissimilar titles
+    on PostgreSQL with pg_trgm installed. The window scan is the intended plan:
+    a block of an hour or two is far more selective than a trigram index on
+    title could be, so title similarity is only computed for the events in it,
+    to return fewer of them. Of the remaining candidates at the
+    same venue, the one with the most similar title above the threshold is the
+    duplicate; events normalized to venues are at the same venue if they have
+    the same venue id. If either location is unknown, the titles must be at
+    least `unknown_venue_title_threshold` similar. Events without a start time
+    only match on their exact title.
+
+    Args:
+        session: Session to query, its pending events included
+        event: Event about to be saved
+        title_threshold: Minimum title similarity for a duplicate
+        venue_threshold: Minimum location similarity for the same venue
+        window: Maximum difference between the start times of duplicates
+        unknown_venue_title_threshold: Minimum title similarity for a duplicate
+            when the location of either event is unknown
+
+    Returns:
+        The stored duplicate, or None
+    """
+    if event.start_time is None:
+        result = await session.execute(
+            select(EventDetailDB).where(
+                (EventDetailDB.title == event.title)
+                & EventDetailDB.start_time.is_(None)
+            )
+        )
+        return result.scalars().first()
+
+    query = select(EventDetailDB).where(
+        EventDetailDB.start_time.between(
+            event.start_time - window, event.start_time + window
+        )
+    )
+    if event.venue_id:
+        query = query.where(
+            EventDetailDB.venue_id.is_(None)
+            | (EventDetailDB.venue_id == event.venue_id)
+        )
+    if await _has_trigram_similarity(session):
+        query = query.where(
+            or_(
+                EventDetailDB.title == event.title,
+                func.similarity(EventDetailDB.title, event.title) >= title_threshold,
+            )
+        )
+    result = await session.execute(query)
+
+    duplicate, best_score = None, title_threshold
+    for candidate in result.scalars():
+        if candidate.title == event.title and candidate.start_time == event.start_time:
+            return candidate
+        threshold = title_threshold
+        if candidate.venue_id and event.venue_id:
+            if candidate.venue_id != event.venue_id:
+                continue
+        elif not candidate.location or not event.location:
+            # Nothing but the title ties the events to the same venue
+            threshold = unknown_venue_title_threshold
+        elif not same_venue(candidate.location, event.location, venue_threshold):
+            continue
+        score = similarity(candidate.title, event.title)
+        if score >= threshold and score >= best_score:
+            duplicate, best_score = candidate, score
+
+    return duplicate
+
+
+def merge_event(existing: EventDetailDB, duplicate: EventDetailDB) -> None:
+    """
+    Merge a newly found duplicate into the stored event.
+
+    Known values of the duplicate replace stored ones, missing values do not erase
+    them, and tags are combined. The stored title, start time and source are kept.
+    """
+    for field in MERGED_FIELDS:
+        value = getattr(duplicate, field)
+        if value is not None:
+            setattr(existing, field, value)
+
+    if duplicate.original_tags:
+        tags = list(existing.original_tags or [])
+        existing.original_tags = tags + [
+            tag for tag in duplicate.original_tags if tag not in tags
+        ]
+
+    existing.updated_at = datetime.utcnow()
@@ -1,23 +1,54 @@
-import asyncio
 import hashlib
 import json
-from typing import List
+import time
+from dataclasses import dataclass
+from functools import partial
+from typing import TYPE_CHECKING, Dict, List, Sequence
 
-import instructor
-from event_gulper_models import EventDetail
+import logfire
+from event_gulper_models import (
+    EventDetail,
+    EventItemState,
+    ItemStage,
+    validate_events_json,
+)
 from prefect.tasks import task
+from pydantic import ValidationError
 
+from core.engine import PartialBatchError, gather_with_retries, run_task
+from core.transforms.database import (
+    content_hash,
+    get_item_states_by_hash,
+    record_dead_letters,
+    resolve_dead_letters,
+    update_item_states,
+)
 from core.transforms.protocols import Transformer
 
+if TYPE_CHECKING:
+    # Imported lazily by the flows, as loading the OpenAI client types is slow
+    import instructor
+
+DEFAULT_MODEL = "gpt-4o-mini"
+DEFAULT_MODEL_CASCADE = [DEFAULT_MODEL, "gpt-4o"]
+
+# Retries of an item whose extraction failed with a transient error on the last
+# model, within its batch
+EXTRACT_RETRIES = 2
+EXTRACT_RETRY_DELAY_SECONDS = 30
+
 
 async def md_to_event_structure(
-    llm_client: instructor.AsyncInstructor, event_md: str
+    llm_client: "instructor.AsyncInstructor",
+    event_md: str,
+    model: str = DEFAULT_MODEL,
 ) -> EventDetail:
     """
     Extract structured event data from markdown content using the Instructor LLM.
 
     Args:
         event_md (str): Scraped event content in markdown format.
+        model (str): Name of the model to use for the extraction.
 
     Returns:
         EventDetail: Structured event data.
@@ -31,7 +62,7 @@ async def md_to_event_structure(
 
     # Get the structured output as a string.
     extracted_event = await llm_client.chat.completions.create(
-        model="gpt-4o-mini",
+        model=model,
         response_model=EventDetail,
         messages=[{"role": "user", "content": prompt}],
     )
@@ -39,9 +70,159 @@ async def md_to_event_structure(
     return extracted_event
 
 
+def validate_event_detail(
+    event: EventDetail, expected_url: str | None = None
+) -> List[str]:
+    """
+    Check an extracted event for problems that warrant a retry with a stronger model.
+
+    Args:
+        event: The extracted event
+        expected_url: The detail page URL the event was scraped from, if known
+
+    Returns:
+        List of problem descriptions, empty if the event looks complete
+    """
+    problems = []
+
+    if not event.title.strip():
+        problems.append("missing title")
+    if not event.summary.strip():
+        problems.append("missing summary")
+    if event.start_time is None:
+        problems.append("missing start_time")
+    elif event.end_time is not None and event.end_time < event.start_time:
+        problems.append("end_time before start_time")
+    if expected_url is not None and (
+        str(event.detail_url).rstrip("/") != expected_url.rstrip("/")
+    ):
+        problems.append(f"detail_url {event.detail_url} does not match input")
+
+    return problems
+
+
+@dataclass
+class ModelStats:
+    """Running latency and hit-rate statistics for one model in a cascade."""
+
+    calls: int = 0
+    accepted: int = 0
+    errors: int = 0
+    total_latency: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of calls whose output was accepted."""
+        return self.accepted / self.calls if self.calls else 0.0
+
+    @property
+    def avg_latency(self) -> float:
+        """Mean latency per call in seconds."""
+        return self.total_latency / self.calls if self.calls else 0.0
+
+
+class ModelCascade:
+    """
+    Routes extractions through a list of models, cheapest first.
+
+    Each item is sent to the first model. Only if the call fails or its output
+    does not pass `validate_event_detail` is the item escalated to the next model.
+    The output of the last model is returned even if it fails validation.
+    """
+
+    def __init__(
+        self,
+        llm_client: "instructor.AsyncInstructor",
+        models: Sequence[str] | None = None,
+    ):
+        """
+        Initialize the cascade.
+
+        Args:
+            llm_client: Instructor-enhanced OpenAI client
+            models: Model names ordered from cheapest/fastest to strongest
+        """
+        self.llm_client = llm_client
+        self.models = list(models or DEFAULT_MODEL_CASCADE)
+        if not self.models:
+            raise ValueError("ModelCascade needs at least one model")
+        self.stats = {model: ModelStats() for model in self.models}
+
+    async def extract(
+        self, event_md: str, expected_url: str | None = None
+    ) -> EventDetail:
+        """
+        Extract an event, escalating to stronger models until the output validates.
+
+        Args:
+            event_md: Scraped event content in markdown format
+            expected_url: The detail page URL the markdown was scraped from, if known
+
+        Returns:
+            The first validated EventDetail, or the last model's output
+        """
+        last_index = len(self.models) - 1
+
+        for index, model in enumerate(self.models):
+            stats = self.stats[model]
+            stats.calls += 1
+            start = time.perf_counter()
+            try:
+                event = await md_to_event_structure(self.llm_client, event_md, model)
+            except Exception:
+                stats.errors += 1
+                if index == last_index:
+                    raise
+                continue
+            finally:
+                stats.total_latency += time.perf_counter() - start
+
+            problems = validate_event_detail(event, expected_url)
+            if not problems:
+                stats.accepted += 1
+                return event
+
+            if index == last_index:
+                logfire.warn(
+                    "{model} output failed validation: {problems}",
+                    model=model,
+                    problems=problems,
+                )
+                return event
+
+            logfire.info(
+                "Escalating from {model}: {problems}",
+                model=model,
+                problems=problems,
+            )
+
+    def log_stats(self) -> None:
+        """Log per-model latency and hit-rate statistics."""
+        for model, stats in self.stats.items():
+            logfire.info(
+                "{model}: {calls} calls, {hit_rate:.0%} accepted, "
+                "{avg_latency:.2f}s avg latency",
+                model=model,
+                calls=stats.calls,
+                accepted=stats.accepted,
+                errors=stats.errors,
+                hit_rate=stats.hit_rate,
+                avg_latency=stats.avg_latency,
+            )
+
+
 def exclude_client_cache_key(context, parameters) -> str:
-    """Generate string cache key excluding non-serializable client"""
-    cacheable_params = {k: v for k, v in parameters.items() if k != "llm_client"}
+    """
+    Generate string cache key excluding non-serializable clients.
+
+    A cascade is keyed by its models in order, so extractions cached with other
+    models are not reused once the cascade changes.
+    """
+    cacheable_params = {
+        k: v for k, v in parameters.items() if k not in ("llm_client", "cascade")
+    }
+    if "cascade" in parameters:
+        cacheable_params["cascade_models"] = parameters["cascade"].models
 
     # Create stable string representation
     param_str = json.dumps(cacheable_params, sort_keys=True)
@@ -52,26 +233,73 @@ def exclude_client_cache_key(context, parameters) -> str:
 
 @task(
     name="md_to_event_structure_batch",
-    retries=2,
-    retry_delay_seconds=30,
     cache_key_fn=exclude_client_cache_key,
 )
 async def md_to_event_structure_batch(
-    llm_client: instructor.AsyncInstructor, events_md_batch: List[str]
-) -> List[EventDetail]:
+    cascade: ModelCascade,
+    events_md_batch: List[str],
+    expected_urls: List[str | None] | None = None,
+) -> List[EventDetail | Exception]:
+    """
+    Extract structured event data from a batch of markdown content using a
+    cascade of Instructor LLMs.
+
+    Results are aligned with the input. Each item failing with a transient error
+    is retried on its own; if some items fail, a `PartialBatchError` is raised
+    with the raised exception in their place in the results, so the failures are
+    not cached.
+    """
+    expected_urls = expected_urls or [None] * len(events_md_batch)
+    try:
+        return await gather_with_retries(
+            [
+                partial(cascade.extract, event_md, expected_url)
+                for event_md, expected_url in zip(
+                    events_md_batch, expected_urls, strict=True
+                )
+            ],
+            EXTRACT_RETRIES,
+            EXTRACT_RETRY_DELAY_SECONDS,
+        )
+    finally:
+        cascade.log_stats()
+
+
+def _checkpointed_events(states: List[EventItemState]) -> Dict[str, EventDetail]:
     """
-    Extract structured event data from a batch of markdown content using the
-    Instructor LLM.
+    Get the events checkpointed for items, keyed by content hash.
+
+    The events are validated as one JSON array rather than event by event. If any
+    is invalid, e.g. because it was stored before the event model changed, they
+    are validated one by one instead and the invalid ones are left out, so their
+    items are extracted again.
     """
-    llm_tasks = [
-        md_to_event_structure(llm_client, event_md) for event_md in events_md_batch
-    ]
-    batch_results = await asyncio.gather(*llm_tasks, return_exceptions=True)
-    structured_events = [
-        result for result in batch_results if not isinstance(result, Exception)
-    ]
+    try:
+        events = validate_events_json(
+            "[" + ",".join(state.event_json for state in states) + "]"
+        )
+    except ValidationError:
+        pass
+    else:
+        return {
+            state.content_hash: event
+            for state, event in zip(states, events, strict=True)
+        }
 
-    return structured_events
+    events_by_hash = {}
+    for state in states:
+        try:
+            events_by_hash[state.content_hash] = EventDetail.model_validate_json(
+                state.event_json
+            )
+        except ValidationError as error:
+            logfire.warn(
+                "Checkpointed event of {url} is invalid, extracting it again: "
+                "{error!r}",
+                url=state.url,
+                error=error,
+            )
+    return events_by_hash
 
 
 class MdToEventTransformer(Transformer[str, EventDetail]):
@@ -79,26 +307,128 @@ class MdToEventTransformer(Transformer[str, EventDetail]):
     Transformer that uses an LLM to extract structured event details from markdown.
     """
 
-    def __init__(self, llm_client: instructor.AsyncInstructor):
+    def __init__(
+        self,
+        llm_client: "instructor.AsyncInstructor",
+        models: Sequence[str] | None = None,
+        checkpoint: bool = False,
+        dead_letter: bool = False,
+    ):
         """
         Initialize the transformer with an LLM client.
 
         Args:
             llm_client: Instructor-enhanced OpenAI client
+            models: Model names to try in order, cheapest first. Items are only
+                escalated to the next model if the previous output fails
+                validation.
+            checkpoint: If True, reuse events extracted by an earlier run and
+                checkpoint new extractions (or failures) in the item state table
+            dead_letter: If True, store markdown that could not be extracted in the
+                dead-letter table and resolve it once extraction succeeds
         """
         self.llm_client = llm_client
+        self.cascade = ModelCascade(llm_client, models)
+        self.checkpoint = checkpoint
+        self.dead_letter = dead_letter
 
     async def transform(self, events_md_batch: List[str]) -> List[EventDetail]:
         """
         Transform markdown descriptions into structured event details.
 
         Args:
-            events_md_batch: List of markdown strings describing events
+            events_md_batch: List of markdown strings describing events; pages
+                scraped by ScrapeURLAsMarkdown carry the URL they came from
 
         Returns:
             List of structured EventDetail objects
         """
-        return await md_to_event_structure_batch(self.llm_client, events_md_batch)
+        hashes = [content_hash(event_md) for event_md in events_md_batch]
+        # URL of each item, to check extracted detail_urls against
+        item_urls = {
+            hash_: event_md.url
+            for event_md, hash_ in zip(events_md_batch, hashes, strict=True)
+            if getattr(event_md, "url", None)
+        }
+        states = {}
+        events_by_hash = {}
+        if self.checkpoint:
+            states = await get_item_states_by_hash(hashes)
+            item_urls.update({hash_: state.url for hash_, state in states.items()})
+            events_by_hash = _checkpointed_events(
+                [state for state in states.values() if state.event_json]
+            )
+
+        pending = {
+            hash_: event_md
+            for event_md, hash_ in zip(events_md_batch, hashes, strict=True)
+            if hash_ not in events_by_hash
+        }
+        if pending:
+            try:
+                results = await run_task(
+                    md_to_event_structure_batch,
+                    self.cascade,
+                    list(pending.values()),
+                    [item_urls.get(hash_) for hash_ in pending],
+                )
+            except PartialBatchError as error:
+                results = error.results
+            extracted = {}
+            failed = {}
+            for hash_, result in zip(pending, results, strict=True):
+                if isinstance(result, EventDetail):
+                    extracted[hash_] = result
+                else:
+                    failed[hash_] = result
+                    logfire.warn(
+                        "Failed to extract event from {url}: {error!r}",
+                        url=item_urls.get(hash_),
+                        error=result,
+                    )
+            events_by_hash.update(extracted)
+
+            if self.checkpoint:
+                updates = {
+                    item_urls[hash_]: {
+                        "stage": ItemStage.EXTRACTED,
+                        "event_json": event.model_dump_json(),
+                        "error": None,
+                    }
+                    for hash_, event in extracted.items()
+                    if hash_ in item_urls
+                }
+                updates.update(
+                    {
+                        item_urls[hash_]: {
+                            "stage": ItemStage.FAILED,
+                            "error": repr(error),
+                        }
+                        for hash_, error in failed.items()
+                        if hash_ in item_urls
+                    }
+                )
+                await update_item_states(updates, create=False)
+
+            if self.dead_letter:
+                await record_dead_letters(
+                    ItemStage.EXTRACTED,
+                    {pending[hash_]: error for hash_, error in failed.items()},
+                    urls={pending[hash_]: item_urls.get(hash_) for hash_ in failed},
+                )
+                await resolve_dead_letters(
+                    ItemStage.EXTRACTED, [pending[hash_] for hash_ in extracted]
+                )
+
+        # Keep the item URL, so later stages checkpoint the same item even if the
+        # extracted detail_url is spelled differently
+        return [
+            events_by_hash[hash_].model_copy(update={"item_url": item_urls[hash_]})
+            if hash_ in item_urls
+            else events_by_hash[hash_]
+            for hash_ in hashes
+            if hash_ in events_by_hash
+        ]
 
     def __str__(self) -> str:
         return "MdToEventTransformer"
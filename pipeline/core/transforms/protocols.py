@@ -25,6 +25,14 @@ class Transformer(Protocol, Generic[TransformerInput, TransformerOutput]):
         """
         ...
 
+    async def flush(self) -> None:
+        """
+        Finish any work the transformer deferred, e.g. buffered writes.
+
+        Called once after the pipeline has processed its last batch.
+        """
+        return None
+
     def __str__(self) -> str:
         """Return a human-readable description of the transformer."""
         return self.__class__.__name__
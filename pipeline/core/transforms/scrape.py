@@ -1,15 +1,40 @@
-import asyncio
 import hashlib
 import json
+from functools import partial
 from typing import List
 
-from bs4 import BeautifulSoup
+import logfire
+from event_gulper_models import ItemStage
 from httpx import AsyncClient
-from markdownify import markdownify
 from prefect.tasks import task
 
+from core.engine import PartialBatchError, gather_with_retries, run_task
+from core.transforms.database import (
+    content_hash,
+    get_item_states,
+    record_dead_letters,
+    resolve_dead_letters,
+    update_item_states,
+)
 from core.transforms.protocols import Transformer
 
+# Retries of a URL whose scrape failed with a transient error, within its batch
+SCRAPE_RETRIES = 2
+SCRAPE_RETRY_DELAY_SECONDS = 30
+
+
+class ScrapeError(Exception):
+    """Raised when a scraped page does not contain the expected content."""
+
+
+class ScrapedMarkdown(str):
+    """Markdown of a scraped page, tagged with the URL it was scraped from."""
+
+    def __new__(cls, markdown: str, url: str):
+        page = super().__new__(cls, markdown)
+        page.url = url
+        return page
+
 
 def _exclude_client_cache_key(context, parameters) -> str:
     """Generate string cache key excluding non-serializable client"""
@@ -32,8 +57,15 @@ async def _scrape_single_url_to_md(
         section_selector: CSS selector to find the main section
 
     Returns:
-        Markdown string of the content, or error message if section not found
+        Markdown string of the content
+
+    Raises:
+        ScrapeError: If no element matches the section selector
     """
+    # Imported on first use to keep worker startup fast
+    from bs4 import BeautifulSoup
+    from markdownify import markdownify
+
     response = await http_client.get(url)
     response.raise_for_status()
 
@@ -41,7 +73,9 @@ async def _scrape_single_url_to_md(
     main_section = soup.select_one(section_selector)
 
     if not main_section:
-        return f"Error: Could not find section matching selector: {section_selector}"
+        raise ScrapeError(
+            f"Could not find section matching selector: {section_selector}"
+        )
 
     section_html = str(main_section)
     section_md = markdownify(section_html, heading_style="ATX", bullets="-")
@@ -51,13 +85,11 @@ async def _scrape_single_url_to_md(
 
 @task(
     name="scrape_urls_as_markdown",
-    retries=2,
-    retry_delay_seconds=30,
     cache_key_fn=_exclude_client_cache_key,
 )
 async def _scrape_urls_as_markdown(
     http_client: AsyncClient, urls: List[str], section_selector: str = "main"
-) -> List[str]:
+) -> List[str | Exception]:
     """
     Scrape a batch of URLs and convert their content to markdown.
 
@@ -66,13 +98,24 @@ async def _scrape_urls_as_markdown(
         urls: List of URLs to scrape
         section_selector: CSS selector to find the main section
 
+    Each URL failing with a transient error, e.g. a timeout or server error, is
+    retried on its own, so a failing URL does not repeat the others.
+
     Returns:
-        List of markdown strings, one for each input URL
+        List with the markdown string for each input URL
+
+    Raises:
+        PartialBatchError: If some URLs could not be scraped, with the raised
+            exception in their place in the results
     """
-    scrape_to_markdown_tasks = [
-        _scrape_single_url_to_md(http_client, url, section_selector) for url in urls
-    ]
-    return await asyncio.gather(*scrape_to_markdown_tasks)
+    return await gather_with_retries(
+        [
+            partial(_scrape_single_url_to_md, http_client, url, section_selector)
+            for url in urls
+        ],
+        SCRAPE_RETRIES,
+        SCRAPE_RETRY_DELAY_SECONDS,
+    )
 
 
 class ScrapeURLAsMarkdown(Transformer[str, str]):
@@ -85,16 +128,28 @@ class ScrapeURLAsMarkdown(Transformer[str, str]):
     3. Converts the HTML to markdown
     """
 
-    def __init__(self, http_client: AsyncClient, section_selector: str = "main"):
+    def __init__(
+        self,
+        http_client: AsyncClient,
+        section_selector: str = "main",
+        checkpoint: bool = False,
+        dead_letter: bool = False,
+    ):
         """
         Initialize the scraper.
 
         Args:
             http_client: AsyncClient for making HTTP requests
             section_selector: CSS selector to find the main section
+            checkpoint: If True, reuse markdown checkpointed by an earlier run and
+                checkpoint newly scraped markdown in the item state table
+            dead_letter: If True, store URLs that could not be scraped in the
+                dead-letter table and resolve them once they scrape successfully
         """
         self.http_client = http_client
         self.section_selector = section_selector
+        self.checkpoint = checkpoint
+        self.dead_letter = dead_letter
 
     async def transform(self, urls: List[str]) -> List[str]:
         """
@@ -104,13 +159,67 @@ class ScrapeURLAsMarkdown(Transformer[str, str]):
             urls: List of URLs to scrape
 
         Returns:
-            List of markdown strings, one for each input URL
+            List of markdown strings for the URLs that could be scraped, in input
+            order, tagged with their URL. URLs that failed are dropped.
         """
-        return await _scrape_urls_as_markdown(
-            self.http_client,
-            urls,
-            self.section_selector,
-        )
+        markdown_by_url = {}
+        if self.checkpoint:
+            states = await get_item_states(urls)
+            markdown_by_url = {
+                url: state.markdown for url, state in states.items() if state.markdown
+            }
+
+        urls_to_scrape = [url for url in urls if url not in markdown_by_url]
+        if urls_to_scrape:
+            try:
+                results = await run_task(
+                    _scrape_urls_as_markdown,
+                    self.http_client,
+                    urls_to_scrape,
+                    self.section_selector,
+                )
+            except PartialBatchError as error:
+                results = error.results
+            scraped = {}
+            failed = {}
+            for url, result in zip(urls_to_scrape, results, strict=True):
+                if isinstance(result, Exception):
+                    failed[url] = result
+                    logfire.warn(
+                        "Failed to scrape {url}: {error!r}", url=url, error=result
+                    )
+                else:
+                    scraped[url] = result
+            markdown_by_url.update(scraped)
+
+            if self.checkpoint:
+                updates = {
+                    url: {
+                        "stage": ItemStage.SCRAPED,
+                        "markdown": markdown,
+                        "content_hash": content_hash(markdown),
+                    }
+                    for url, markdown in scraped.items()
+                }
+                updates.update(
+                    {
+                        url: {"stage": ItemStage.FAILED, "error": repr(error)}
+                        for url, error in failed.items()
+                    }
+                )
+                await update_item_states(updates)
+
+            if self.dead_letter:
+                await record_dead_letters(
+                    ItemStage.SCRAPED, failed, urls={url: url for url in failed}
+                )
+                await resolve_dead_letters(ItemStage.SCRAPED, list(scraped))
+
+        return [
+            ScrapedMarkdown(markdown_by_url[url], url)
+            for url in urls
+            if url in markdown_by_url
+        ]
 
     def __str__(self) -> str:
         return "ScrapeURLAsMarkdown"
@@ -0,0 +1,106 @@
+import re
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+from event_gulper_models import EventDetail
+
+from core.transforms.database import create_venue, get_venues
+from core.transforms.dedup import similarity
+from core.transforms.protocols import Transformer
+
+# Minimum similarity of a location's name to a known venue's to be that venue
+DEFAULT_VENUE_MATCH_THRESHOLD = 0.6
+# Number of distinct location strings whose venue is remembered
+DEFAULT_VENUE_CACHE_SIZE = 1024
+
+_WORD = re.compile(r"\w+")
+
+
+def split_location(location: str) -> Tuple[str, str | None]:
+    """Split a location like "SO36, Oranienstr. 190" into venue name and address."""
+    name, _, address = location.partition(",")
+    return name.strip(), address.strip() or None
+
+
+def normalize_venue_name(name: str) -> str:
+    """Normalize a venue name for matching, e.g. "Schwuz!" to "schwuz"."""
+    return " ".join(_WORD.findall(name.lower()))
+
+
+class VenueNormalizer(Transformer[EventDetail, EventDetail]):
+    """
+    Transformer that maps the free-text locations of events to venue ids.
+
+    A location's name is matched to the known venue with the most similar name,
+    or becomes a new venue if none is similar enough. Venues are loaded once and
+    the venue of each location string is kept in an LRU cache, so the same
+    location is only matched once per run.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_VENUE_MATCH_THRESHOLD,
+        cache_size: int = DEFAULT_VENUE_CACHE_SIZE,
+    ):
+        """
+        Initialize the transformer.
+
+        Args:
+            threshold: Minimum name similarity (0 to 1) to match a known venue
+            cache_size: Number of location strings whose venue id is cached
+        """
+        self.threshold = threshold
+        self.cache_size = cache_size
+        self.cache: OrderedDict[str, int | None] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._venues: Dict[str, int] | None = None
+
+    async def _match(self, location: str) -> int | None:
+        """Find or create the venue of a location."""
+        name, address = split_location(location)
+        normalized_name = normalize_venue_name(name)
+        if not normalized_name:
+            return None
+
+        if self._venues is None:
+            self._venues = await get_venues()
+
+        if normalized_name in self._venues:
+            return self._venues[normalized_name]
+
+        best_id, best_score = None, self.threshold
+        for known_name, venue_id in self._venues.items():
+            score = similarity(normalized_name, known_name)
+            if score >= best_score:
+                best_id, best_score = venue_id, score
+        if best_id is not None:
+            return best_id
+
+        venue_id = await create_venue(name, normalized_name, address)
+        self._venues[normalized_name] = venue_id
+        return venue_id
+
+    async def venue_id(self, location: str | None) -> int | None:
+        """Get the id of the venue of a location, or None without a location."""
+        if not location:
+            return None
+
+        if location in self.cache:
+            self.hits += 1
+            self.cache.move_to_end(location)
+            return self.cache[location]
+
+        self.misses += 1
+        venue_id = await self._match(location)
+        self.cache[location] = venue_id
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return venue_id
+
+    async def transform(self, events: List[EventDetail]) -> List[EventDetail]:
+        """Set the venue id of each event from its location."""
+        return [
+            event.model_copy(update={"venue_id": await self.venue_id(event.location)})
+            for event in events
+        ]
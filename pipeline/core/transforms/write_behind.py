@@ -0,0 +1,120 @@
+import asyncio
+from typing import Awaitable, Callable, Generic, List, TypeVar
+
+import logfire
+
+Item = TypeVar("Item")
+
+
+class WriteBehindBuffer(Generic[Item]):
+    """
+    Buffer that accumulates items across batches and writes them in the background.
+
+    Items are written by a single background task whenever `flush_size` items are
+    buffered or `flush_interval` seconds have passed since the last write, so the
+    size of each write is independent of the pipeline batch size. A failed write is
+    re-raised by the next call to `add` or `flush`, and its items stay buffered.
+
+    The buffer is bounded: once `max_size` items are buffered, e.g. because the
+    database is slow, `add` waits until they are written, which holds up the
+    pipeline rather than letting the buffer grow without limit.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[List[Item]], Awaitable[object]],
+        flush_size: int = 100,
+        flush_interval: float = 5.0,
+        max_size: int | None = None,
+    ):
+        """
+        Initialize the buffer.
+
+        Args:
+            write: Coroutine function writing a list of items in one transaction
+            flush_size: Number of buffered items that triggers a write
+            flush_interval: Maximum seconds buffered items wait before being written
+            max_size: Number of buffered items at which `add` waits for a write,
+                by default ten times flush_size
+        """
+        self.write = write
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_size = max_size or 10 * flush_size
+        self._items: List[Item] = []
+        self._wakeup = asyncio.Event()
+        self._written = asyncio.Event()
+        self._worker: asyncio.Task | None = None
+        self._closing = False
+        self._error: BaseException | None = None
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    async def add(self, items: List[Item]) -> None:
+        """
+        Buffer items for writing, waiting for a write while the buffer is full.
+
+        Raises:
+            Exception: The error of an earlier background write that failed, in
+                which case the items are not buffered
+        """
+        self._raise_error()
+        self._items.extend(items)
+
+        if self._worker is None or self._worker.done():
+            self._closing = False
+            self._worker = asyncio.create_task(self._run())
+        if len(self._items) >= self.flush_size:
+            self._wakeup.set()
+
+        while len(self._items) >= self.max_size:
+            self._written.clear()
+            self._wakeup.set()
+            await self._written.wait()
+            self._raise_error()
+
+    async def flush(self) -> None:
+        """Write all buffered items and stop the background task."""
+        if self._worker is not None:
+            self._closing = True
+            self._wakeup.set()
+            await self._worker
+            self._worker = None
+
+        self._raise_error()
+        await self._write_buffered()
+
+    async def _run(self) -> None:
+        """Write buffered items whenever a size or time threshold is reached."""
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                await self._write_buffered()
+            except Exception as error:
+                logfire.error("Write-behind flush failed: {error!r}", error=error)
+                self._error = error
+                return
+            finally:
+                self._written.set()
+
+    async def _write_buffered(self) -> None:
+        if not self._items:
+            return
+
+        items, self._items = self._items, []
+        try:
+            await self.write(items)
+        except Exception:
+            self._items[:0] = items
+            raise
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
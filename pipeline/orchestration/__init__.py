@@ -0,0 +1,10 @@
+import os
+from functools import cache
+
+import logfire
+
+
+@cache
+def configure_logfire() -> None:
+    """Configure logfire once per process, when the first flow runs."""
+    logfire.configure(token=os.getenv("LOGFIRE_WRITE_TOKEN"))
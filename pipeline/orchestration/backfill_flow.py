@@ -0,0 +1,191 @@
+import argparse
+import asyncio
+import os
+import socket
+from datetime import date, timedelta
+from typing import List
+
+import logfire
+from core.transforms.database import (
+    claim_backfill_shard,
+    create_backfill_shards,
+    finish_backfill_shard,
+    init_db,
+    renew_backfill_lease,
+)
+from dotenv import load_dotenv
+from event_gulper_models import EventDetail
+from prefect import flow
+
+from orchestration import configure_logfire
+from orchestration.siegessaeule_flow import scrape_siegessaeule
+
+load_dotenv()
+
+
+@flow(
+    name="plan_backfill",
+    description="Split a date range to backfill into shards for backfill workers",
+)
+async def plan_backfill(
+    backfill: str,
+    start_date: date,
+    end_date: date,
+    shard_days: int = 7,
+) -> int:
+    """
+    Queue a backfill of Siegessaeule events for a date range.
+
+    Args:
+        backfill: Name of the backfill, shared with its workers
+        start_date: First date to backfill (inclusive)
+        end_date: Last date to backfill (inclusive)
+        shard_days: Number of dates a worker claims at once
+
+    Returns:
+        Number of shards queued
+    """
+    configure_logfire()
+    await init_db()
+
+    num_shards = await create_backfill_shards(
+        backfill, start_date, end_date, shard_days
+    )
+    logfire.info(
+        "Queued {num_shards} shards for backfill {backfill}",
+        num_shards=num_shards,
+        backfill=backfill,
+    )
+    return num_shards
+
+
+async def _keep_lease(
+    shard_id: int, worker: str, lease: timedelta, work: asyncio.Task
+) -> None:
+    """
+    Renew a shard's lease until cancelled, well before it expires.
+
+    If the lease is lost, e.g. because renewing was delayed until another worker
+    claimed the shard, the work on the shard is cancelled.
+    """
+    while True:
+        await asyncio.sleep(lease.total_seconds() / 3)
+        if not await renew_backfill_lease(shard_id, worker, lease):
+            logfire.warn(
+                "Worker {worker} lost its lease on shard {shard_id}, stopping",
+                worker=worker,
+                shard_id=shard_id,
+            )
+            work.cancel()
+            return
+
+
+@flow(
+    name="backfill_worker",
+    description="Claim and scrape backfill shards until none are left",
+)
+async def backfill_worker(
+    backfill: str,
+    worker: str | None = None,
+    lease_seconds: int = 900,
+    max_attempts: int = 3,
+    batch_size: int = 5,
+    write_behind: bool = False,
+    lightweight: bool = True,
+    fuzzy_dedup: bool = False,
+) -> List[EventDetail]:
+    """
+    Work through the shards of a backfill, alongside any number of other workers.
+
+    Each shard is leased for lease_seconds and the lease is renewed while the
+    shard is scraped, so a shard of a crashed worker is claimed again once its
+    lease expires. Re-claimed shards resume their items from their checkpoints.
+
+    Args:
+        backfill: Name of the backfill to work on
+        worker: Name of this worker, by default the host name and process id
+        lease_seconds: Seconds a shard stays leased without being renewed
+        max_attempts: Number of attempts after which a failing shard is given up on
+        batch_size: Number of events to process in parallel
+        write_behind: Buffer database writes across batches
+        lightweight: Track only the worker and shard flow runs in Prefect, not
+            every batch of every transformer
+        fuzzy_dedup: Merge events into similar stored ones, see
+            `scrape_siegessaeule`
+
+    Returns:
+        List of scraped and processed events
+    """
+    configure_logfire()
+    worker = worker or f"{socket.gethostname()}-{os.getpid()}"
+    lease = timedelta(seconds=lease_seconds)
+    await init_db()
+
+    all_events = []
+
+    while shard := await claim_backfill_shard(backfill, worker, lease, max_attempts):
+        scrape = asyncio.create_task(
+            scrape_siegessaeule(
+                start_date=shard.start_date,
+                end_date=shard.end_date,
+                batch_size=batch_size,
+                max_batches=None,
+                resume=True,
+                write_behind=write_behind,
+                lightweight=lightweight,
+                fuzzy_dedup=fuzzy_dedup,
+            )
+        )
+        keep_lease = asyncio.create_task(_keep_lease(shard.id, worker, lease, scrape))
+        error = None
+        try:
+            all_events.extend(await scrape)
+        except asyncio.CancelledError:
+            if asyncio.current_task().cancelling():
+                # The worker itself is being cancelled
+                raise
+            # The lease was lost, so the shard is another worker's now
+            continue
+        except Exception as shard_error:
+            logfire.error(
+                "Shard {shard_id} failed: {error!r}",
+                shard_id=shard.id,
+                error=shard_error,
+            )
+            error = shard_error
+        finally:
+            keep_lease.cancel()
+
+        if not await finish_backfill_shard(shard.id, worker, error, max_attempts):
+            logfire.warn(
+                "Shard {shard_id} was claimed by another worker meanwhile",
+                shard_id=shard.id,
+            )
+
+    return all_events
+
+
+if __name__ == "__main__":
+    # Plan once, then start any number of workers, e.g.
+    # docker compose run pipeline python -m orchestration.backfill_flow plan \
+    #     2025-01 2025-01-01 2025-06-30
+    # BACKFILL=2025-01 docker compose --profile backfill up --scale backfill-worker=4
+    parser = argparse.ArgumentParser(description="Run a sharded backfill")
+    commands = parser.add_subparsers(dest="command", required=True)
+    plan = commands.add_parser("plan", help="Queue the shards of a backfill")
+    plan.add_argument("backfill")
+    plan.add_argument("start_date", type=date.fromisoformat)
+    plan.add_argument("end_date", type=date.fromisoformat)
+    plan.add_argument("--shard-days", type=int, default=7)
+    work = commands.add_parser("work", help="Work on the shards of a backfill")
+    work.add_argument("backfill")
+    args = parser.parse_args()
+
+    if args.command == "plan":
+        asyncio.run(
+            plan_backfill(
+                args.backfill, args.start_date, args.end_date, args.shard_days
+            )
+        )
+    else:
+        asyncio.run(backfill_worker(args.backfill))
@@ -0,0 +1,94 @@
+from typing import List
+
+from core.pipelines import Pipeline
+from core.sources.dead_letters import DeadLetterSource
+from core.transforms.database import EventDetailSaver, init_db
+from core.transforms.llm import MdToEventTransformer
+from core.transforms.scrape import ScrapeURLAsMarkdown
+from core.transforms.venues import VenueNormalizer
+from dotenv import load_dotenv
+from event_gulper_models import EventDetail, ItemStage
+from httpx import AsyncClient
+from prefect import flow
+from prefect.settings import PREFECT_TASKS_REFRESH_CACHE, temporary_settings
+
+from orchestration import configure_logfire
+
+load_dotenv()
+
+
+@flow(
+    name="reprocess_dead_letters",
+    description="Retry only the items that failed in earlier runs",
+)
+async def reprocess_dead_letters(
+    batch_size: int = 5,
+    max_batches: int | None = None,
+    fuzzy_dedup: bool = False,
+) -> List[EventDetail]:
+    """
+    Reprocess dead-lettered items from the stage they failed in.
+
+    URLs that could not be scraped go through scraping, extraction and saving
+    again; markdown the LLM could not extract only goes through extraction and
+    saving. Items that succeed are resolved, items that fail again stay
+    dead-lettered with an increased attempt count.
+
+    Args:
+        batch_size: Number of items to process in parallel
+        max_batches: Maximum number of batches per stage (None for unlimited)
+        fuzzy_dedup: Merge events into similar stored ones, see
+            `scrape_siegessaeule`
+
+    Returns:
+        List of newly saved events
+    """
+    configure_logfire()
+
+    # Imported here, as loading the OpenAI client slows down worker startup
+    import instructor
+    from openai import AsyncOpenAI
+
+    http_client = AsyncClient()
+    llm_client = instructor.from_openai(AsyncOpenAI())
+    await init_db()
+
+    all_events = []
+
+    try:
+        md_to_event_transformer = MdToEventTransformer(
+            llm_client, checkpoint=True, dead_letter=True
+        )
+        venue_normalizer = VenueNormalizer()
+        event_saver = EventDetailSaver(
+            return_only_saved=True, checkpoint=True, fuzzy_dedup=fuzzy_dedup
+        )
+
+        pipelines = [
+            Pipeline(
+                DeadLetterSource(ItemStage.SCRAPED, batch_size, max_batches),
+                [
+                    ScrapeURLAsMarkdown(http_client, checkpoint=True, dead_letter=True),
+                    md_to_event_transformer,
+                    venue_normalizer,
+                    event_saver,
+                ],
+                max_batches,
+            ),
+            Pipeline(
+                DeadLetterSource(ItemStage.EXTRACTED, batch_size, max_batches),
+                [md_to_event_transformer, venue_normalizer, event_saver],
+                max_batches,
+            ),
+        ]
+
+        # The batch tasks cache their results, including per-item failures, by
+        # input; a retry of the same inputs must not be served from that cache.
+        with temporary_settings({PREFECT_TASKS_REFRESH_CACHE: True}):
+            for pipeline in pipelines:
+                all_events.extend(await pipeline.run())
+
+    finally:
+        await http_client.aclose()
+
+    return all_events
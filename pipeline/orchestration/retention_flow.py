@@ -0,0 +1,46 @@
+from typing import List
+
+import logfire
+from core.transforms.database import archive_event_partitions, init_db
+from dotenv import load_dotenv
+from prefect import flow
+
+from orchestration import configure_logfire
+
+load_dotenv()
+
+
+@flow(
+    name="apply_event_retention",
+    description="Detach event partitions older than the retention period",
+)
+async def apply_event_retention(
+    retain_months: int = 12,
+    archive: bool = True,
+) -> List[str]:
+    """
+    Remove old months of events from event_details.
+
+    Also creates the partitions for the coming months through init_db, so running
+    this monthly keeps partitions ahead of the scraped dates.
+
+    Args:
+        retain_months: Number of months before the current one to keep
+        archive: Move detached partitions to the event_archive schema instead of
+            dropping them
+
+    Returns:
+        Names of the detached partitions
+    """
+    configure_logfire()
+    await init_db()
+
+    detached = await archive_event_partitions(
+        retain_months, archive_schema="event_archive" if archive else None
+    )
+    logfire.info(
+        "Detached {num_partitions} event partitions: {partitions}",
+        num_partitions=len(detached),
+        partitions=detached,
+    )
+    return detached
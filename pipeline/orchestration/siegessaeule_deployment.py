@@ -4,13 +4,17 @@ if __name__ == "__main__":
     # This serve call registers the deployment and starts a long-running process
     # that will poll the Prefect server for work (manual or scheduled).
     # You can adjust the parameters (and interval, cron or tags) as needed.
+    # Without dates, each run crawls the coming days_ahead days incrementally:
+    # only dates that are new or due for a refresh, and whose listing changed.
     scrape_siegessaeule.serve(
         name="scrape_siegessaeule",
         parameters={
-            "start_date": "2025-02-20",
-            "end_date": "2025-02-21",
             "batch_size": 10,
             "max_batches": None,
+            "resume": False,
+            "write_behind": False,
+            "incremental": True,
+            "days_ahead": 60,
         },
         # interval=60,  # poll every 60 seconds
         pause_on_shutdown=True,
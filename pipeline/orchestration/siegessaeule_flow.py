@@ -1,22 +1,20 @@
-import os
-from datetime import date
+from datetime import date, timedelta
 from typing import List
 
-import instructor
-import logfire
 from core.pipelines import Pipeline
 from core.sources.siegessaeule import SiegessaeuleSource
 from core.transforms.database import EventDetailSaver, EventURLSaver, init_db
 from core.transforms.llm import MdToEventTransformer
 from core.transforms.scrape import ScrapeURLAsMarkdown
+from core.transforms.venues import VenueNormalizer
 from dotenv import load_dotenv
 from event_gulper_models import EventDetail
 from httpx import AsyncClient
-from openai import AsyncOpenAI
 from prefect import flow
 
+from orchestration import configure_logfire
+
 load_dotenv()
-logfire.configure(token=os.getenv("LOGFIRE_WRITE_TOKEN"))
 
 
 @flow(
@@ -24,23 +22,54 @@ logfire.configure(token=os.getenv("LOGFIRE_WRITE_TOKEN"))
     description="Scrape Siegessaeule events for a specific date",
 )
 async def scrape_siegessaeule(
-    start_date: date,
-    end_date: date,
+    start_date: date | None = None,
+    end_date: date | None = None,
     batch_size: int = 5,
     max_batches: int | None = 2,
+    resume: bool = False,
+    write_behind: bool = False,
+    incremental: bool = False,
+    days_ahead: int = 60,
+    lightweight: bool = False,
+    profile: bool = False,
+    fuzzy_dedup: bool = False,
 ) -> List[EventDetail]:
     """
     Main flow that processes events in concurrent batches.
 
     Args:
-        start_date: First date to scrape events for (inclusive)
-        end_date: Last date to scrape events for (inclusive)
+        start_date: First date to scrape events for (inclusive), by default today
+        end_date: Last date to scrape events for (inclusive), by default
+            days_ahead days after start_date
         batch_size: Number of events to process in parallel
         max_batches: Maximum number of batches to process (None for unlimited)
+        resume: Pick up events left unfinished by an earlier run from their last
+            checkpointed stage instead of skipping their already-saved URLs
+        write_behind: Buffer database writes across batches and commit them in the
+            background instead of once per batch
+        incremental: Only scrape dates that were never crawled or are due for a
+            refresh, skipping those whose listed events did not change
+        days_ahead: Number of days after start_date to scrape if end_date is not
+            given
+        lightweight: Run the transformers as plain coroutines instead of Prefect
+            tasks, tracking only this flow run in Prefect
+        profile: Attach CPU profiles of each stage and per-batch memory allocations
+            to the batch spans in logfire
+        fuzzy_dedup: Merge events into stored ones starting around the same time
+            at the same venue with a similar title, e.g. reported by other
+            sources. Merging cannot be undone.
 
     Returns:
         List of scraped and processed events
     """
+    configure_logfire()
+    start_date = start_date or date.today()
+    end_date = end_date or start_date + timedelta(days=days_ahead)
+
+    # Imported here, as loading the OpenAI client slows down worker startup
+    import instructor
+    from openai import AsyncOpenAI
+
     # Initialize clients
     http_client = AsyncClient()
     llm_client = instructor.from_openai(AsyncOpenAI())
@@ -55,16 +84,33 @@ async def scrape_siegessaeule(
             end_date,
             batch_size,
             max_batches,
+            incremental=incremental,
+        )
+        url_saver = EventURLSaver(
+            return_only_saved=True,
+            checkpoint=True,
+            resume=resume,
+            write_behind=write_behind,
+        )
+        url_to_markdown_scraper = ScrapeURLAsMarkdown(
+            http_client, checkpoint=True, dead_letter=True
+        )
+        md_to_event_transformer = MdToEventTransformer(
+            llm_client, checkpoint=True, dead_letter=True
+        )
+        venue_normalizer = VenueNormalizer()
+        event_saver = EventDetailSaver(
+            return_only_saved=True,
+            checkpoint=True,
+            write_behind=write_behind,
+            fuzzy_dedup=fuzzy_dedup,
         )
-        url_saver = EventURLSaver(return_only_saved=True)
-        url_to_markdown_scraper = ScrapeURLAsMarkdown(http_client)
-        md_to_event_transformer = MdToEventTransformer(llm_client)
-        event_saver = EventDetailSaver(return_only_saved=True)
 
         transform_steps = [
             url_saver,
             url_to_markdown_scraper,
             md_to_event_transformer,
+            venue_normalizer,
             event_saver,
         ]
 
@@ -72,6 +118,8 @@ async def scrape_siegessaeule(
             source,
             transform_steps,
             max_batches,
+            lightweight=lightweight,
+            profile=profile,
         )
 
         all_events = await pipeline.run()
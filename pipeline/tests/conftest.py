@@ -4,10 +4,20 @@ from pathlib import Path
 import instructor
 import logfire
 import pytest
+from core.transforms import database, llm, scrape
 from core.transforms.scrape import ScrapeURLAsMarkdown
 from dotenv import load_dotenv
+from event_gulper_models import Base
 from httpx import AsyncClient
 from openai import AsyncOpenAI
+from prefect.settings import (
+    PREFECT_LOCAL_STORAGE_PATH,
+    PREFECT_TASKS_REFRESH_CACHE,
+    temporary_settings,
+)
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
 from telethon import TelegramClient
 
 # Disable logfire for all tests
@@ -55,6 +65,81 @@ def url_to_md_scraper(http_client):
     return ScrapeURLAsMarkdown(http_client)
 
 
+@pytest.fixture
+async def sqlite_db(tmp_path, monkeypatch):
+    """Point the database transformers at a throwaway SQLite database."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'events.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    monkeypatch.setattr(
+        database,
+        "AsyncSessionLocal",
+        sessionmaker(class_=AsyncSession, expire_on_commit=False, bind=engine),
+    )
+    yield engine
+    await engine.dispose()
+
+
+async def _drop_event_tables(conn):
+    await conn.execute(text("DROP SCHEMA IF EXISTS event_archive CASCADE"))
+    await conn.run_sync(Base.metadata.drop_all)
+    await conn.execute(text("DROP TABLE IF EXISTS event_details_unpartitioned"))
+
+
+@pytest.fixture
+async def pg_db(monkeypatch):
+    """
+    Point the database module at an emptied PostgreSQL test database.
+
+    Skipped unless TEST_DATABASE_URL is set. Unlike the API tests' connection,
+    changes are committed, so the tables are dropped before and after the test.
+    """
+    test_database_url = os.getenv("TEST_DATABASE_URL")
+    if not test_database_url:
+        pytest.skip("TEST_DATABASE_URL (PostgreSQL) not set")
+
+    engine = create_async_engine(
+        test_database_url.replace("postgresql://", "postgresql+asyncpg://")
+    )
+    async with engine.begin() as conn:
+        await _drop_event_tables(conn)
+
+    monkeypatch.setattr(database, "get_engine", lambda: engine)
+    monkeypatch.setattr(
+        database,
+        "AsyncSessionLocal",
+        sessionmaker(class_=AsyncSession, expire_on_commit=False, bind=engine),
+    )
+    yield engine
+
+    async with engine.begin() as conn:
+        await _drop_event_tables(conn)
+    await engine.dispose()
+
+
+@pytest.fixture
+def refresh_task_cache(tmp_path):
+    """
+    Ignore Prefect task results cached by earlier tests and test runs, and keep
+    the results cached by this test's tasks from later ones.
+    """
+    with temporary_settings(
+        {
+            PREFECT_TASKS_REFRESH_CACHE: True,
+            PREFECT_LOCAL_STORAGE_PATH: tmp_path / "prefect-storage",
+        }
+    ):
+        yield
+
+
+@pytest.fixture
+def no_retry_delay(monkeypatch):
+    """Retry failed batch items without waiting."""
+    monkeypatch.setattr(scrape, "SCRAPE_RETRY_DELAY_SECONDS", 0)
+    monkeypatch.setattr(llm, "EXTRACT_RETRY_DELAY_SECONDS", 0)
+
+
 def get_telegram_credentials():
     """Get Telegram credentials from environment variables."""
     load_env()
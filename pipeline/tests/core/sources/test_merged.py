@@ -0,0 +1,161 @@
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from core.pipelines import Pipeline
+from core.sources.merged import MergedSource
+from core.sources.telegram import TelegramSource
+from core.transforms.database import EventDetailSaver, EventURLSaver, get_chat_cursor
+from core.transforms.protocols import Transformer
+from event_gulper_models import EventDetail, EventDetailDB, EventURL
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from tests.fakes import FakeTelegramClient, ListSource
+
+
+class FailingSource:
+    """Source failing after its first batch."""
+
+    async def fetch_batches(self):
+        yield ["broken"]
+        raise RuntimeError("listing page changed")
+
+
+@pytest.mark.asyncio
+async def test_merged_source_interleaves_sources_by_weight():
+    source = MergedSource(
+        {
+            "siegessaeule": ListSource([["s"]] * 6),
+            "telegram": ListSource([["t"]] * 3),
+        },
+        weights={"siegessaeule": 2},
+    )
+
+    batches = [batch async for batch in source.fetch_batches()]
+
+    # Two siegessaeule batches for each telegram batch, spread out
+    assert "".join(batch[0] for batch in batches) == "stsstssts"
+    assert [batch.source for batch in batches[:2]] == ["siegessaeule", "telegram"]
+
+
+@pytest.mark.asyncio
+async def test_merged_source_applies_backpressure():
+    fast = ListSource([["s"]] * 100)
+    source = MergedSource({"siegessaeule": fast}, prefetch=2, max_batches=2)
+
+    async for _ in source.fetch_batches():
+        # Give the source time to run ahead while the batch is processed
+        await asyncio.sleep(0.01)
+
+    # Two consumed, two queued, one waiting for room in the queue
+    assert fast.fetched <= 5
+
+
+@pytest.mark.asyncio
+async def test_merged_source_drops_failing_sources():
+    source = MergedSource(
+        {"broken": FailingSource(), "telegram": ListSource([["t1"], ["t2"]])}
+    )
+
+    batches = [batch async for batch in source.fetch_batches()]
+
+    assert sorted(item for batch in batches for item in batch) == [
+        "broken",
+        "t1",
+        "t2",
+    ]
+
+
+def _event(title):
+    return EventDetail(
+        title=title,
+        summary="Summary",
+        detail_url="https://example.com/event",
+        start_time=datetime(2025, 2, 20, 20, 0),
+    )
+
+
+@pytest.mark.asyncio
+async def test_pipeline_stopping_early_cancels_source_tasks():
+    tasks = asyncio.all_tasks()
+    source = MergedSource({"siegessaeule": ListSource([["s"]] * 100)})
+
+    await Pipeline(source, [], max_batches=1).run()
+
+    assert asyncio.all_tasks() == tasks
+
+
+@pytest.mark.asyncio
+async def test_stopping_early_keeps_cursors_of_unprocessed_messages(sqlite_db):
+    client = FakeTelegramClient(
+        {
+            "queerberlin": [
+                SimpleNamespace(
+                    id=id,
+                    text=f"Message {id}",
+                    date=datetime(2025, 3, 1, 12, id, tzinfo=timezone.utc),
+                )
+                for id in range(1, 11)
+            ]
+        }
+    )
+    source = MergedSource(
+        {
+            "telegram": TelegramSource(client, ["queerberlin"], batch_size=1),
+            "siegessaeule": ListSource([["s"]] * 100),
+        },
+        prefetch=4,
+    )
+
+    processed = []
+
+    class Record(Transformer[str, str]):
+        async def transform(self, items):
+            # Let the sources run ahead while the batch is processed
+            await asyncio.sleep(0.01)
+            processed.extend(items)
+            return items
+
+    await Pipeline(source, [Record()], max_batches=4).run()
+
+    # Only messages the pipeline processed are skipped next run
+    processed_ids = [int(item.split()[-1]) for item in processed if item != "s"]
+    assert processed_ids
+    assert await get_chat_cursor("queerberlin") <= max(processed_ids)
+
+
+@pytest.mark.asyncio
+async def test_savers_record_the_source_of_each_batch(sqlite_db):
+    urls = MergedSource(
+        {
+            "siegessaeule": ListSource([["https://siegessaeule.de/1"]]),
+            "telegram": ListSource([["https://t.me/queerberlin/1"]]),
+        }
+    )
+    await Pipeline(urls, [EventURLSaver()], max_batches=None).run()
+
+    events = MergedSource(
+        {
+            "siegessaeule": ListSource([[_event("Drag Bingo")]]),
+            "telegram": ListSource([[_event("Karaoke")]]),
+        }
+    )
+    saver = EventDetailSaver(write_behind=True, flush_interval=60)
+    await Pipeline(events, [saver], max_batches=None).run()
+
+    async with AsyncSession(sqlite_db) as session:
+        url_sources = dict(
+            (await session.execute(select(EventURL.url, EventURL.source))).all()
+        )
+        event_sources = dict(
+            (
+                await session.execute(select(EventDetailDB.title, EventDetailDB.source))
+            ).all()
+        )
+    assert url_sources == {
+        "https://siegessaeule.de/1": "siegessaeule",
+        "https://t.me/queerberlin/1": "telegram",
+    }
+    assert event_sources == {"Drag Bingo": "siegessaeule", "Karaoke": "telegram"}
@@ -1,7 +1,9 @@
-from datetime import date
+from datetime import date, timedelta
 
+import httpx
 import pytest
-from core.sources.siegessaeule import fetch_event_urls
+from core.sources.siegessaeule import SiegessaeuleSource, fetch_event_urls
+from core.transforms.database import get_crawl_watermarks
 
 
 @pytest.mark.asyncio
@@ -21,3 +23,73 @@ async def test_url_stream(http_client):
     async for url_batch in fetch_event_urls(http_client, target_date, batch_size=10):
         assert url_batch[0] == first_urls_per_batch[i]
         i += 1
+
+
+def _listing_client(listings):
+    """HTTP client serving a listing page with the given event paths per date."""
+
+    def handler(request):
+        paths = listings[request.url.params["date"]]
+        blocks = "".join(
+            f'<div class="content-block"><a href="{path}">Event</a></div>'
+            for path in paths
+        )
+        return httpx.Response(200, text=f"<html><body>{blocks}</body></html>")
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+@pytest.mark.asyncio
+async def test_incremental_crawl_skips_unchanged_and_fresh_dates(sqlite_db):
+    today = date.today()
+    tomorrow = today + timedelta(days=1)
+    listings = {
+        today.isoformat(): [f"/en/events/mix/drag-bingo/{today}/20:00/"],
+        tomorrow.isoformat(): [
+            f"/en/events/bars/karaoke/{tomorrow}/21:00/",
+            f"/en/events/kultur/film-night/{tomorrow}/19:00/",
+        ],
+    }
+
+    async with _listing_client(listings) as client:
+        source = SiegessaeuleSource(
+            client, today, tomorrow, batch_size=10, incremental=True
+        )
+        first_run = [batch async for batch in source.fetch_batches()]
+
+        # Both dates were just crawled, so neither is due yet
+        second_run = [batch async for batch in source.fetch_batches()]
+
+    assert [len(batch) for batch in first_run] == [1, 2]
+    assert second_run == []
+    watermarks = await get_crawl_watermarks("siegessaeule", today, tomorrow)
+    assert {day: w.url_count for day, w in watermarks.items()} == {
+        today: 1,
+        tomorrow: 2,
+    }
+
+
+@pytest.mark.asyncio
+async def test_incremental_crawl_refetches_changed_listings(sqlite_db):
+    today = date.today()
+    listings = {today.isoformat(): [f"/en/events/mix/drag-bingo/{today}/20:00/"]}
+
+    async with _listing_client(listings) as client:
+        source = SiegessaeuleSource(client, today, today, incremental=True)
+        assert len([batch async for batch in source.fetch_batches()]) == 1
+
+        # Make the date due again, once with the same listing and once changed
+        async with sqlite_db.begin() as conn:
+            await conn.exec_driver_sql(
+                "UPDATE crawl_watermarks SET last_crawled_at = '2000-01-01'"
+            )
+        assert [batch async for batch in source.fetch_batches()] == []
+
+        async with sqlite_db.begin() as conn:
+            await conn.exec_driver_sql(
+                "UPDATE crawl_watermarks SET last_crawled_at = '2000-01-01'"
+            )
+        listings[today.isoformat()].append(f"/en/events/bars/karaoke/{today}/21:00/")
+        batches = [batch async for batch in source.fetch_batches()]
+
+    assert [len(batch) for batch in batches] == [2]
@@ -1,6 +1,13 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
 import pytest
+from core.sources.telegram import TelegramSource
+from core.transforms.database import get_chat_cursor
 from telethon.tl.types import ChannelParticipantsAdmins
 
+from tests.fakes import FakeTelegramClient
+
 GROUP_TITLE = "Event Horizon 2"
 GROUP_ID = -4686468958  # should be the "Event Horizon" group
 GROUP_ADMIN_ID = 5155664906
@@ -39,3 +46,68 @@ async def test_telegram_bot_can_access_group(telegram_client):
     assert admin.id == GROUP_ADMIN_ID, "Admin ID should match"
     assert admin.first_name == GROUP_ADMIN_FIRST_NAME, "Admin name should match"
     assert not admin.bot, "Admin should not be a bot"
+
+
+def _message(id, text):
+    return SimpleNamespace(
+        id=id, text=text, date=datetime(2025, 3, 1, 12, id, tzinfo=timezone.utc)
+    )
+
+
+@pytest.mark.asyncio
+async def test_telegram_source_yields_messages_as_markdown(sqlite_db):
+    """Test that messages are batched as markdown with their links."""
+    client = FakeTelegramClient(
+        {
+            "queerberlin": [_message(1, "Drag Bingo tonight"), _message(2, "")],
+            GROUP_ID: [_message(7, "Karaoke at SchwuZ")],
+        }
+    )
+    source = TelegramSource(client, ["queerberlin", GROUP_ID], batch_size=10)
+
+    batches = [batch async for batch in source.fetch_batches()]
+
+    assert batches == [
+        [
+            "[Telegram message](https://t.me/queerberlin/1) posted 2025-03-01 12:01 UTC"
+            "\n\nDrag Bingo tonight"
+        ],
+        [
+            "[Telegram message](https://t.me/c/4686468958/7) "
+            "posted 2025-03-01 12:07 UTC\n\nKaraoke at SchwuZ"
+        ],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_telegram_source_resumes_from_cursor(sqlite_db):
+    """Test that a second run only fetches messages posted since the first."""
+    messages = [_message(1, "Drag Bingo"), _message(2, "Karaoke"), _message(3, "")]
+    client = FakeTelegramClient({"queerberlin": messages})
+
+    first_run = [
+        batch async for batch in TelegramSource(client, ["queerberlin"]).fetch_batches()
+    ]
+    messages.append(_message(4, "Techno brunch"))
+    second_run = [
+        batch async for batch in TelegramSource(client, ["queerberlin"]).fetch_batches()
+    ]
+
+    assert len(first_run[0]) == 2
+    assert len(second_run) == 1 and second_run[0][0].endswith("Techno brunch")
+    assert client.requests == [("queerberlin", 0), ("queerberlin", 3)]
+    assert await get_chat_cursor("queerberlin") == 4
+
+
+@pytest.mark.asyncio
+async def test_telegram_source_respects_max_batches(sqlite_db):
+    """Test that batches are capped and unyielded messages are fetched again."""
+    client = FakeTelegramClient(
+        {"queerberlin": [_message(id, f"Event {id}") for id in range(1, 6)]}
+    )
+    source = TelegramSource(client, ["queerberlin"], batch_size=2, max_batches=2)
+
+    batches = [batch async for batch in source.fetch_batches()]
+
+    assert [len(batch) for batch in batches] == [2, 2]
+    assert await get_chat_cursor("queerberlin") == 4
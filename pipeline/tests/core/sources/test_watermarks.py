@@ -0,0 +1,30 @@
+from datetime import date, datetime, timedelta
+
+from core.sources.watermarks import dates_due, refresh_interval
+
+
+def test_near_dates_are_refreshed_more_often():
+    assert refresh_interval(0) < refresh_interval(5) < refresh_interval(20)
+    assert refresh_interval(-1) == refresh_interval(365)
+
+
+def test_dates_due_for_a_crawl():
+    now = datetime(2025, 2, 20, 12, 0)
+    today = now.date()
+    last_crawled = {
+        # Crawled long enough ago for a date this close
+        today: now - timedelta(hours=6),
+        # Crawled recently
+        today + timedelta(days=1): now - timedelta(hours=1),
+        # Far ahead, crawled too recently for its longer interval
+        today + timedelta(days=40): now - timedelta(hours=6),
+    }
+
+    due = dates_due(today, today + timedelta(days=40), last_crawled, now)
+
+    assert due[0] == today
+    assert today + timedelta(days=1) not in due
+    assert today + timedelta(days=2) in due  # Never crawled
+    assert today + timedelta(days=40) not in due
+    assert len(due) == 39
+    assert dates_due(date(2025, 3, 2), date(2025, 3, 1), {}, now) == []
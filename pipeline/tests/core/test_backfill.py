@@ -0,0 +1,121 @@
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+from core.transforms.database import (
+    claim_backfill_shard,
+    create_backfill_shards,
+    finish_backfill_shard,
+    init_db,
+    renew_backfill_lease,
+)
+from event_gulper_models import BackfillShard, ShardStatus
+from orchestration.backfill_flow import _keep_lease
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+LEASE = timedelta(minutes=15)
+
+
+async def _shards(engine):
+    async with AsyncSession(engine) as session:
+        result = await session.execute(select(BackfillShard).order_by(BackfillShard.id))
+        return list(result.scalars())
+
+
+@pytest.mark.asyncio
+async def test_backfill_is_split_into_shards_once(sqlite_db):
+    assert (
+        await create_backfill_shards("spring", date(2025, 3, 1), date(2025, 3, 20)) == 3
+    )
+    assert (
+        await create_backfill_shards("spring", date(2025, 3, 1), date(2025, 3, 20)) == 0
+    )
+
+    shards = await _shards(sqlite_db)
+    assert [(shard.start_date, shard.end_date) for shard in shards] == [
+        (date(2025, 3, 1), date(2025, 3, 7)),
+        (date(2025, 3, 8), date(2025, 3, 14)),
+        (date(2025, 3, 15), date(2025, 3, 20)),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_expired_leases_are_claimed_again(sqlite_db):
+    await create_backfill_shards("spring", date(2025, 3, 1), date(2025, 3, 7))
+
+    shard = await claim_backfill_shard("spring", "worker-1", LEASE)
+    assert shard.status == ShardStatus.LEASED and shard.attempts == 1
+    assert await claim_backfill_shard("spring", "worker-2", LEASE) is None
+
+    # worker-1 crashes and its lease runs out
+    await renew_backfill_lease(shard.id, "worker-1", -LEASE)
+    reclaimed = await claim_backfill_shard("spring", "worker-2", LEASE)
+    assert reclaimed.id == shard.id and reclaimed.attempts == 2
+
+    # The crashed worker can no longer renew or finish the shard
+    assert not await renew_backfill_lease(shard.id, "worker-1", LEASE)
+    assert not await finish_backfill_shard(shard.id, "worker-1")
+    assert await finish_backfill_shard(shard.id, "worker-2")
+
+    assert (await _shards(sqlite_db))[0].status == ShardStatus.DONE
+    assert await claim_backfill_shard("spring", "worker-3", LEASE) is None
+
+
+@pytest.mark.asyncio
+async def test_failed_shards_are_retried_up_to_max_attempts(sqlite_db):
+    await create_backfill_shards("spring", date(2025, 3, 1), date(2025, 3, 7))
+
+    for _ in range(2):
+        shard = await claim_backfill_shard("spring", "worker", LEASE, max_attempts=2)
+        await finish_backfill_shard(
+            shard.id, "worker", RuntimeError("timeout"), max_attempts=2
+        )
+
+    shard = (await _shards(sqlite_db))[0]
+    assert shard.status == ShardStatus.FAILED
+    assert shard.error == "RuntimeError('timeout')"
+    assert await claim_backfill_shard("spring", "worker", LEASE, max_attempts=2) is None
+
+
+@pytest.mark.asyncio
+async def test_shards_expiring_on_their_last_attempt_fail(sqlite_db):
+    await create_backfill_shards("spring", date(2025, 3, 1), date(2025, 3, 7))
+
+    shard = await claim_backfill_shard("spring", "worker-1", LEASE, max_attempts=1)
+    # worker-1 crashes on the last attempt and its lease runs out
+    await renew_backfill_lease(shard.id, "worker-1", -LEASE)
+
+    assert (
+        await claim_backfill_shard("spring", "worker-2", LEASE, max_attempts=1) is None
+    )
+    shard = (await _shards(sqlite_db))[0]
+    assert shard.status == ShardStatus.FAILED
+    assert shard.lease_expires_at is None
+
+
+@pytest.mark.asyncio
+async def test_work_on_a_shard_stops_when_its_lease_is_lost(sqlite_db):
+    await create_backfill_shards("spring", date(2025, 3, 1), date(2025, 3, 7))
+    shard = await claim_backfill_shard("spring", "worker-1", LEASE)
+    await renew_backfill_lease(shard.id, "worker-1", -LEASE)
+    await claim_backfill_shard("spring", "worker-2", LEASE)
+
+    work = asyncio.create_task(asyncio.sleep(60))
+    await _keep_lease(shard.id, "worker-1", timedelta(milliseconds=30), work)
+
+    with pytest.raises(asyncio.CancelledError):
+        await work
+
+
+@pytest.mark.asyncio
+async def test_concurrent_workers_claim_different_shards(pg_db):
+    await init_db()
+    await create_backfill_shards("spring", date(2025, 3, 1), date(2025, 4, 30))
+
+    claimed = await asyncio.gather(
+        *(claim_backfill_shard("spring", f"worker-{i}", LEASE) for i in range(12))
+    )
+
+    assert len({shard.id for shard in claimed if shard is not None}) == 9
+    assert claimed.count(None) == 3
@@ -0,0 +1,165 @@
+from datetime import datetime, timedelta
+
+import pytest
+from core.sources.dead_letters import DeadLetterSource
+from core.transforms.database import (
+    EventDetailSaver,
+    EventURLSaver,
+    get_dead_letters,
+    get_item_states,
+)
+from core.transforms.llm import MdToEventTransformer
+from core.transforms.scrape import ScrapeURLAsMarkdown
+from event_gulper_models import EventDetail, ItemStage, UpcomingEventDB
+from httpx import AsyncClient, MockTransport, Response
+from sqlalchemy import insert, select
+
+from tests.fakes import FakeLLMClient
+
+URLS = [
+    "https://www.siegessaeule.de/en/events/mix/psychologische-beratung/2025-02-20/17:00/",
+    "https://www.siegessaeule.de/en/events/mix/anonyme-alkoholiker-queer-23/2025-02-20/20:00/",
+]
+
+
+def _serve_event_pages(requested_urls, broken_urls=()):
+    """Build an offline client serving a minimal event page for every URL."""
+
+    def handler(request):
+        requested_urls.append(str(request.url))
+        if str(request.url) in broken_urls:
+            return Response(200, text="<div>Maintenance</div>")
+        return Response(200, text=f"<main><h3>{request.url.path}</h3></main>")
+
+    return AsyncClient(transport=MockTransport(handler))
+
+
+@pytest.mark.asyncio
+async def test_resume_restarts_items_from_last_checkpoint(
+    sqlite_db, refresh_task_cache
+):
+    requested_urls = []
+
+    # First run: URLs are discovered and scraped, then the run dies
+    url_saver = EventURLSaver(return_only_saved=True, checkpoint=True)
+    async with _serve_event_pages(requested_urls) as http_client:
+        scraper = ScrapeURLAsMarkdown(http_client, checkpoint=True)
+        markdown = await scraper.transform(await url_saver.transform(URLS))
+
+    states = await get_item_states(URLS)
+    assert {state.stage for state in states.values()} == {ItemStage.SCRAPED}
+    assert requested_urls == URLS
+
+    # Without resume the already-recorded URLs are skipped
+    assert await url_saver.transform(URLS) == []
+
+    # With resume they are picked up again and scraping is not repeated
+    resuming_saver = EventURLSaver(return_only_saved=True, checkpoint=True, resume=True)
+    async with _serve_event_pages(requested_urls) as http_client:
+        scraper = ScrapeURLAsMarkdown(http_client, checkpoint=True)
+        resumed_urls = await resuming_saver.transform(URLS)
+        assert resumed_urls == URLS
+        assert await scraper.transform(resumed_urls) == markdown
+    assert requested_urls == URLS
+
+    # The extracted URL lacks the trailing slash of the item's URL
+    event = EventDetail(
+        title="Psychologische Beratung",
+        summary="Counselling",
+        detail_url=URLS[0].rstrip("/"),
+        start_time=datetime(2025, 2, 20, 17, 0),
+    )
+    llm_client = FakeLLMClient({"fast": event})
+    transformer = MdToEventTransformer(llm_client, models=["fast"], checkpoint=True)
+    events = await transformer.transform(markdown[:1])
+    assert [e.item_url for e in events] == URLS[:1]
+    await EventDetailSaver(checkpoint=True).transform(events)
+
+    states = await get_item_states(URLS)
+    assert states[URLS[0]].stage == ItemStage.SAVED
+    assert states[URLS[1]].stage == ItemStage.SCRAPED
+
+    # Extracted events are reused instead of calling the LLM again
+    assert await transformer.transform(markdown[:1]) == events
+    assert llm_client.chat.completions.calls == ["fast"]
+
+    # Only the unfinished item is resumed
+    assert await resuming_saver.transform(URLS) == URLS[1:]
+
+
+@pytest.mark.asyncio
+async def test_failed_items_are_dead_lettered_and_reprocessed(
+    sqlite_db, refresh_task_cache, no_retry_delay
+):
+    requested_urls = []
+    async with _serve_event_pages(requested_urls, broken_urls=URLS[1:]) as client:
+        scraper = ScrapeURLAsMarkdown(client, dead_letter=True)
+        markdown = await scraper.transform(URLS)
+
+    assert len(markdown) == 1
+    assert requested_urls == URLS
+    letters = await get_dead_letters(ItemStage.SCRAPED)
+    assert [letter.url for letter in letters] == URLS[1:]
+    assert "Could not find section" in letters[0].error
+
+    # Extraction failures are dead-lettered with the markdown as input
+    transformer = MdToEventTransformer(
+        FakeLLMClient({"fast": ValueError("no event")}),
+        models=["fast"],
+        dead_letter=True,
+    )
+    assert await transformer.transform(markdown) == []
+    letters = await get_dead_letters(ItemStage.EXTRACTED)
+    assert [letter.input for letter in letters] == markdown
+
+    # Reprocessing replays only the dead-lettered URL and resolves it
+    requested_urls.clear()
+    async with _serve_event_pages(requested_urls) as client:
+        scraper = ScrapeURLAsMarkdown(client, dead_letter=True)
+        async for url_batch in DeadLetterSource(ItemStage.SCRAPED).fetch_batches():
+            await scraper.transform(url_batch)
+
+    assert requested_urls == URLS[1:]
+    assert await get_dead_letters(ItemStage.SCRAPED) == []
+
+
+@pytest.mark.asyncio
+async def test_saving_events_refreshes_upcoming_events(sqlite_db):
+    tomorrow = datetime.now().replace(microsecond=0) + timedelta(days=1)
+    async with sqlite_db.begin() as conn:
+        # Left over from an earlier run, the event has started since
+        await conn.execute(
+            insert(UpcomingEventDB).values(
+                id=1000, title="Yesterday", start_time=tomorrow - timedelta(days=2)
+            )
+        )
+
+    def event(title, start_time, summary="Summary"):
+        return EventDetail(
+            title=title,
+            summary=summary,
+            detail_url=f"https://example.com/{title}",
+            start_time=start_time,
+        )
+
+    saver = EventDetailSaver()
+    await saver.transform(
+        [
+            event("Tomorrow", tomorrow),
+            event("Last year", tomorrow - timedelta(days=365)),
+            event("Undated", None),
+        ]
+    )
+
+    async def upcoming():
+        async with sqlite_db.connect() as conn:
+            result = await conn.execute(
+                select(UpcomingEventDB.title, UpcomingEventDB.summary)
+            )
+            return result.all()
+
+    assert await upcoming() == [("Tomorrow", "Summary")]
+
+    # Updates to saved events are copied to the read model
+    await saver.transform([event("Tomorrow", tomorrow, summary="Rescheduled")])
+    assert await upcoming() == [("Tomorrow", "Rescheduled")]
@@ -0,0 +1,142 @@
+from datetime import datetime
+
+import pytest
+from core.transforms.database import EventDetailSaver, init_db
+from core.transforms.dedup import same_venue, similarity, trigrams
+from event_gulper_models import EventDetail, EventDetailDB
+from sqlalchemy import func, select, text
+
+# Title pairs whose similarity must match pg_trgm's
+PG_TRGM_CASES = [
+    ("word", "two words"),
+    ("Queer Film Night", "queer film-night!"),
+    ("Drag_Bingo", "Drag Bingo"),
+    ("Café Größenwahn", "Cafe Grössenwahn"),
+    ("ÜBER-Party", "über party"),
+    ("SO36 (Kreuzberg)", "SO36, Oranienstr. 190"),
+]
+
+
+def test_similarity_tolerates_small_title_differences():
+    assert similarity("Queer Film Night", "Queer Film Night") == 1.0
+    assert similarity("Queer Film Night", "queer film-night!") == 1.0
+    assert similarity("Queer Film Night", "Queer Film Nights") >= 0.6
+    assert similarity("Queer Film Night", "Karaoke Night") < 0.6
+    assert similarity("", "Karaoke") == 0.0
+
+
+def test_trigrams_follow_pg_trgm():
+    # Examples from the pg_trgm documentation
+    assert trigrams("Cat") == {"  c", " ca", "cat", "at "}
+    assert similarity("word", "two words") == pytest.approx(4 / 11)
+    # Underscores separate words, as any character but letters and digits does
+    assert trigrams("Drag_Bingo") == trigrams("drag bingo")
+
+
+@pytest.mark.asyncio
+async def test_similarity_matches_pg_trgm(pg_db):
+    await init_db()
+    async with pg_db.connect() as conn:
+        installed = await conn.scalar(
+            text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        )
+        if not installed:
+            pytest.skip("pg_trgm is not available on the test database")
+        for a, b in PG_TRGM_CASES:
+            expected = await conn.scalar(select(func.similarity(a, b)))
+            assert similarity(a, b) == pytest.approx(expected, abs=1e-6), (a, b)
+
+
+def test_same_venue():
+    assert same_venue("SO36", "SO36, Oranienstr. 190")
+    assert not same_venue("Schwuz", None)
+    assert not same_venue("SO36", "Schwuz")
+
+
+def _event(title, start_time, location=None, **fields):
+    return EventDetail(
+        title=title,
+        summary="Summary",
+        detail_url="https://example.com/event",
+        start_time=start_time,
+        location=location,
+        **fields,
+    )
+
+
+async def _check_events_from_other_sources_are_merged(engine):
+    await EventDetailSaver(fuzzy_dedup=True).transform(
+        [
+            _event(
+                "Queer Film Night",
+                datetime(2025, 2, 20, 20, 0),
+                "SO36",
+                original_tags=["film"],
+            ),
+        ]
+    )
+
+    telegram_saver = EventDetailSaver(
+        source="telegram", return_only_saved=True, fuzzy_dedup=True
+    )
+    saved = await telegram_saver.transform(
+        [
+            # Same event, reported slightly differently
+            _event(
+                "Queer Film Nights",
+                datetime(2025, 2, 20, 20, 30),
+                "SO36, Oranienstr. 190",
+                price=8,
+                original_tags=["queer", "film"],
+            ),
+            # Similar title, but elsewhere
+            _event("Queer Film Night", datetime(2025, 2, 20, 20, 15), "Schwuz"),
+            # Similar title, but another day
+            _event("Queer Film Night", datetime(2025, 2, 27, 20, 0), "SO36"),
+        ]
+    )
+
+    assert [event.location for event in saved] == ["Schwuz", "SO36"]
+
+    async with engine.connect() as conn:
+        result = await conn.execute(
+            select(EventDetailDB).order_by(EventDetailDB.id).limit(1)
+        )
+        merged = result.one()
+    assert merged.title == "Queer Film Night"
+    assert merged.source == "siegessaeule"
+    assert merged.location == "SO36, Oranienstr. 190"
+    assert merged.price == 8
+    assert merged.original_tags == ["film", "queer"]
+
+
+@pytest.mark.asyncio
+async def test_fuzzy_dedup_merges_events_from_other_sources(sqlite_db):
+    await _check_events_from_other_sources_are_merged(sqlite_db)
+
+
+@pytest.mark.asyncio
+async def test_fuzzy_dedup_on_postgres(pg_db):
+    # Titles are compared in the query if the server has pg_trgm
+    await init_db()
+    await _check_events_from_other_sources_are_merged(pg_db)
+
+
+@pytest.mark.asyncio
+async def test_events_without_location_need_closer_titles(sqlite_db):
+    await EventDetailSaver(fuzzy_dedup=True).transform(
+        [_event("Queer Film Night", datetime(2025, 2, 20, 20, 0), "SO36")]
+    )
+
+    saved = await EventDetailSaver(
+        source="telegram", return_only_saved=True, fuzzy_dedup=True
+    ).transform(
+        [
+            # Similar enough at the same venue, but the venue is unknown
+            _event("Queer Film Nights", datetime(2025, 2, 20, 20, 30)),
+            # Same title, so the same event wherever it is
+            _event("Queer Film Night!", datetime(2025, 2, 20, 20, 15)),
+        ]
+    )
+
+    assert [event.title for event in saved] == ["Queer Film Nights"]
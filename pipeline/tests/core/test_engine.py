@@ -0,0 +1,107 @@
+from types import SimpleNamespace
+
+import pytest
+from core.engine import (
+    EngineStats,
+    _retry_delay,
+    lightweight_engine,
+    run_task,
+    run_transform,
+)
+from core.pipelines import Pipeline
+from core.transforms.database import EventURLSaver
+from event_gulper_models import EventURL
+from prefect import task
+from prefect.tasks import exponential_backoff
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from tests.fakes import ListSource
+
+attempts = []
+
+
+@task(name="flaky_double", retries=2, retry_delay_seconds=0)
+async def flaky_double(items):
+    attempts.append(items)
+    if len(attempts) < 2:
+        raise ConnectionError("reset by peer")
+    return [item * 2 for item in items]
+
+
+class Doubler:
+    @task(name="double_items")
+    async def transform(self, items):
+        return [item * 2 for item in items]
+
+
+@pytest.mark.asyncio
+async def test_lightweight_engine_retries_tasks_and_records_stats():
+    attempts.clear()
+
+    with lightweight_engine() as stats:
+        assert await run_task(flaky_double, [1, 2]) == [2, 4]
+        assert await run_transform(Doubler(), [3]) == [6]
+
+    assert len(attempts) == 2
+    assert stats.tasks["flaky_double"].calls == 1
+    assert stats.tasks["flaky_double"].retries == 1
+    assert stats.tasks["flaky_double"].failures == 0
+    assert stats.tasks["double_items"].calls == 1
+
+
+@pytest.mark.asyncio
+async def test_lightweight_engine_raises_once_retries_are_exhausted():
+    @task(name="always_fails", retries=1, retry_delay_seconds=[0])
+    async def always_fails():
+        raise ConnectionError("reset by peer")
+
+    with lightweight_engine() as stats:
+        with pytest.raises(ConnectionError):
+            await run_task(always_fails)
+
+    assert stats.tasks["always_fails"].retries == 1
+    assert stats.tasks["always_fails"].failures == 1
+
+
+@pytest.mark.asyncio
+async def test_lightweight_pipeline_runs_transformers(sqlite_db):
+    pipeline = Pipeline(
+        ListSource([["a", "b"], ["c"]]),
+        [EventURLSaver(return_only_saved=True)],
+        max_batches=None,
+        lightweight=True,
+    )
+
+    assert await pipeline.run() == ["a", "b", "c"]
+    async with AsyncSession(sqlite_db) as session:
+        result = await session.execute(select(EventURL.url).order_by(EventURL.url))
+        assert list(result.scalars()) == ["a", "b", "c"]
+
+
+def test_retry_delays_follow_backoff_functions():
+    backoff = SimpleNamespace(retries=3, retry_delay_seconds=exponential_backoff(2))
+    assert [_retry_delay(backoff, retry) for retry in range(3)] == [2, 4, 8]
+
+    fixed = SimpleNamespace(retries=2, retry_delay_seconds=30)
+    assert _retry_delay(fixed, 1) == 30
+
+
+@pytest.mark.asyncio
+async def test_lightweight_pipeline_logs_stats_when_it_fails(monkeypatch):
+    class Failing:
+        @task(name="failing_transform")
+        async def transform(self, items):
+            raise ValueError("broken batch")
+
+        async def flush(self):
+            pass
+
+    logged = []
+    monkeypatch.setattr(EngineStats, "log", lambda stats: logged.append(stats))
+    pipeline = Pipeline(ListSource([[1]]), [Failing()], lightweight=True)
+
+    with pytest.raises(ValueError):
+        await pipeline.run()
+
+    assert logged[0].tasks["failing_transform"].failures == 1
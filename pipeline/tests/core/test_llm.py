@@ -1,12 +1,27 @@
+from datetime import datetime
+from uuid import uuid4
+
 import pytest
-from core.transforms.llm import md_to_event_structure
+from core.transforms.database import content_hash, update_item_states
+from core.transforms.llm import (
+    MdToEventTransformer,
+    ModelCascade,
+    md_to_event_structure,
+    validate_event_detail,
+)
+from core.transforms.scrape import ScrapedMarkdown
+from event_gulper_models import EventDetail, ItemStage
+
+from tests.fakes import FakeLLMClient
+
+EVENT_URL = "https://www.siegessaeule.de/en/events/mix/psychologische-beratung/2025-02-20/17:00/"
 
 
 @pytest.mark.asyncio
 @pytest.mark.llm
 async def test_md_to_event_structure(llm_client, url_to_md_scraper):
     # Use a specific event URL for testing
-    event_url = "https://www.siegessaeule.de/en/events/mix/psychologische-beratung/2025-02-20/17:00/"
+    event_url = EVENT_URL
 
     # scrape content
     markdown_results = await url_to_md_scraper.transform([event_url])
@@ -21,3 +36,112 @@ async def test_md_to_event_structure(llm_client, url_to_md_scraper):
     assert event_data.title == "Psychologische Beratung"
     assert "HIV" in event_data.summary
     assert "Bülowstr. 106" in event_data.location
+
+
+def _event(**overrides):
+    fields = {
+        "title": "Psychologische Beratung",
+        "summary": "Counselling for people with HIV",
+        "detail_url": EVENT_URL,
+        "start_time": datetime(2025, 2, 20, 17, 0),
+    }
+    fields.update(overrides)
+    return EventDetail(**fields)
+
+
+def test_validate_event_detail():
+    assert validate_event_detail(_event(), expected_url=EVENT_URL) == []
+
+    problems = validate_event_detail(
+        _event(summary=" ", start_time=None), expected_url="https://example.com/"
+    )
+    assert "missing summary" in problems
+    assert "missing start_time" in problems
+    assert any("detail_url" in problem for problem in problems)
+
+
+@pytest.mark.asyncio
+async def test_model_cascade_stays_on_fast_path():
+    client = FakeLLMClient({"fast": _event(), "strong": _event()})
+    cascade = ModelCascade(client, ["fast", "strong"])
+
+    event = await cascade.extract("markdown")
+
+    assert event.title == "Psychologische Beratung"
+    assert client.chat.completions.calls == ["fast"]
+    assert cascade.stats["fast"].hit_rate == 1.0
+    assert cascade.stats["strong"].calls == 0
+
+
+@pytest.mark.asyncio
+async def test_model_cascade_escalates_invalid_and_failed_items():
+    client = FakeLLMClient(
+        {"fast": _event(start_time=None), "medium": ValueError(), "strong": _event()}
+    )
+    cascade = ModelCascade(client, ["fast", "medium", "strong"])
+
+    event = await cascade.extract("markdown")
+
+    assert event.start_time is not None
+    assert client.chat.completions.calls == ["fast", "medium", "strong"]
+    assert cascade.stats["fast"].hit_rate == 0.0
+    assert cascade.stats["medium"].errors == 1
+    assert cascade.stats["strong"].accepted == 1
+
+
+@pytest.mark.asyncio
+async def test_scraped_pages_are_checked_against_their_url():
+    client = FakeLLMClient(
+        {"fast": _event(detail_url="https://example.com/other"), "strong": _event()}
+    )
+    transformer = MdToEventTransformer(client, models=["fast", "strong"])
+
+    # Unique markdown, so no extraction cached by earlier test runs applies
+    page = ScrapedMarkdown(f"markdown {uuid4()}", EVENT_URL)
+    events = await transformer.transform([page])
+
+    assert client.chat.completions.calls == ["fast", "strong"]
+    assert str(events[0].detail_url) == EVENT_URL
+    assert events[0].item_url == EVENT_URL
+
+
+@pytest.mark.asyncio
+async def test_invalid_checkpoints_are_extracted_again(sqlite_db):
+    pages = [
+        ScrapedMarkdown(f"markdown {uuid4()}", f"{EVENT_URL}{index}")
+        for index in range(2)
+    ]
+    # One event checkpointed by an earlier run, one stored by an older model
+    await update_item_states(
+        {
+            pages[0].url: {
+                "content_hash": content_hash(pages[0]),
+                "stage": ItemStage.EXTRACTED,
+                "event_json": _event(detail_url=pages[0].url).model_dump_json(),
+            },
+            pages[1].url: {
+                "content_hash": content_hash(pages[1]),
+                "stage": ItemStage.EXTRACTED,
+                "event_json": '{"name": "Psychologische Beratung"}',
+            },
+        }
+    )
+    client = FakeLLMClient({"fast": _event(detail_url=pages[1].url)})
+    transformer = MdToEventTransformer(client, models=["fast"], checkpoint=True)
+
+    events = await transformer.transform(pages)
+
+    assert [event.item_url for event in events] == [page.url for page in pages]
+    assert client.chat.completions.calls == ["fast"]
+
+
+@pytest.mark.asyncio
+async def test_extractions_are_not_reused_by_other_cascades():
+    client = FakeLLMClient({"fast": _event(), "strong": _event()})
+    page = ScrapedMarkdown(f"markdown {uuid4()}", EVENT_URL)
+
+    await MdToEventTransformer(client, models=["fast"]).transform([page])
+    await MdToEventTransformer(client, models=["strong"]).transform([page])
+    await MdToEventTransformer(client, models=["strong"]).transform([page])
+
+    assert client.chat.completions.calls == ["fast", "strong"]
@@ -0,0 +1,160 @@
+import asyncio
+from datetime import date, datetime
+
+import pytest
+from core.transforms import database
+from core.transforms.database import archive_event_partitions, init_db
+from sqlalchemy import text
+
+
+async def _partition_of(conn, title):
+    result = await conn.execute(
+        text("SELECT tableoid::regclass::text FROM event_details WHERE title = :title"),
+        {"title": title},
+    )
+    return result.scalar()
+
+
+def _months_from_now(months):
+    return database._add_months(date.today().replace(day=1), months)
+
+
+@pytest.mark.asyncio
+async def test_init_db_partitions_existing_events(pg_db, monkeypatch):
+    far_future = _months_from_now(12)
+    async with pg_db.begin() as conn:
+        # event_details as created before it was partitioned, with tags as text
+        await conn.execute(
+            text(
+                "CREATE TABLE event_details (id SERIAL PRIMARY KEY, title varchar, "
+                "summary varchar, description text, location varchar, "
+                "start_time timestamp, end_time timestamp, organizer varchar, "
+                "source_url varchar, image_url varchar, attendees integer, "
+                "price float, original_tags varchar, source varchar, "
+                "created_at timestamp, updated_at timestamp)"
+            )
+        )
+        await conn.execute(
+            text(
+                "INSERT INTO event_details (title, summary, start_time, original_tags) "
+                "VALUES ('Old', 's', '2024-03-15 20:00', 'queer,party'), "
+                "('Undated', 's', NULL, NULL)"
+            )
+        )
+
+    await init_db()
+
+    async with pg_db.begin() as conn:
+        assert await _partition_of(conn, "Old") == "event_details_2024_03"
+        assert await _partition_of(conn, "Undated") == "event_details_default"
+        result = await conn.execute(
+            text("SELECT original_tags FROM event_details WHERE title = 'Old'")
+        )
+        assert result.scalar() == ["queer", "party"]
+
+        partitions = await conn.run_sync(database._event_partitions)
+        assert set(partitions) >= {
+            _months_from_now(ahead)
+            for ahead in range(database.EVENT_PARTITION_MONTHS_AHEAD + 1)
+        }
+
+        # New ids continue after the copied ones
+        result = await conn.execute(
+            text("INSERT INTO event_details (title) VALUES ('New') RETURNING id")
+        )
+        assert result.scalar() == 3
+
+        # Beyond the partitions created ahead, so kept in the default partition
+        await conn.execute(
+            text("INSERT INTO event_details (title, start_time) VALUES (:title, :at)"),
+            {
+                "title": "Far future",
+                "at": datetime.combine(far_future, datetime.min.time()),
+            },
+        )
+        assert await _partition_of(conn, "Far future") == "event_details_default"
+
+    # Once its month gets a partition, the event moves out of the default one
+    monkeypatch.setattr(database, "EVENT_PARTITION_MONTHS_AHEAD", 12)
+    await init_db()
+
+    async with pg_db.begin() as conn:
+        assert await _partition_of(conn, "Far future") == (
+            f"event_details_{far_future:%Y_%m}"
+        )
+
+
+@pytest.mark.asyncio
+async def test_old_partitions_are_archived(pg_db):
+    await init_db()
+    async with pg_db.begin() as conn:
+        await conn.run_sync(database._create_event_partition, date(2024, 3, 1))
+        await conn.execute(
+            text(
+                "INSERT INTO event_details (title, start_time) VALUES "
+                "('Old', '2024-03-15 20:00'), ('Current', now()), "
+                # Stored in the default partition, as its month has none
+                "('Stray', '2023-11-02 20:00'), ('Undated', NULL)"
+            )
+        )
+
+    assert await archive_event_partitions(retain_months=3) == [
+        "event_details_2023_11",
+        "event_details_2024_03",
+    ]
+
+    async with pg_db.begin() as conn:
+        result = await conn.execute(
+            text("SELECT title FROM event_details ORDER BY title")
+        )
+        assert result.scalars().all() == ["Current", "Undated"]
+        result = await conn.execute(
+            text("SELECT title FROM event_archive.event_details_2024_03")
+        )
+        assert result.scalars().all() == ["Old"]
+        result = await conn.execute(
+            text("SELECT title FROM event_archive.event_details_2023_11")
+        )
+        assert result.scalars().all() == ["Stray"]
+        # Logged, so API caches see a new data version
+        result = await conn.execute(
+            text("SELECT name FROM archived_partitions ORDER BY name")
+        )
+        assert result.scalars().all() == [
+            "event_details_2023_11",
+            "event_details_2024_03",
+        ]
+
+    # Nothing left to archive
+    assert await archive_event_partitions(retain_months=3) == []
+
+
+@pytest.mark.asyncio
+async def test_concurrent_init_db_calls_take_turns(pg_db):
+    # As when several backfill workers start at once on an empty database
+    await asyncio.gather(*(init_db() for _ in range(4)))
+
+    async with pg_db.connect() as conn:
+        partitions = await conn.scalar(
+            text(
+                "SELECT count(*) FROM pg_inherits "
+                "WHERE inhparent = 'event_details'::regclass"
+            )
+        )
+    assert partitions > 1
+
+
+@pytest.mark.asyncio
+async def test_archiving_waits_for_schema_upkeep(pg_db):
+    await init_db()
+    async with pg_db.begin() as conn:
+        # As if init_db were creating or migrating partitions meanwhile
+        await conn.execute(
+            text("SELECT pg_advisory_xact_lock(:key)"),
+            {"key": database.INIT_DB_LOCK_KEY},
+        )
+        archiving = asyncio.create_task(archive_event_partitions(retain_months=3))
+        await asyncio.sleep(0.2)
+        assert not archiving.done()
+
+    assert await archiving == []
@@ -0,0 +1,83 @@
+import threading
+import time
+import tracemalloc
+
+import pytest
+from core.pipelines import Pipeline
+from core.profiling import BatchProfiler
+from core.transforms.protocols import Transformer
+
+from tests.fakes import ListSource
+
+
+def build_strings(count):
+    return [f"item {i}" * 10 for i in range(count)]
+
+
+class Expander(Transformer[int, str]):
+    async def transform(self, items):
+        return [string for count in items for string in build_strings(count)]
+
+
+def build_strings_for(seconds):
+    strings = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        strings += build_strings(1000)
+    return strings
+
+
+def spin(stopped):
+    while not stopped.is_set():
+        sum(range(1000))
+
+
+def test_batch_profiler_reports_cpu_and_memory_per_batch():
+    # Busy threads must not show up in the profile of the calling thread
+    stopped = threading.Event()
+    thread = threading.Thread(target=spin, args=(stopped,))
+    thread.start()
+
+    profiler = BatchProfiler(top=5)
+    profiler.start()
+    try:
+        with profiler.stage("expand"):
+            kept = build_strings_for(0.2)
+    finally:
+        stopped.set()
+        thread.join()
+
+    report = profiler.batch_report()
+    profiler.stop()
+
+    assert "build_strings_for" in report["cpu"]["expand"]
+    assert "spin" not in report["cpu"]["expand"]
+    assert report["memory"] and report["memory_traced_bytes"] > 0
+    assert not tracemalloc.is_tracing()
+    assert profiler.batch_report() == {"cpu": {}}
+    assert kept
+
+
+@pytest.mark.asyncio
+async def test_profiled_pipeline_runs_normally():
+    pipeline = Pipeline(
+        ListSource([[1, 2], [3]]), [Expander()], max_batches=None, profile=True
+    )
+
+    assert len(await pipeline.run()) == 6
+    assert not tracemalloc.is_tracing()
+
+
+class Failing(Transformer[str, str]):
+    async def transform(self, items):
+        raise ValueError("broken batch")
+
+
+@pytest.mark.asyncio
+async def test_profiles_of_failed_batches_are_not_reported_with_the_next():
+    pipeline = Pipeline(ListSource([[1]]), [Expander(), Failing()], profile=True)
+
+    with pytest.raises(ValueError):
+        await pipeline._transform_batch([1], 0)
+
+    assert pipeline.profiler.batch_report()["cpu"] == {}
@@ -1,5 +1,8 @@
+from uuid import uuid4
+
 import pytest
-from core.transforms.scrape import ScrapeURLAsMarkdown
+from core.transforms.scrape import SCRAPE_RETRIES, ScrapeURLAsMarkdown
+from httpx import AsyncClient, MockTransport, Response
 
 
 @pytest.mark.asyncio
@@ -47,7 +50,7 @@ async def test_scrape_multiple_urls(url_to_md_scraper):
 
 @pytest.mark.asyncio
 async def test_scrape_invalid_selector(http_client):
-    """Test scraping with an invalid selector returns error message."""
+    """Test that pages without the selected section are dropped, not passed on."""
     test_url = "https://www.siegessaeule.de/en/events/mix/psychologische-beratung/2025-02-20/17:00/"
 
     # Create scraper with invalid selector
@@ -55,5 +58,54 @@ async def test_scrape_invalid_selector(http_client):
 
     markdown_results = await bad_scraper.transform([test_url])
 
-    # Check error message
-    assert "Error: Could not find section matching selector" in markdown_results[0]
+    # The error must not reach downstream stages as if it were content
+    assert markdown_results == []
+
+
+@pytest.mark.asyncio
+async def test_failed_urls_are_retried_and_not_cached(no_retry_delay):
+    # Unique URLs, so no results cached by earlier test runs apply
+    run = uuid4().hex
+    urls = [f"https://example.com/{run}/ok", f"https://example.com/{run}/broken"]
+    requested_urls = []
+
+    def handler(request):
+        requested_urls.append(str(request.url))
+        if str(request.url) == urls[1]:
+            return Response(503)
+        return Response(200, text=f"<main>{request.url.path}</main>")
+
+    async with AsyncClient(transport=MockTransport(handler)) as client:
+        scraper = ScrapeURLAsMarkdown(client)
+        assert len(await scraper.transform(urls)) == 1
+        # Only the failing URL is retried
+        assert requested_urls == [urls[0]] + [urls[1]] * (1 + SCRAPE_RETRIES)
+
+        # The batch with a failure was not cached, so it is scraped again
+        requested_urls.clear()
+        assert len(await scraper.transform(urls)) == 1
+        assert urls[0] in requested_urls
+
+
+@pytest.mark.asyncio
+async def test_only_transient_failures_are_retried(no_retry_delay):
+    run = uuid4().hex
+    pages = {
+        f"https://example.com/{run}/missing": Response(404),
+        f"https://example.com/{run}/unexpected": Response(200, text="<div></div>"),
+        f"https://example.com/{run}/limited": Response(429),
+    }
+    requested_urls = []
+
+    def handler(request):
+        requested_urls.append(str(request.url))
+        return pages[str(request.url)]
+
+    async with AsyncClient(transport=MockTransport(handler)) as client:
+        assert await ScrapeURLAsMarkdown(client).transform(list(pages)) == []
+
+    # Pages that are gone or lack the content would fail the same way again
+    missing, unexpected, limited = pages
+    assert requested_urls.count(missing) == 1
+    assert requested_urls.count(unexpected) == 1
+    assert requested_urls.count(limited) == 1 + SCRAPE_RETRIES
@@ -0,0 +1,64 @@
+from datetime import datetime
+
+import pytest
+from core.transforms.database import EventDetailSaver
+from core.transforms.venues import VenueNormalizer, split_location
+from event_gulper_models import EventDetail, EventDetailDB, VenueDB
+from sqlalchemy import select
+
+
+def test_split_location():
+    assert split_location("SO36, Oranienstr. 190") == ("SO36", "Oranienstr. 190")
+    assert split_location("Schwuz") == ("Schwuz", None)
+
+
+def _event(title, location):
+    return EventDetail(
+        title=title,
+        summary="Summary",
+        detail_url="https://example.com/event",
+        start_time=datetime(2025, 2, 20, 20, 0),
+        location=location,
+    )
+
+
+@pytest.mark.asyncio
+async def test_locations_are_normalized_to_venues(sqlite_db):
+    normalizer = VenueNormalizer()
+    events = await normalizer.transform(
+        [
+            _event("Party", "SO36, Oranienstr. 190"),
+            _event("Concert", "so36!"),
+            _event("Drag show", "Schwuz"),
+            _event("Karaoke", "SchwuZZ"),
+            _event("Reading", None),
+            _event("Film", "SO36, Oranienstr. 190"),
+        ]
+    )
+    so36, _, schwuz, _, _, _ = [event.venue_id for event in events]
+
+    assert [event.venue_id for event in events] == [
+        so36,
+        so36,
+        schwuz,
+        schwuz,
+        None,
+        so36,
+    ]
+    assert so36 != schwuz
+    # The repeated location string is served from the cache
+    assert (normalizer.hits, normalizer.misses) == (1, 4)
+
+    await EventDetailSaver().transform(events)
+
+    async with sqlite_db.connect() as conn:
+        result = await conn.execute(select(VenueDB.name, VenueDB.address))
+        assert result.all() == [("SO36", "Oranienstr. 190"), ("Schwuz", None)]
+        result = await conn.execute(
+            select(EventDetailDB.title).where(EventDetailDB.venue_id == so36)
+        )
+        assert result.scalars().all() == ["Party", "Concert", "Film"]
+
+    # Later runs match the stored venues
+    [event] = await VenueNormalizer().transform([_event("Quiz", "SO36")])
+    assert event.venue_id == so36
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+from core.transforms.write_behind import WriteBehindBuffer
+
+
+class RecordingWriter:
+    def __init__(self, fail: bool = False):
+        self.writes = []
+        self.fail = fail
+
+    async def __call__(self, items):
+        if self.fail:
+            raise RuntimeError("database unavailable")
+        self.writes.append(items)
+
+
+@pytest.mark.asyncio
+async def test_buffer_coalesces_batches_by_size():
+    writer = RecordingWriter()
+    buffer = WriteBehindBuffer(writer, flush_size=4, flush_interval=60)
+
+    await buffer.add([1, 2])
+    await buffer.add([3])
+    await asyncio.sleep(0)
+    assert writer.writes == []
+
+    await buffer.add([4, 5])
+    await asyncio.sleep(0)
+    assert writer.writes == [[1, 2, 3, 4, 5]]
+
+    await buffer.add([6])
+    await buffer.flush()
+    assert writer.writes == [[1, 2, 3, 4, 5], [6]]
+
+
+@pytest.mark.asyncio
+async def test_buffer_flushes_after_interval():
+    writer = RecordingWriter()
+    buffer = WriteBehindBuffer(writer, flush_size=100, flush_interval=0.01)
+
+    await buffer.add([1])
+    await asyncio.sleep(0.05)
+
+    assert writer.writes == [[1]]
+    await buffer.flush()
+
+
+@pytest.mark.asyncio
+async def test_buffer_propagates_write_errors():
+    writer = RecordingWriter(fail=True)
+    buffer = WriteBehindBuffer(writer, flush_size=1, flush_interval=60)
+
+    await buffer.add([1])
+    await asyncio.sleep(0)
+
+    with pytest.raises(RuntimeError, match="database unavailable"):
+        await buffer.add([2])
+
+    # Items of the failed write stay buffered for the next attempt
+    writer.fail = False
+    await buffer.add([2])
+    await buffer.flush()
+    assert writer.writes == [[1, 2]]
+
+
+@pytest.mark.asyncio
+async def test_buffer_waits_for_a_write_when_full():
+    written = asyncio.Event()
+
+    async def slow_writer(items):
+        await written.wait()
+
+    buffer = WriteBehindBuffer(slow_writer, flush_size=2, flush_interval=60, max_size=4)
+    await buffer.add([1, 2])
+    await asyncio.sleep(0)
+
+    # The first write is in progress, so a full buffer holds up the caller
+    adding = asyncio.create_task(buffer.add([3, 4, 5, 6]))
+    await asyncio.sleep(0.01)
+    assert not adding.done()
+
+    written.set()
+    await adding
+    await buffer.flush()
+    assert len(buffer) == 0
@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+
+
+class ListSource:
+    """Source yielding fixed batches, counting how many were fetched."""
+
+    def __init__(self, batches):
+        self.batches = batches
+        self.fetched = 0
+
+    async def fetch_batches(self):
+        for batch in self.batches:
+            self.fetched += 1
+            yield batch
+
+
+class FakeCompletions:
+    """Fake `chat.completions` returning a fixed response per model."""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.calls = []
+
+    async def create(self, model, response_model, messages):
+        self.calls.append(model)
+        response = self.responses[model]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+class FakeLLMClient:
+    """Offline stand-in for an Instructor client."""
+
+    def __init__(self, responses):
+        self.chat = SimpleNamespace(completions=FakeCompletions(responses))
+
+
+class FakeTelegramClient:
+    """Offline stand-in for a Telethon client, serving fixed messages per chat."""
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.requests = []
+
+    async def iter_messages(self, entity, min_id=0, reverse=False):
+        self.requests.append((entity, min_id))
+        messages = sorted(
+            (message for message in self.messages[entity] if message.id > min_id),
+            key=lambda message: message.id,
+            reverse=not reverse,
+        )
+        for message in messages:
+            yield message
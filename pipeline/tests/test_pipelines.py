@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+from core import engine
+from core.engine import lightweight_engine, run_transform
+from core.pipelines import Pipeline
+from core.transforms.database import EventURLSaver
+from core.transforms.protocols import Transformer
+from event_gulper_models import EventURL
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from tests.fakes import ListSource
+
+
+async def _saved_urls(engine):
+    async with AsyncSession(engine) as session:
+        result = await session.execute(select(EventURL.url))
+        return sorted(result.scalars())
+
+
+@pytest.mark.asyncio
+async def test_pipeline_flushes_write_behind_savers(sqlite_db):
+    url_saver = EventURLSaver(
+        return_only_saved=True, write_behind=True, flush_interval=60
+    )
+    source = ListSource([["a", "b"], ["b", "c"]])
+
+    # URLs are deduplicated across batches before they are written
+    assert await url_saver.transform(["a", "b"]) == ["a", "b"]
+    assert await url_saver.transform(["b", "c"]) == ["c"]
+    assert await _saved_urls(sqlite_db) == []
+
+    await url_saver.flush()
+    assert await _saved_urls(sqlite_db) == ["a", "b", "c"]
+
+    # Running a pipeline writes everything still buffered when it completes
+    pipeline = Pipeline(source, [url_saver], max_batches=None)
+    assert await pipeline.run() == []
+    assert await url_saver.transform(["d"]) == ["d"]
+    await Pipeline(ListSource([["e"]]), [url_saver]).run()
+    assert await _saved_urls(sqlite_db) == ["a", "b", "c", "d", "e"]
+
+
+@pytest.mark.asyncio
+async def test_write_behind_batches_survive_a_failed_flush(sqlite_db, monkeypatch):
+    monkeypatch.setattr(engine, "_retry_delay", lambda task, retry: 0)
+    url_saver = EventURLSaver(
+        return_only_saved=True, write_behind=True, flush_size=1, flush_interval=60
+    )
+    write = url_saver.buffer.write
+    failed = []
+
+    async def fail_once(items):
+        if not failed:
+            failed.append(items)
+            raise RuntimeError("database unavailable")
+        await write(items)
+
+    url_saver.buffer.write = fail_once
+
+    with lightweight_engine() as stats:
+        assert await run_transform(url_saver, ["a"]) == ["a"]
+        await asyncio.sleep(0.01)
+        # The failed flush fails the next batch, whose retry still passes it on
+        assert await run_transform(url_saver, ["b"]) == ["b"]
+    await url_saver.flush()
+
+    assert stats.tasks["save_event_urls"].retries == 1
+    assert await _saved_urls(sqlite_db) == ["a", "b"]
+
+
+class FailingFlush(Transformer[str, str]):
+    """Transformer whose deferred work fails, after failing a batch if asked."""
+
+    def __init__(self, fail_batch=False):
+        self.fail_batch = fail_batch
+        self.flushed = False
+
+    async def transform(self, items):
+        if self.fail_batch:
+            raise ValueError("broken batch")
+        return items
+
+    async def flush(self):
+        self.flushed = True
+        raise ConnectionError("database gone")
+
+
+@pytest.mark.asyncio
+async def test_flush_errors_do_not_mask_the_run_error():
+    passing, failing = FailingFlush(), FailingFlush(fail_batch=True)
+    pipeline = Pipeline(ListSource([["a"]]), [passing, failing])
+
+    with pytest.raises(ValueError):
+        await pipeline.run()
+    # Every transformer is flushed, even after a failing flush
+    assert passing.flushed and failing.flushed
+
+    # Without a run error, a flush error is raised
+    with pytest.raises(ConnectionError):
+        await Pipeline(ListSource([["a"]]), [FailingFlush()]).run()
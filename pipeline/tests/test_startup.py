@@ -0,0 +1,23 @@
+import subprocess
+import sys
+from pathlib import Path
+
+# Modules only needed once a flow runs, which must not slow down worker startup
+LAZY_MODULES = ["bs4", "instructor", "markdownify", "openai"]
+
+
+def test_importing_the_flows_does_not_load_lazy_dependencies():
+    script = (
+        "import sys\n"
+        "import orchestration.backfill_flow, orchestration.dead_letter_flow\n"
+        f"print([name for name in {LAZY_MODULES!r} if name in sys.modules])"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=Path(__file__).parents[1],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert result.stdout.strip() == "[]"